@@ -0,0 +1,9 @@
+"""
+ベンチマークパッケージ
+
+合成データを使って売上推移（uriage_suii）とZAICOツール（zaico）の処理時間を計測し、
+結果をJSONに記録して前回の結果と比較します。
+
+使用方法:
+    python -m benchmarks [--months 24] [--products 3000] [--inventories 5000] [--compare 前回の結果.json]
+"""
@@ -0,0 +1,7 @@
+"""
+python -m benchmarks でベンチマークを実行する
+"""
+from .run import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+ベンチマーク実行モジュール
+
+合成データを作業ディレクトリに作成し、各処理の時間を計測します。
+ZAICOツールの計測にはローカルのAPIスタブ（zaico.stub）を使用するため、実際のAPIには接続しません。
+
+計測する処理:
+- uriage_suii.ingest           売上月報の読み込み（キャッシュなし・1プロセス）
+- uriage_suii.ingest_parallel  売上月報の読み込み（キャッシュなし・WORKERSプロセス）
+- uriage_suii.ingest_cached    売上月報の読み込み（キャッシュあり）
+- uriage_suii.pivot            年月別の推移表の作成（金額・数量）
+- uriage_suii.split            商品分類の付与と分類ごとの分割（金額・数量）
+- uriage_suii.write            Excelの出力（金額・数量）
+- zaico.export                 在庫一覧のCSVエクスポート
+- zaico.register               CSVからの新規商品登録
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from uriage_suii import config as uriage_config
+from uriage_suii.reports import (
+    list_monthly_reports,
+    read_monthly_reports,
+    pivot_measure,
+    read_ledger,
+    add_category,
+    split_by_category,
+    is_own_category,
+    write_sales_trends
+)
+from zaico.client import ZaicoClient, set_client
+from zaico.config import INVENTORY_FETCH_CONCURRENCY, REGISTER_WORKERS
+from zaico.export_inventory import export_inventories_to_csv
+from zaico.register_items import register_items_from_csv
+from zaico.stub import ZaicoStub, make_inventories
+
+from .synthetic import write_ledger, write_registration_csv, write_sales_reports
+
+
+# 結果の保存先
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+MEASURES = [uriage_config.MEASURE_AMOUNT, uriage_config.MEASURE_QUANTITY]
+
+
+def measure(func: Callable[[], Any], repeat: int) -> List[float]:
+    """
+    関数を repeat 回実行し、それぞれの実行時間を計測する
+
+    Args:
+        func: 計測する関数
+        repeat: 実行回数
+
+    Returns:
+        List[float]: 実行時間（秒）
+    """
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _uriage_suii_cases(workdir: str, months: int, products: int) -> Dict[str, Callable[[], Any]]:
+    report_dir = os.path.join(workdir, 'reports')
+    ledger_path = os.path.join(workdir, '商品台帳.xlsx')
+    cache_dir = os.path.join(workdir, 'cache')
+    write_sales_reports(report_dir, months, products)
+    write_ledger(ledger_path, products)
+
+    files = list_monthly_reports(report_dir)
+    categories = uriage_config.CATEGORIES
+    df_report = read_monthly_reports(files, MEASURES, workers=1, cache_dir=cache_dir)
+    df_ledger = read_ledger(ledger_path, cache_dir=None)
+    pivots = [pivot_measure(df_report, measure) for measure in MEASURES]
+    amount = split_by_category(add_category(pivots[0], df_ledger), categories, unclassified=True)
+    quantity = split_by_category(add_category(pivots[1], df_ledger), [cat for cat in categories if is_own_category(cat)])
+
+    def split() -> None:
+        split_by_category(add_category(pivots[0], df_ledger), categories, unclassified=True)
+        split_by_category(add_category(pivots[1], df_ledger), [cat for cat in categories if is_own_category(cat)])
+
+    return {
+        'uriage_suii.ingest': lambda: read_monthly_reports(files, MEASURES, workers=1, cache_dir=None),
+        'uriage_suii.ingest_parallel': lambda: read_monthly_reports(
+            files, MEASURES, workers=uriage_config.WORKERS, cache_dir=None
+        ),
+        'uriage_suii.ingest_cached': lambda: read_monthly_reports(files, MEASURES, workers=1, cache_dir=cache_dir),
+        'uriage_suii.pivot': lambda: [pivot_measure(df_report, measure) for measure in MEASURES],
+        'uriage_suii.split': split,
+        'uriage_suii.write': lambda: write_sales_trends(
+            amount, quantity, categories,
+            os.path.join(workdir, '売上金額推移.xlsx'), os.path.join(workdir, '売上数量推移.xlsx')
+        ),
+    }
+
+
+def _zaico_cases(workdir: str, registrations: int) -> Dict[str, Callable[[], Any]]:
+    csv_path = os.path.join(workdir, 'new.csv')
+    write_registration_csv(csv_path, registrations)
+    return {
+        'zaico.export': lambda: export_inventories_to_csv(
+            os.path.join(workdir, 'inventory_export.csv'), concurrency=INVENTORY_FETCH_CONCURRENCY
+        ),
+        'zaico.register': lambda: register_items_from_csv(
+            csv_path, REGISTER_WORKERS, os.path.join(workdir, 'new_failed.csv')
+        ),
+    }
+
+
+def run_benchmarks(
+    workdir: str,
+    months: int = 24,
+    products: int = 3000,
+    inventories: int = 5000,
+    registrations: int = 200,
+    repeat: int = 3,
+    only: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    ベンチマークを実行する
+
+    Args:
+        workdir: 合成データの作成先
+        months: 売上月報の月数
+        products: 商品数（売上月報・商品台帳）
+        inventories: スタブに用意する在庫数
+        registrations: 新規商品登録の行数
+        repeat: 各処理の実行回数
+        only: 実行する処理名の前方一致（省略時はすべて）
+
+    Returns:
+        Dict[str, Any]: 実行条件と処理ごとの結果（min, median, runs）
+    """
+    def selected(name: str) -> bool:
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    results: Dict[str, Any] = {}
+
+    def run(cases: Dict[str, Callable[[], Any]]) -> None:
+        for name, func in cases.items():
+            if not selected(name):
+                continue
+            timings = measure(func, repeat)
+            results[name] = {'min': min(timings), 'median': statistics.median(timings), 'runs': timings}
+            print(f'{name:<30} {results[name]["median"]:>9.3f}s (min {results[name]["min"]:.3f}s)')
+
+    if selected('uriage_suii.'):
+        run(_uriage_suii_cases(os.path.join(workdir, 'uriage_suii'), months, products))
+
+    if selected('zaico.'):
+        zaico_dir = os.path.join(workdir, 'zaico')
+        os.makedirs(zaico_dir, exist_ok=True)
+        with ZaicoStub(make_inventories(inventories)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='bench', rate_limit=0))
+            try:
+                run(_zaico_cases(zaico_dir, registrations))
+            finally:
+                set_client(None)
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': {
+            'months': months, 'products': products, 'inventories': inventories,
+            'registrations': registrations, 'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, float]:
+    """
+    前回の結果と比較し、処理ごとの変化率を表示する
+
+    Args:
+        current: 今回の結果
+        baseline: 比較対象の結果
+
+    Returns:
+        Dict[str, float]: 処理名ごとの中央値の変化率（%、正の値は遅くなったことを表す）
+    """
+    if current['params'] != baseline.get('params'):
+        print(f'注意: 実行条件が異なります（比較対象: {baseline.get("params")}）')
+
+    changes = {}
+    print(f'{"処理":<30} {"比較対象":>10} {"今回":>10} {"変化":>8}')
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None or not base['median']:
+            continue
+        changes[name] = (result['median'] - base['median']) / base['median'] * 100
+        print(f'{name:<30} {base["median"]:>9.3f}s {result["median"]:>9.3f}s {changes[name]:>+7.1f}%')
+    return changes
+
+
+def main() -> None:
+    """
+    ベンチマークのエントリーポイント
+    """
+    parser = argparse.ArgumentParser(prog='benchmarks', description='合成データで売上推移・ZAICOツールの処理時間を計測します')
+    parser.add_argument('--months', type=int, default=24, help='売上月報の月数（デフォルト: 24）')
+    parser.add_argument('--products', type=int, default=3000, help='商品数（デフォルト: 3000）')
+    parser.add_argument('--inventories', type=int, default=5000, help='スタブに用意する在庫数（デフォルト: 5000）')
+    parser.add_argument('--registrations', type=int, default=200, help='新規商品登録の行数（デフォルト: 200）')
+    parser.add_argument('--repeat', type=int, default=3, help='各処理の実行回数（デフォルト: 3）')
+    parser.add_argument('--only', action='append', help='実行する処理名の前方一致（例: uriage_suii.ingest, zaico.）')
+    parser.add_argument('-o', '--output', help=f'結果の保存先（省略時は {RESULTS_DIR} に自動生成）')
+    parser.add_argument('--compare', help='比較対象の結果ファイル')
+    parser.add_argument(
+        '--max-regression', type=float,
+        help='比較対象よりこの割合（%%）以上遅くなった処理があれば終了コード1で終了する'
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='plusjack_bench_') as workdir:
+        report = run_benchmarks(
+            workdir, args.months, args.products, args.inventories, args.registrations, args.repeat, args.only
+        )
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f'bench_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'結果を {output} に保存しました')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            changes = compare(report, json.load(f))
+        if args.max_regression is not None and any(change > args.max_regression for change in changes.values()):
+            sys.exit(1)
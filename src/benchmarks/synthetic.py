@@ -0,0 +1,135 @@
+"""
+合成データ作成モジュール
+
+商品別売上月報・商品台帳と同じレイアウト（5行目が見出し）のExcelと、
+新規商品登録用のCSVを、指定した月数・商品数で作成します。
+同じシードからは同じデータが作成されます。
+"""
+import csv
+import os
+import random
+from typing import List
+
+import pandas as pd
+from openpyxl import Workbook
+
+from uriage_suii.config import CATEGORIES, REPORT_PATTERN
+
+# 売上月報の見出し（先頭の空列・商品コード・商品名に続く項目）
+REPORT_MEASURES = [
+    '純売上数', '総売上額', '返品値引額', '返・値率', 'その他', '純売上額', '粗利益', '粗利率',
+    '期間純売上数', '期間純売上額', '期間粗利益', '期間粗利率',
+]
+
+# 商品台帳にあって CATEGORIES にない分類（「未分類」になる）
+EXTRA_CATEGORIES = ['301', None]
+
+
+def product_codes(products: int) -> List[str]:
+    """
+    商品コード（14桁）の一覧を作成する
+
+    Args:
+        products: 商品数
+
+    Returns:
+        List[str]: 商品コード
+    """
+    return [f'{code:014d}' for code in range(1, products + 1)]
+
+
+def year_months(months: int, end: str = '202512') -> List[str]:
+    """
+    end までの months か月分の年月（yyyymm、古い順）を作成する
+
+    Args:
+        months: 月数
+        end: 最後の年月
+
+    Returns:
+        List[str]: 年月
+    """
+    periods = pd.period_range(end=pd.Period(f'{end[:4]}-{end[4:]}', freq='M'), periods=months, freq='M')
+    return [period.strftime('%Y%m') for period in periods]
+
+
+def write_ledger(path: str, products: int, seed: int = 0) -> None:
+    """
+    商品台帳を作成する
+
+    Args:
+        path: 出力先
+        products: 商品数
+        seed: 乱数のシード
+    """
+    rng = random.Random(seed)
+    categories = list(CATEGORIES) + EXTRA_CATEGORIES
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(['商品台帳'])
+    for _ in range(3):
+        ws.append([])
+    ws.append([None, 'コード', '名称', '単位', '分類１'])
+    for code in product_codes(products):
+        ws.append([None, code, f'商品{code[-6:]}', '個', rng.choice(categories)])
+    wb.save(path)
+
+
+def write_sales_reports(report_dir: str, months: int, products: int, seed: int = 0, end: str = '202512') -> List[str]:
+    """
+    商品別売上月報を月数分作成する
+
+    各月、全商品のうち約8割の商品に売上がある。
+
+    Args:
+        report_dir: 出力先ディレクトリ
+        months: 月数
+        products: 商品数
+        seed: 乱数のシード
+        end: 最後の年月
+
+    Returns:
+        List[str]: 作成したファイルのパス（古い順）
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    rng = random.Random(seed)
+    codes = product_codes(products)
+    paths = []
+    for year_month in year_months(months, end):
+        path = os.path.join(report_dir, REPORT_PATTERN.replace('*', f'{year_month}_'))
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append([f'商品別売上月報 {year_month}'])
+        for _ in range(3):
+            ws.append([])
+        ws.append([None, '商品コード', '商品名', *REPORT_MEASURES])
+        total_quantity = total_amount = 0
+        for code in codes:
+            if rng.random() < 0.2:
+                continue
+            quantity = rng.randrange(0, 100)
+            amount = quantity * rng.randrange(100, 5000)
+            total_quantity += quantity
+            total_amount += amount
+            ws.append([None, code, f'商品{code[-6:]}', quantity, amount, 0, 0.0, 0, amount, amount, 100,
+                       quantity, amount, amount, 100.0])
+        ws.append([None, '<<総合計>>', '', total_quantity, total_amount, 0, 0.0, 0, total_amount, total_amount, 100,
+                   total_quantity, total_amount, total_amount, 100.0])
+        wb.save(path)
+        paths.append(path)
+    return paths
+
+
+def write_registration_csv(path: str, rows: int) -> None:
+    """
+    新規商品登録用のCSVを作成する
+
+    Args:
+        path: 出力先
+        rows: 行数
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['物品名', 'カテゴリ', '保管場所', '状態', '数量'])
+        for row in range(1, rows + 1):
+            writer.writerow([f'新商品{row:06d}', '雑貨', '倉庫', '新品', row % 10])
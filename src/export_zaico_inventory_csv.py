@@ -4,10 +4,9 @@
 ZAICOの在庫データをCSVファイルにエクスポートします。
 
 使用方法:
-    python export_zaico_inventory_csv.py
+    python export_zaico_inventory_csv.py [--profile]
 """
-from zaico.export_inventory import main
+from profiling import run_main
 
 if __name__ == "__main__":
-    main()
-
+    run_main('zaico.export_inventory')
@@ -0,0 +1,39 @@
+"""
+処理時間の計測パッケージ
+
+各エントリーポイント（ZAICOツール・売上推移）で共通に使用する、段階ごとの処理時間の計測機能を提供します。
+標準ライブラリのみを使用するため、入庫・出庫CLIの起動を遅くしません。
+
+使用方法:
+    python export_zaico_inventory_csv.py --profile             # 段階ごとの処理時間
+    python export_zaico_inventory_csv.py --profile=cprofile    # cProfile による関数ごとの処理時間も記録
+    PLUSJACK_PROFILE=1 python zaico_stock_in.py 商品名 1
+"""
+
+from .profiler import (
+    PHASE_STARTUP,
+    PHASE_NETWORK,
+    PHASE_PARSE,
+    PHASE_AGGREGATE,
+    PHASE_WRITE,
+    Profiler,
+    get_profiler,
+    phase,
+    set_output_path,
+    parse_profile_option,
+    run_main
+)
+
+__all__ = [
+    'PHASE_STARTUP',
+    'PHASE_NETWORK',
+    'PHASE_PARSE',
+    'PHASE_AGGREGATE',
+    'PHASE_WRITE',
+    'Profiler',
+    'get_profiler',
+    'phase',
+    'set_output_path',
+    'parse_profile_option',
+    'run_main'
+]
@@ -0,0 +1,326 @@
+"""
+処理時間の計測モジュール
+
+各エントリーポイントの main() を包み、起動（モジュールの読み込み）・通信・読み込み/解析・
+CSV/Excelの書き出しなどの段階ごとの処理時間を計測します。
+--profile オプションまたは環境変数 PLUSJACK_PROFILE を指定した場合のみ計測し、
+終了時に内訳を標準エラー出力に表示して、出力ファイルと同じ場所に保存します。
+
+計測する段階は、処理側で phase() を使って区切ります。計測していない場合の phase() は何もしません。
+
+    with phase(PHASE_WRITE):
+        writer.writerows(rows)
+"""
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from importlib import import_module
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+# 計測を有効にする環境変数（1: 段階ごとの時間、cprofile: cProfile による関数ごとの時間も記録する）
+PROFILE_ENV = 'PLUSJACK_PROFILE'
+# 出力ファイルがない処理の計測結果の保存先（省略時はカレントディレクトリ）
+PROFILE_DIR_ENV = 'PLUSJACK_PROFILE_DIR'
+# 計測を有効にするコマンドラインオプション（--profile=cprofile で cProfile も使用する）
+PROFILE_OPTION = '--profile'
+
+MODE_TIMERS = 'timers'
+MODE_CPROFILE = 'cprofile'
+
+# 段階の名前
+PHASE_STARTUP = '起動・読み込み'
+PHASE_NETWORK = '通信'
+PHASE_PARSE = '読み込み・解析'
+PHASE_AGGREGATE = '集計'
+PHASE_WRITE = '書き出し'
+PHASE_OTHER = 'その他'
+
+# 計測結果に含める cProfile の関数の数（累積時間の長い順）
+CPROFILE_TOP = 30
+
+
+class Profiler:
+    """
+    段階ごとの処理時間を集計する
+
+    複数のスレッドから同じ段階を計測した場合は合算する（並列処理では全体の時間を超えることがある）。
+    """
+
+    def __init__(self, name: str, use_cprofile: bool = False) -> None:
+        """
+        Args:
+            name: 計測対象の名前（エントリーポイント名）
+            use_cprofile: cProfile で関数ごとの時間も記録する（メインスレッドのみ）
+        """
+        self.name = name
+        self.output_path: Optional[str] = None
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._phases: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._cprofile = None
+        if use_cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+
+    def add(self, name: str, seconds: float, count: int = 1) -> None:
+        """
+        段階の処理時間を加算する
+
+        Args:
+            name: 段階の名前
+            seconds: 処理時間（秒）
+            count: 回数
+        """
+        with self._lock:
+            totals = self._phases.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += count
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        with ブロックの処理時間を段階 name に加算する
+
+        Args:
+            name: 段階の名前
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def start(self) -> 'Profiler':
+        """
+        計測を開始する
+        """
+        self.started = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+        return self
+
+    def stop(self) -> None:
+        """
+        計測を終了する
+        """
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self.finished = time.perf_counter()
+
+    def phases(self) -> Dict[str, Dict[str, float]]:
+        """
+        段階ごとの処理時間を取得する
+
+        Returns:
+            Dict[str, Dict[str, float]]: 段階の名前（計測した順）をキーとした seconds, count
+        """
+        with self._lock:
+            return {name: {'seconds': seconds, 'count': count} for name, (seconds, count) in self._phases.items()}
+
+    def report(self) -> str:
+        """
+        計測結果を表示用の文字列にする
+
+        Returns:
+            str: 段階ごとの処理時間と全体に対する割合（cProfile 使用時は関数ごとの時間も含む）
+        """
+        total = (self.finished or time.perf_counter()) - self.started
+        phases = self.phases()
+        measured = sum(stats['seconds'] for stats in phases.values())
+
+        lines = [f'プロファイル: {self.name}（全体 {total:.3f}s）']
+        for name, stats in phases.items():
+            lines.append(_format_phase(name, stats['seconds'], total, int(stats['count'])))
+        if measured < total:
+            lines.append(_format_phase(PHASE_OTHER, total - measured, total))
+        else:
+            lines.append('  ※並列に処理した段階は合算しているため、合計が全体の時間を超えています')
+
+        if self._cprofile is not None:
+            import pstats
+            buffer = io.StringIO()
+            pstats.Stats(self._cprofile, stream=buffer).sort_stats('cumulative').print_stats(CPROFILE_TOP)
+            lines += ['', buffer.getvalue().rstrip()]
+        return '\n'.join(lines)
+
+    def save(self, directory: Optional[str] = None) -> List[str]:
+        """
+        計測結果を保存する
+
+        出力ファイル（set_output_path）がある場合はその隣に「出力ファイル名.profile.txt」として保存する。
+        ない場合は directory に「名前_日時.profile.txt」として保存する。
+        cProfile 使用時は pstats で読み込める「.pstats」も保存する。
+
+        Args:
+            directory: 出力ファイルがない場合の保存先（省略時は PLUSJACK_PROFILE_DIR、カレントディレクトリの順）
+
+        Returns:
+            List[str]: 保存したファイルのパス
+        """
+        if self.output_path:
+            base = os.path.splitext(self.output_path)[0]
+        else:
+            directory = directory or os.environ.get(PROFILE_DIR_ENV) or os.getcwd()
+            os.makedirs(directory, exist_ok=True)
+            dstr = datetime.now().strftime('%Y%m%d_%H%M%S')
+            base = os.path.join(directory, f'{self.name}_{dstr}')
+
+        saved = [f'{base}.profile.txt']
+        with open(saved[0], 'w', encoding='utf-8') as f:
+            f.write(self.report() + '\n')
+        if self._cprofile is not None:
+            saved.append(f'{base}.pstats')
+            self._cprofile.dump_stats(saved[1])
+        return saved
+
+
+def _format_phase(name: str, seconds: float, total: float, count: int = 0) -> str:
+    share = seconds / total * 100 if total > 0 else 0.0
+    # 全角文字は2桁として揃える
+    width = sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in name)
+    line = f'  {name}{" " * max(0, 16 - width)}{seconds:>9.3f}s {share:>6.1f}%'
+    return f'{line}  {count}回' if count > 1 else line
+
+
+_active: Optional[Profiler] = None
+
+
+def get_profiler() -> Optional[Profiler]:
+    """
+    計測中の Profiler を取得する
+
+    Returns:
+        Optional[Profiler]: 計測中でない場合はNone
+    """
+    return _active
+
+
+def phase(name: str) -> ContextManager[None]:
+    """
+    with ブロックの処理時間を段階 name として計測する
+
+    計測中でない場合は何もしない。
+
+    Args:
+        name: 段階の名前（PHASE_PARSE など）
+
+    Returns:
+        ContextManager[None]: with 文で使用するコンテキストマネージャー
+    """
+    profiler = _active
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name)
+
+
+def set_output_path(path: Optional[str]) -> None:
+    """
+    計測結果を保存する場所として、処理の出力ファイルを設定する
+
+    計測中でない場合は何もしない。
+
+    Args:
+        path: 出力ファイルのパス
+    """
+    if _active is not None and path:
+        _active.output_path = os.path.abspath(path)
+
+
+def parse_profile_option(argv: List[str]) -> Optional[str]:
+    """
+    コマンドライン引数と環境変数から計測の方法を決める
+
+    --profile / --profile=cprofile は argv から取り除く（各エントリーポイントの引数解析には渡さない）。
+
+    Args:
+        argv: コマンドライン引数（sys.argv[1:]、取り除いた結果で書き換える）
+
+    Returns:
+        Optional[str]: MODE_TIMERS / MODE_CPROFILE。計測しない場合はNone
+
+    Raises:
+        ValueError: 計測の方法が正しくない場合
+    """
+    mode = None
+    for arg in list(argv):
+        if arg == '--':
+            break
+        if arg == PROFILE_OPTION or arg.startswith(f'{PROFILE_OPTION}='):
+            argv.remove(arg)
+            mode = arg.partition('=')[2] or MODE_TIMERS
+
+    if mode is None:
+        mode = os.environ.get(PROFILE_ENV, '').strip().lower()
+        if mode in ('', '0', 'false', 'no', 'off'):
+            return None
+        if mode in ('1', 'true', 'yes', 'on'):
+            mode = MODE_TIMERS
+
+    if mode not in (MODE_TIMERS, MODE_CPROFILE):
+        raise ValueError(f'計測の方法が正しくありません: {mode}（{MODE_TIMERS} または {MODE_CPROFILE}）')
+    return mode
+
+
+def _add_api_time(profiler: Profiler) -> None:
+    """
+    ZAICO APIへのリクエストの所要時間（zaico.metrics）を通信の段階に加える
+    """
+    metrics = sys.modules.get('zaico.metrics')
+    if metrics is None:
+        return
+    snapshot = metrics.get_metrics().snapshot()
+    count = sum(stats['count'] for stats in snapshot.values())
+    if count:
+        profiler.add(PHASE_NETWORK, sum(stats['latency_sum'] for stats in snapshot.values()), count)
+
+
+def run_main(module: str, func: str = 'main', name: Optional[str] = None) -> Any:
+    """
+    エントリーポイントの main() を、必要に応じて処理時間を計測しながら実行する
+
+    計測する場合は、モジュールの読み込みを起動の段階として計測してから func を呼び出し、
+    終了時（sys.exit による終了を含む）に内訳を標準エラー出力に表示して保存する。
+
+    Args:
+        module: main() を定義したモジュール名（'zaico.export_inventory' など）
+        func: 呼び出す関数名
+        name: 計測結果に表示する名前（省略時は実行したスクリプト名）
+
+    Returns:
+        Any: func の戻り値
+    """
+    global _active
+    args = sys.argv[1:]
+    try:
+        mode = parse_profile_option(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    sys.argv[1:] = args
+    if mode is None:
+        return getattr(import_module(module), func)()
+
+    if name is None:
+        name = os.path.splitext(os.path.basename(sys.argv[0]))[0] or module
+    profiler = _active = Profiler(name, use_cprofile=mode == MODE_CPROFILE).start()
+    try:
+        with profiler.phase(PHASE_STARTUP):
+            main = getattr(import_module(module), func)
+        return main()
+    finally:
+        profiler.stop()
+        _active = None
+        _add_api_time(profiler)
+        print(profiler.report(), file=sys.stderr)
+        try:
+            saved = profiler.save()
+        except OSError as e:
+            print(f'計測結果を保存できません: {e}', file=sys.stderr)
+        else:
+            print(f'計測結果を {", ".join(saved)} に保存しました', file=sys.stderr)
@@ -0,0 +1,3 @@
+"""
+処理時間の計測パッケージ テストモジュール
+"""
@@ -0,0 +1,108 @@
+"""
+処理時間の計測モジュールのテスト
+
+オプションの解析・段階ごとの集計・計測結果の保存と、エントリーポイントからの計測を確認します。
+"""
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from profiling import PHASE_PARSE, PHASE_WRITE, Profiler, get_profiler, parse_profile_option, phase
+from zaico.stub import ZaicoStub, make_inventories
+
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestParseProfileOption:
+    """parse_profile_option関数のテスト"""
+
+    def test_option_is_removed(self):
+        """--profile は引数から取り除く"""
+        argv = ['商品A', '--profile', '3']
+
+        assert parse_profile_option(argv) == 'timers'
+        assert argv == ['商品A', '3']
+
+    def test_cprofile_option(self):
+        """--profile=cprofile で cProfile も使用する"""
+        argv = ['--profile=cprofile']
+
+        assert parse_profile_option(argv) == 'cprofile'
+        assert argv == []
+
+    def test_environment(self):
+        """オプションがなければ環境変数 PLUSJACK_PROFILE に従う"""
+        with patch.dict(os.environ, {'PLUSJACK_PROFILE': '1'}):
+            assert parse_profile_option([]) == 'timers'
+        with patch.dict(os.environ, {'PLUSJACK_PROFILE': '0'}):
+            assert parse_profile_option([]) is None
+
+    def test_invalid_mode(self):
+        """計測の方法が正しくなければエラーにする"""
+        with pytest.raises(ValueError):
+            parse_profile_option(['--profile=perf'])
+
+
+class TestProfiler:
+    """Profilerのテスト"""
+
+    def test_phase_without_profiler(self):
+        """計測中でなければ phase() は何もしない"""
+        assert get_profiler() is None
+        with phase(PHASE_PARSE):
+            pass
+
+    def test_report(self):
+        """段階ごとの時間を合算し、計測していない時間を「その他」として表示する"""
+        profiler = Profiler('test').start()
+        profiler.add(PHASE_PARSE, 0.0)
+        with profiler.phase(PHASE_WRITE):
+            pass
+        with profiler.phase(PHASE_WRITE):
+            pass
+        profiler.stop()
+
+        phases = profiler.phases()
+        assert list(phases) == [PHASE_PARSE, PHASE_WRITE]
+        assert phases[PHASE_WRITE]['count'] == 2
+
+        report = profiler.report()
+        assert report.startswith('プロファイル: test（全体 ')
+        assert 'その他' in report
+
+    def test_save_next_to_output(self, tmp_path):
+        """出力ファイルと同じ場所に計測結果（cProfile 使用時は .pstats も）を保存する"""
+        profiler = Profiler('test', use_cprofile=True).start()
+        profiler.output_path = str(tmp_path / 'inventory.csv')
+        profiler.stop()
+
+        saved = profiler.save()
+
+        assert saved == [str(tmp_path / 'inventory.profile.txt'), str(tmp_path / 'inventory.pstats')]
+        assert all(os.path.exists(path) for path in saved)
+
+
+class TestRunMain:
+    """エントリーポイントからの計測のテスト"""
+
+    def test_export_with_profile(self, tmp_path):
+        """在庫エクスポートの通信・書き出しの時間を表示し、CSVと同じ場所に保存する"""
+        output = tmp_path / 'inventory.csv'
+        with ZaicoStub(make_inventories(30), page_size=10) as stub:
+            env = {**os.environ, 'ZAICO_API_BASE_URL': stub.base_url, 'ZAICO_API_TOKEN': 'test'}
+            env.pop('PLUSJACK_PROFILE', None)
+            result = subprocess.run(
+                [sys.executable, 'export_zaico_inventory_csv.py', '--profile', '-o', str(output)],
+                cwd=SRC_DIR, env=env, capture_output=True, text=True
+            )
+
+        assert result.returncode == 0, result.stderr
+        assert '起動・読み込み' in result.stderr
+        assert '通信' in result.stderr
+        assert '書き出し' in result.stderr
+        assert (tmp_path / 'inventory.profile.txt').exists()
+        assert len(output.read_text(encoding='utf-8').splitlines()) == 31
@@ -4,10 +4,9 @@
 CSVファイルから新規商品をZAICOに一括登録します。
 
 使用方法:
-    python register_new_items_to_zaico.py
+    python register_new_items_to_zaico.py [--profile]
 """
-from zaico.register_items import main
+from profiling import run_main
 
 if __name__ == "__main__":
-    main()
-
+    run_main('zaico.register_items')
@@ -0,0 +1,42 @@
+"""
+売上推移パッケージ
+
+商品別売上月報と商品台帳から、商品分類ごとの売上金額・売上数量の
+月別推移を作成する機能を提供するパッケージです。
+"""
+
+from .cache import read_excel_cached, is_cached, evict_cache
+from .reports import (
+    update_year_month,
+    list_monthly_reports,
+    read_monthly_report,
+    read_monthly_reports,
+    pivot_measure,
+    read_ledger,
+    add_category,
+    split_by_category,
+    write_workbook,
+    flatten_trends,
+    write_sales_trends,
+    build_sales_trends,
+    export_sales_trends
+)
+
+__all__ = [
+    'read_excel_cached',
+    'is_cached',
+    'evict_cache',
+    'update_year_month',
+    'list_monthly_reports',
+    'read_monthly_report',
+    'read_monthly_reports',
+    'pivot_measure',
+    'read_ledger',
+    'add_category',
+    'split_by_category',
+    'write_workbook',
+    'flatten_trends',
+    'write_sales_trends',
+    'build_sales_trends',
+    'export_sales_trends'
+]
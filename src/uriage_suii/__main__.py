@@ -0,0 +1,15 @@
+"""
+python -m uriage_suii で売上推移を作成する
+"""
+try:
+    from profiling import run_main
+except ImportError:
+    # profiling パッケージがない環境では計測せずに実行する
+    run_main = None
+
+if __name__ == '__main__':
+    if run_main is None:
+        from uriage_suii.cli import main
+        main()
+    else:
+        run_main('uriage_suii.cli', name='uriage_suii')
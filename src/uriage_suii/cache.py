@@ -0,0 +1,218 @@
+"""
+Excel読み込みキャッシュモジュール
+
+解析済みのExcel（売上月報・商品台帳）を保存し、変更のないファイルを再度解析せずに済ませます。
+過去の売上月報は変わらないため、毎月の実行では新しい月報だけが解析されます。
+"""
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+
+import pandas as pd
+
+from .config import CACHE_DIR
+
+
+def _file_digest(path):
+    """ファイル内容のSHA-256を取得する"""
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_excel_cached(file, cache_dir=CACHE_DIR, **kwargs):
+    """Excelを読み込む（読み込み結果をキャッシュし、変更のないファイルは再度解析しない）
+    
+    読み込み結果はファイルのパスと読み込み条件ごとに cache_dir に保存する。
+    更新日時・サイズが前回と同じ場合はキャッシュを使用する。
+    更新日時が変わっていても内容（SHA-256）が同じであればキャッシュを使用する。
+    pyarrowがあればParquet形式、なければpickle形式で保存する。
+    
+    Parametars
+    ----------
+    file: str
+        Excelのパス
+    cache_dir: str
+        キャッシュの保存先（Noneの場合はキャッシュせずに読み込む）
+    **kwargs:
+        pd.read_excel に渡す引数
+    
+    Returns
+    ----------
+    df: DataFrame
+        pd.read_excel の結果
+        
+    """
+    
+    if cache_dir is None:
+        return pd.read_excel(file, **kwargs)
+    
+    source, options, key = _cache_key(file, kwargs)
+    meta_path = os.path.join(cache_dir, f'{key}.json')
+    stat = os.stat(file)
+    meta = _read_meta(meta_path)
+    
+    if meta is not None and meta.get('source') == source and meta.get('options') == options:
+        fresh = meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size
+        if not fresh and meta['size'] == stat.st_size and meta['sha256'] == _file_digest(file):
+            # 内容が同じ（コピーし直した場合など）であれば更新日時だけを記録し直す
+            meta['mtime_ns'] = stat.st_mtime_ns
+            _write_json(meta_path, meta)
+            fresh = True
+        if fresh:
+            try:
+                return _read_frame(os.path.join(cache_dir, meta['data']))
+            except Exception:
+                # キャッシュが壊れている場合は読み込み直す
+                pass
+    
+    df = pd.read_excel(file, **kwargs)
+    os.makedirs(cache_dir, exist_ok=True)
+    data = _write_frame(df, os.path.join(cache_dir, key))
+    _write_json(meta_path, {
+        'source': source,
+        'options': options,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': _file_digest(file),
+        'data': os.path.basename(data),
+    })
+    return df
+
+
+def is_cached(file, cache_dir=CACHE_DIR, **kwargs):
+    """Excelの読み込み結果がキャッシュにあるか確認する（ファイルは解析しない）
+    
+    更新日時・サイズが前回と同じ場合のみキャッシュありとする
+    （内容の照合が必要な場合は read_excel_cached に任せる）。
+    
+    Parametars
+    ----------
+    file: str
+        Excelのパス
+    cache_dir: str
+        キャッシュの保存先（Noneの場合は常にFalse）
+    **kwargs:
+        read_excel_cached に渡す読み込み条件
+    
+    Returns
+    ----------
+    cached: bool
+        キャッシュを使用できる場合はTrue
+        
+    """
+    
+    if cache_dir is None:
+        return False
+    
+    source, options, key = _cache_key(file, kwargs)
+    meta = _read_meta(os.path.join(cache_dir, f'{key}.json'))
+    if meta is None or meta.get('source') != source or meta.get('options') != options:
+        return False
+    try:
+        stat = os.stat(file)
+    except OSError:
+        return False
+    return (
+        meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size
+        and os.path.exists(os.path.join(cache_dir, meta.get('data', '')))
+    )
+
+
+def evict_cache(cache_dir=CACHE_DIR):
+    """元のファイルが削除されたキャッシュを削除する
+    
+    Parametars
+    ----------
+    cache_dir: str
+        キャッシュの保存先
+    
+    Returns
+    ----------
+    evicted: int
+        削除したキャッシュの件数
+        
+    """
+    
+    if cache_dir is None or not os.path.isdir(cache_dir):
+        return 0
+    
+    evicted = 0
+    for meta_path in glob.glob(os.path.join(cache_dir, '*.json')):
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if os.path.exists(meta['source']):
+                continue
+        except (OSError, ValueError, KeyError):
+            meta = {}
+        if meta.get('data'):
+            _remove_quietly(os.path.join(cache_dir, meta['data']))
+        _remove_quietly(meta_path)
+        evicted += 1
+    return evicted
+
+
+def _cache_key(file, kwargs):
+    """キャッシュを識別する (元のファイルの絶対パス, 読み込み条件, キー) を返す"""
+    
+    source = os.path.abspath(file)
+    options = json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+    key = hashlib.sha1(f'{source}\n{options}'.encode('utf-8')).hexdigest()
+    return source, options, key
+
+
+def _read_meta(meta_path):
+    """キャッシュのメタデータを読み込む（ない場合・壊れている場合はNone）"""
+    
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_frame(df, path_base):
+    """DataFrameを保存し、保存先のパスを返す（Parquetで保存できない場合はpickle）"""
+    
+    if importlib.util.find_spec('pyarrow') is not None:
+        path = f'{path_base}.parquet'
+        try:
+            df.to_parquet(f'{path}.part')
+            os.replace(f'{path}.part', path)
+            return path
+        except (ValueError, TypeError, ImportError):
+            # 型の混在した列などParquetで表現できない場合
+            _remove_quietly(f'{path}.part')
+    path = f'{path_base}.pkl'
+    df.to_pickle(f'{path}.part', compression=None)
+    os.replace(f'{path}.part', path)
+    return path
+
+
+def _read_frame(path):
+    """_write_frame で保存したDataFrameを読み込む"""
+    
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_pickle(path, compression=None)
+
+
+def _write_json(path, data):
+    with open(f'{path}.part', 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(f'{path}.part', path)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,115 @@
+"""
+売上推移作成のコマンドラインインターフェース
+
+使用方法:
+    python -m uriage_suii [--from yyyymm | --months N] [--to yyyymm] [--yoy] [--report-dir DIR] [--ledger PATH] ...
+"""
+import argparse
+import json
+import re
+import sys
+
+from .config import (
+    REPORT_DIR,
+    LEDGER_PATH,
+    AMOUNT_OUTPUT,
+    QUANTITY_OUTPUT,
+    CACHE_DIR,
+    WORKERS,
+    CATEGORIES
+)
+from .reports import export_sales_trends
+
+
+def _year_month(value):
+    """yyyymm形式の年月を検証する（argparseの型変換用）"""
+
+    if not re.fullmatch(r'\d{4}(0[1-9]|1[0-2])', value):
+        raise argparse.ArgumentTypeError(f'yyyymm形式で指定してください: {value}')
+    return value
+
+
+def _positive_int(value):
+    """1以上の整数を検証する（argparseの型変換用）"""
+
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(f'1以上の整数を指定してください: {value}')
+    return int(value)
+
+
+def _load_categories(path):
+    """商品分類（{"コード": "名称", ...}）をJSONファイルから読み込む"""
+
+    with open(path, encoding='utf-8') as f:
+        categories = json.load(f)
+    if not isinstance(categories, dict):
+        raise ValueError('商品分類は {"コード": "名称"} の形式で指定してください')
+    return {str(cat): str(name) for cat, name in categories.items()}
+
+
+def build_parser():
+    """コマンドライン引数の定義を作成する"""
+
+    parser = argparse.ArgumentParser(
+        prog='uriage_suii',
+        description='商品別売上月報から、商品分類ごとの売上金額・売上数量の月別推移をExcelに出力します'
+    )
+    parser.add_argument('--report-dir', default=REPORT_DIR, help=f'商品別売上月報の保存先（デフォルト: {REPORT_DIR}）')
+    parser.add_argument('--ledger', default=LEDGER_PATH, help=f'商品台帳のパス（デフォルト: {LEDGER_PATH}）')
+    window = parser.add_mutually_exclusive_group()
+    window.add_argument('--from', dest='start', type=_year_month, help='集計する最初の年月（yyyymm）')
+    window.add_argument('--months', type=_positive_int, help='集計する月数（--to または最新の売上月報の月から遡る）')
+    parser.add_argument('--to', dest='end', type=_year_month, help='集計する最後の年月（yyyymm）')
+    parser.add_argument('--yoy', action='store_true', help='前年同期の売上月報も集計する（前年比較用）')
+    parser.add_argument('--categories', help='商品分類を {"コード": "名称"} 形式で記述したJSONファイル')
+    parser.add_argument('--amount-output', default=AMOUNT_OUTPUT, help=f'売上金額推移の出力先（デフォルト: {AMOUNT_OUTPUT}）')
+    parser.add_argument('--quantity-output', default=QUANTITY_OUTPUT, help=f'売上数量推移の出力先（デフォルト: {QUANTITY_OUTPUT}）')
+    parser.add_argument(
+        '--format', dest='formats', action='append', choices=['csv', 'parquet'], default=[],
+        help='Excelに加えて、合計行を除いた表を同じ名前で出力する形式（複数指定可。parquetはpyarrowが必要）'
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, default=WORKERS,
+        help=f'売上月報を並列に読み込むプロセス数（デフォルト: {WORKERS}）'
+    )
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help=f'読み込んだExcelのキャッシュの保存先（デフォルト: {CACHE_DIR}）')
+    parser.add_argument('--no-cache', action='store_true', help='キャッシュを使用しない')
+    return parser
+
+
+def main(argv=None):
+    """
+    売上推移作成のエントリーポイント
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.start is not None and args.end is not None and args.start > args.end:
+        parser.error('--from には --to 以前の年月を指定してください')
+
+    try:
+        categories = CATEGORIES if args.categories is None else _load_categories(args.categories)
+    except (OSError, ValueError) as e:
+        print(f'商品分類の読み込みに失敗しました: {e}')
+        sys.exit(1)
+
+    try:
+        file_path = export_sales_trends(
+            report_dir=args.report_dir,
+            ledger_path=args.ledger,
+            amount_output=args.amount_output,
+            quantity_output=args.quantity_output,
+            categories=categories,
+            start=args.start,
+            end=args.end,
+            months=args.months,
+            yoy=args.yoy,
+            workers=args.workers,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            formats=args.formats
+        )
+    except (FileNotFoundError, ImportError) as e:
+        print(e)
+        sys.exit(1)
+
+    print(f'{len(file_path)}か月分の売上月報から {args.amount_output}, {args.quantity_output} を出力しました')
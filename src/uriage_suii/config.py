@@ -0,0 +1,44 @@
+"""
+売上推移 設定・定数モジュール
+
+売上月報・商品台帳の読み込み元、出力先、商品分類などの既定値を管理します。
+パスはいずれも実行時のカレントディレクトリからの相対パスです。
+"""
+import os
+
+
+# 入力
+REPORT_DIR = './売上レポート/商品別売上月報'         # 商品別売上月報の保存先
+REPORT_PATTERN = '*商品別売上月報.xlsx'             # 売上月報のファイル名（先頭6桁がyyyymm）
+LEDGER_PATH = '商品台帳.xlsx'                       # 商品台帳
+
+# 出力
+AMOUNT_OUTPUT = '売上金額推移.xlsx'
+QUANTITY_OUTPUT = '売上数量推移.xlsx'
+
+# 売上月報から取り出す項目
+MEASURE_AMOUNT = '総売上額'
+MEASURE_QUANTITY = '純売上数'
+
+# 読み込んだExcelのキャッシュの保存先（Noneの場合はキャッシュしない）
+CACHE_DIR = './.uriage_suii_cache'
+
+# 売上月報を並列に読み込むプロセス数（1の場合、キャッシュにない売上月報が1件以下の場合は順に読み込む）
+WORKERS = os.cpu_count() or 1
+
+# 商品分類（分類１のコード: 名称）。シート名は「コード_名称」となる
+CATEGORIES = {
+    '001': '自社商品（effe）', '002': '自社商品（眼鏡）', '003': '自社商品（雑貨）', '004': '自社商品（その他）',
+    '101': 'OEM（眼鏡）', '102': 'OEM（眼鏡パーツ）', '103': 'OEM（雑貨）', '104': 'OEM（2次加工）', '105': 'OEM（その他）',
+    '201': '外注直（材料）', '202': '外注直（型）', '203': '外注直（2次加工）', '204': '外注直（その他）',
+}
+
+# 分類コードがこの値未満の分類を自社商品とし、商品名順に並べて数量の推移も出力する
+OWN_CATEGORY_LIMIT = 100
+
+# 商品分類にない分類１（商品台帳にない商品を含む）をまとめるシート名
+UNCLASSIFIED = '未分類'
+
+# 合計行の商品コード・商品名
+TOTAL_ROW_CODE = '99999999999999'
+TOTAL_ROW_NAME = '合計'
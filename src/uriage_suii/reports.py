@@ -0,0 +1,583 @@
+"""
+売上推移作成モジュール
+
+商品別売上月報（月ごとのExcel）を読み込み、商品台帳の分類１ごとに
+売上金額・売上数量の月別推移表を作成する機能を提供します。
+
+処理は次の段階に分かれており、それぞれ単独でも呼び出せます。
+
+- 読み込み: list_monthly_reports, read_monthly_reports（縦持ちの表）
+- 集計: pivot_measure（年月別の推移表）
+- 分類: read_ledger, add_category, split_by_category
+- 出力: write_workbook, write_sales_trends
+"""
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from zaico._profiling import PHASE_PARSE, PHASE_AGGREGATE, PHASE_WRITE, phase, set_output_path
+
+from .cache import evict_cache, is_cached, read_excel_cached
+from .config import (
+    REPORT_DIR,
+    REPORT_PATTERN,
+    LEDGER_PATH,
+    AMOUNT_OUTPUT,
+    QUANTITY_OUTPUT,
+    MEASURE_AMOUNT,
+    MEASURE_QUANTITY,
+    CACHE_DIR,
+    WORKERS,
+    CATEGORIES,
+    OWN_CATEGORY_LIMIT,
+    TOTAL_ROW_CODE,
+    TOTAL_ROW_NAME,
+    UNCLASSIFIED
+)
+
+# 売上月報の読み込み条件（5行目が見出し、商品コード・商品名の列をインデックスとする）
+_REPORT_READ_OPTIONS = {'header': 4, 'index_col': [1, 2]}
+
+
+#
+# 年月の更新用関数
+#
+
+def update_year_month(year_month, monthly_difference):
+    """年月の指定した月数分増減させる
+    
+    year_monthをmonthly_diffenceの分だけ、月数を増減させる。
+    増加させたい場合は正の値、減少させたい場合は負の値をmonthly_diffenceに指定する
+    （12か月以上の増減にも対応する）
+    
+    Parametars
+    ----------
+    year_month: str
+        yyyymm形式の年月
+    monthly_difference: integer
+        year_monthからどれだけの月数を増減させたいかの値
+    
+    Returns
+    ----------
+    updated_year_month: str
+        year_monthからmonthly_differenceの値分だけ増減させた値
+        
+    """
+    
+    updated_year_month = (pd.Period(f'{year_month[:4]}-{year_month[4:6]}', freq='M') + monthly_difference).strftime('%Y%m')
+    
+    return updated_year_month
+
+
+def _to_periods(year_months):
+    """yyyymm形式の年月のリストを月単位の期間に変換する（変換できない値はNaT）"""
+    
+    return pd.PeriodIndex(pd.to_datetime(pd.Index(year_months, dtype=object), format='%Y%m', errors='coerce'), freq='M')
+
+
+#
+# 売上月報の読み込み用関数
+#
+
+def list_monthly_reports(report_dir=REPORT_DIR, start=None, end=None, months=None, yoy=False):
+    """売上月報のファイルを新しい順に取得する
+    
+    ファイル名の先頭6桁（yyyymm）で期間を絞り込む。Excelは開かないため、
+    売上月報が増えても期間が同じであれば読み込む量は変わらない。
+    先頭6桁が年月になっていないファイルは対象外とする。
+    
+    Parametars
+    ----------
+    report_dir: str
+        売上月報の保存先
+    start: str
+        yyyymm形式の開始年月（Noneの場合は最も古い月から）
+    end: str
+        yyyymm形式の終了年月（Noneの場合は最も新しい月まで）
+    months: integer
+        終了年月から遡る月数（直近12か月の場合は12）。startより優先する
+    yoy: bool
+        前年同期（期間を12か月前にずらした範囲）の売上月報も含める
+    
+    Returns
+    ----------
+    file_path: list
+        売上月報のパスのリスト（新しい順）
+        
+    """
+    
+    files = glob.glob(os.path.join(report_dir, REPORT_PATTERN))
+    periods = _to_periods([os.path.split(file)[1][:6] for file in files])
+    valid = ~periods.isna()
+    if not valid.any():
+        return []
+    
+    end_period = periods[valid].max() if end is None else _to_periods([end])[0]
+    if months is not None:
+        start_period = end_period - (months - 1)
+    elif start is not None:
+        start_period = _to_periods([start])[0]
+    else:
+        start_period = periods[valid].min()
+    
+    selected = valid & (periods >= start_period) & (periods <= end_period)
+    if yoy:
+        selected |= valid & (periods >= start_period - 12) & (periods <= end_period - 12)
+    
+    file_path = [file for file, keep in zip(files, selected) if keep]
+    file_path.sort(reverse=True)
+    
+    return file_path
+
+
+def read_monthly_report(file, measures, cache_dir=CACHE_DIR):
+    """売上月報を読み込み、指定した項目を縦持ちの表にする
+    
+    ファイル名の先頭6桁（yyyymm）を年月とし、<<総合計>>行は除く。
+    
+    Parametars
+    ----------
+    file: str
+        売上月報（*商品別売上月報.xlsx）のパス
+    measures: list
+        取り出す項目（'総売上額', '純売上数' など）
+    cache_dir: str
+        読み込み結果のキャッシュの保存先（Noneの場合はキャッシュしない）
+    
+    Returns
+    ----------
+    df_long: DataFrame
+        商品コード, 商品名, 年月, 項目, 値 の列を持つ表
+        
+    """
+    
+    year_month = os.path.split(file)[1][:6]
+    df_tmp = read_excel_cached(file, cache_dir=cache_dir, **_REPORT_READ_OPTIONS)
+    df_tmp = df_tmp[measures]
+    df_tmp = df_tmp.drop('<<総合計>>', axis=0, level='商品コード')
+    df_long = df_tmp.reset_index().melt(id_vars=['商品コード', '商品名'], var_name='項目', value_name='値')
+    df_long.insert(2, '年月', year_month)
+    
+    return df_long
+
+
+def pivot_measure(df_report, measure):
+    """縦持ちの売上月報から、指定した項目の年月別の推移表を作成する
+    
+    列は df_report に現れた順の年月、行は商品コード・商品名の順とし、
+    売上のない月は0とする。
+    
+    Parametars
+    ----------
+    df_report: DataFrame
+        read_monthly_report の戻り値を結合した表
+    measure: str
+        推移表にする項目（'総売上額', '純売上数' など）
+    
+    Returns
+    ----------
+    df_pivot: DataFrame
+        商品コード・商品名をインデックス、年月を列とした表
+        
+    """
+    
+    year_months = df_report['年月'].unique()
+    df_measure = df_report.loc[df_report['項目']==measure]
+    df_pivot = df_measure.groupby(['商品コード', '商品名', '年月'], dropna=False)['値'].sum().unstack('年月', fill_value=0)
+    df_pivot = df_pivot.reindex(columns=year_months, fill_value=0)
+    df_pivot.columns.name = None
+    
+    return df_pivot
+
+
+def read_monthly_reports(files, measures, workers=WORKERS, cache_dir=CACHE_DIR):
+    """複数の売上月報を読み込み、1つの縦持ちの表にまとめる
+    
+    キャッシュにない売上月報が2件以上あり、workersが2以上の場合は、キャッシュにない売上月報だけを
+    プロセスを分けて並列に読み込む（キャッシュにある売上月報はプロセスを起動せずにこのプロセスで読み込む）。
+    結果は並列に読み込んだ場合も files の順に並ぶ。
+    
+    Parametars
+    ----------
+    files: list
+        売上月報のパスのリスト
+    measures: list
+        取り出す項目（'総売上額', '純売上数' など）
+    workers: integer
+        並列に読み込むプロセス数
+    cache_dir: str
+        読み込み結果のキャッシュの保存先（Noneの場合はキャッシュしない）
+    
+    Returns
+    ----------
+    df_report: DataFrame
+        read_monthly_report の戻り値を files の順に結合した表
+        
+    """
+    
+    read = partial(read_monthly_report, measures=measures, cache_dir=cache_dir)
+    misses = [file for file in files if not is_cached(file, cache_dir, **_REPORT_READ_OPTIONS)]
+    parsed = {}
+    if workers > 1 and len(misses) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(misses))) as executor:
+            parsed = dict(zip(misses, executor.map(read, misses)))
+    frames = [parsed[file] if file in parsed else read(file) for file in files]
+    
+    return pd.concat(frames, ignore_index=True)
+
+
+#
+# 商品分類の付与・分類ごとの分割
+#
+
+def read_ledger(path=LEDGER_PATH, cache_dir=CACHE_DIR):
+    """商品台帳を読み込む
+    
+    Parametars
+    ----------
+    path: str
+        商品台帳のパス
+    cache_dir: str
+        読み込み結果のキャッシュの保存先（Noneの場合はキャッシュしない）
+    
+    Returns
+    ----------
+    df_shohin_daicho: DataFrame
+        商品コードをインデックスとした商品台帳
+        
+    """
+    
+    df_shohin_daicho = read_excel_cached(path, cache_dir=cache_dir, header=4, index_col=1, dtype={'コード': 'str', '分類１':'str'})
+    df_shohin_daicho.index.name = '商品コード'
+    df_shohin_daicho = df_shohin_daicho.drop('Unnamed: 0', axis=1)
+    
+    return df_shohin_daicho
+
+
+def add_category(df_pivot, df_shohin_daicho):
+    """推移表に商品台帳の分類１列を追加する
+    
+    Parametars
+    ----------
+    df_pivot: DataFrame
+        pivot_measure の戻り値
+    df_shohin_daicho: DataFrame
+        read_ledger の戻り値
+    
+    Returns
+    ----------
+    df: DataFrame
+        商品コードをインデックスとし、商品名・各年月・分類１の列を持つ表
+        
+    """
+    
+    # マージしやすいように、インデックスを振りなおす
+    df = df_pivot.reset_index(drop=False)
+    df = df.set_index('商品コード', drop=True)
+    df = df.merge(df_shohin_daicho['分類１'], how='left', left_index=True, right_index=True)
+    
+    return df
+
+
+def is_own_category(cat):
+    """自社商品の分類コードかどうか"""
+    
+    return cat.isdigit() and int(cat) < OWN_CATEGORY_LIMIT
+
+
+def _append_total_row(df_tmp, total):
+    """一番下に合計行（商品名は「合計」、数値の列のみ合計）を追加する"""
+    
+    df_total = total.to_frame().T
+    df_total.index = pd.Index([TOTAL_ROW_CODE], name=df_tmp.index.name)
+    df_total.insert(0, '商品名', TOTAL_ROW_NAME)
+    
+    return pd.concat([df_tmp, df_total])
+
+
+def split_by_category(df, categories, unclassified=False):
+    """分類１ごとに表を分け、一番下に合計行を追加する
+    
+    分割と分類ごとの合計は1回のgroupbyで求める。自社商品の分類は商品名順に並べる。
+    
+    Parametars
+    ----------
+    df: DataFrame
+        add_category の戻り値
+    categories: iterable
+        分割する分類コード
+    unclassified: bool
+        categoriesにない分類（商品台帳にない商品を含む）を「未分類」としてまとめる
+    
+    Returns
+    ----------
+    df_cat: dict
+        分類コードをキーとした表（未分類はキーが UNCLASSIFIED で、分類１列を残す）
+        
+    """
+    
+    categories = list(categories)
+    value_columns = [column for column in df.columns if column not in ('商品名', '分類１')]
+    grouped = df.groupby('分類１', sort=False)
+    groups = dict(iter(grouped))
+    totals = grouped[value_columns].sum()
+    
+    df_cat = {}
+    for cat in categories:
+        df_tmp = groups.get(cat, df.iloc[0:0]).drop('分類１', axis=1)
+        if is_own_category(cat):
+            df_tmp = df_tmp.sort_values(by='商品名', ascending=True)
+        total = totals.loc[cat] if cat in totals.index else pd.Series(0, index=value_columns)
+        df_cat[cat] = _append_total_row(df_tmp, total)
+    
+    if unclassified:
+        df_tmp = df.loc[~df['分類１'].isin(categories)]
+        if len(df_tmp) > 0:
+            df_cat[UNCLASSIFIED] = _append_total_row(df_tmp, df_tmp[value_columns].sum())
+    
+    return df_cat
+
+
+#
+# Excel出力
+#
+
+def _sheet_name(cat, categories):
+    """分類コードからシート名を作成する"""
+    
+    return UNCLASSIFIED if cat == UNCLASSIFIED else f'{cat}_{categories[cat]}'
+
+
+def _append_sheet(wb, sheet_name, df):
+    """書き込み専用のブックに表を1行ずつ書き出す（見出し行・インデックス列は太字）"""
+    
+    ws = wb.create_sheet(title=sheet_name)
+    
+    def bold(value):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = _HEADER_FONT
+        return cell
+    
+    ws.append([bold(df.index.name), *(bold(column) for column in df.columns)])
+    for index, *values in df.itertuples(name=None):
+        ws.append([bold(index), *(None if pd.isna(value) else value for value in values)])
+
+
+_HEADER_FONT = Font(bold=True)
+
+
+def write_workbook(df_cat, categories, path):
+    """分類ごとの表を1つのExcelに出力する（シート名は「コード_名称」、未分類は「未分類」）
+    
+    openpyxlの書き込み専用モードで1行ずつ書き出すため、ブック全体をメモリ上に組み立てない。
+    
+    Parametars
+    ----------
+    df_cat: dict
+        split_by_category の戻り値
+    categories: dict
+        分類コードと名称
+    path: str
+        出力先のパス
+        
+    """
+    
+    wb = Workbook(write_only=True)
+    for cat in df_cat.keys():
+        _append_sheet(wb, _sheet_name(cat, categories), df_cat[cat])
+    wb.save(path)
+
+
+def flatten_trends(df_cat):
+    """分類ごとの表を、合計行を除いた1つの表にまとめる（CSV/Parquet出力用）
+    
+    Parametars
+    ----------
+    df_cat: dict
+        split_by_category の戻り値
+    
+    Returns
+    ----------
+    df: DataFrame
+        分類１, 商品コード, 商品名, 各年月 の列を持つ表
+        
+    """
+    
+    frames = []
+    for cat, df_tmp in df_cat.items():
+        df_tmp = df_tmp.drop(TOTAL_ROW_CODE)
+        if '分類１' not in df_tmp.columns:
+            df_tmp = df_tmp.assign(**{'分類１': cat})
+        frames.append(df_tmp)
+    df = pd.concat(frames).reset_index()
+    
+    return df[['分類１', *(column for column in df.columns if column != '分類１')]]
+
+
+def write_sales_trends(amount, quantity, categories, amount_output=AMOUNT_OUTPUT, quantity_output=QUANTITY_OUTPUT, formats=()):
+    """売上金額推移・売上数量推移のExcelを出力する
+    
+    2つのブックは分類ごとに並行して1回で書き出す。
+    formatsを指定した場合は、合計行を除いた表を同じ名前のCSV/Parquetにも出力する。
+    
+    Parametars
+    ----------
+    amount: dict
+        分類コードをキーとした売上金額の推移表
+    quantity: dict
+        分類コードをキーとした売上数量の推移表
+    categories: dict
+        分類コードと名称
+    amount_output: str
+        売上金額推移の出力先
+    quantity_output: str
+        売上数量推移の出力先
+    formats: iterable
+        Excelに加えて出力する形式（'csv', 'parquet'）
+    
+    Returns
+    ----------
+    written: list
+        出力したファイルのパス
+        
+    """
+    
+    outputs = [(amount, amount_output, Workbook(write_only=True)), (quantity, quantity_output, Workbook(write_only=True))]
+    for cat in dict.fromkeys([*amount.keys(), *quantity.keys()]):
+        for df_cat, _, wb in outputs:
+            if cat in df_cat:
+                _append_sheet(wb, _sheet_name(cat, categories), df_cat[cat])
+    
+    written = []
+    for df_cat, path, wb in outputs:
+        wb.save(path)
+        written.append(path)
+        for fmt in formats:
+            sibling = f'{os.path.splitext(path)[0]}.{fmt}'
+            if fmt == 'csv':
+                flatten_trends(df_cat).to_csv(sibling, index=False, encoding='utf-8')
+            elif fmt == 'parquet':
+                flatten_trends(df_cat).to_parquet(sibling, index=False)
+            else:
+                raise ValueError(f'出力形式に対応していません: {fmt}')
+            written.append(sibling)
+    
+    return written
+
+
+#
+# 売上推移の作成
+#
+
+def build_sales_trends(files, ledger_path=LEDGER_PATH, categories=CATEGORIES, workers=WORKERS, cache_dir=CACHE_DIR):
+    """売上月報から分類ごとの売上金額・売上数量の推移表を作成する
+    
+    売上金額の推移表には、categoriesにない分類の商品を「未分類」として含める。
+    売上数量の推移表は自社商品の分類のみ作成する。
+    
+    Parametars
+    ----------
+    files: list
+        売上月報のパスのリスト（この順に列が並ぶ）
+    ledger_path: str
+        商品台帳のパス
+    categories: dict
+        分類コードと名称
+    workers: integer
+        売上月報を並列に読み込むプロセス数
+    cache_dir: str
+        読み込み結果のキャッシュの保存先（Noneの場合はキャッシュしない）
+    
+    Returns
+    ----------
+    amount: dict
+        分類コードをキーとした売上金額の推移表
+    quantity: dict
+        分類コードをキーとした売上数量の推移表
+        
+    """
+    
+    # 売上月報は1ファイルにつき1回だけ読み込み、金額・数量の両方を縦持ちの表にまとめる
+    with phase(PHASE_PARSE):
+        df_report = read_monthly_reports(files, [MEASURE_AMOUNT, MEASURE_QUANTITY], workers, cache_dir)
+        df_shohin_daicho = read_ledger(ledger_path, cache_dir)
+    
+    with phase(PHASE_AGGREGATE):
+        df = add_category(pivot_measure(df_report, MEASURE_AMOUNT), df_shohin_daicho)
+        amount = split_by_category(df, categories, unclassified=True)
+        
+        df = add_category(pivot_measure(df_report, MEASURE_QUANTITY), df_shohin_daicho)
+        quantity = split_by_category(df, [cat for cat in categories if is_own_category(cat)])
+    
+    return amount, quantity
+
+
+def export_sales_trends(
+    report_dir=REPORT_DIR,
+    ledger_path=LEDGER_PATH,
+    amount_output=AMOUNT_OUTPUT,
+    quantity_output=QUANTITY_OUTPUT,
+    categories=CATEGORIES,
+    start=None,
+    end=None,
+    months=None,
+    yoy=False,
+    workers=WORKERS,
+    cache_dir=CACHE_DIR,
+    formats=()
+):
+    """売上月報を読み込み、売上金額推移・売上数量推移のExcelを出力する
+    
+    Parametars
+    ----------
+    report_dir: str
+        売上月報の保存先
+    ledger_path: str
+        商品台帳のパス
+    amount_output: str
+        売上金額推移の出力先
+    quantity_output: str
+        売上数量推移の出力先
+    categories: dict
+        分類コードと名称
+    start: str
+        yyyymm形式の開始年月（Noneの場合は最も古い月から）
+    end: str
+        yyyymm形式の終了年月（Noneの場合は最も新しい月まで）
+    months: integer
+        終了年月から遡る月数。startより優先する
+    yoy: bool
+        前年同期の売上月報も含める
+    workers: integer
+        売上月報を並列に読み込むプロセス数
+    cache_dir: str
+        読み込み結果のキャッシュの保存先（Noneの場合はキャッシュしない）
+    formats: iterable
+        Excelに加えて出力する形式（'csv', 'parquet'）
+    
+    Returns
+    ----------
+    file_path: list
+        読み込んだ売上月報のパスのリスト（新しい順）
+        
+    """
+    
+    # 削除された売上月報・商品台帳のキャッシュを削除する
+    evict_cache(cache_dir)
+    
+    file_path = list_monthly_reports(report_dir, start, end, months, yoy)
+    if not file_path:
+        raise FileNotFoundError(f'売上月報が見つかりません: {os.path.join(report_dir, REPORT_PATTERN)}')
+    
+    amount, quantity = build_sales_trends(file_path, ledger_path, categories, workers, cache_dir)
+    set_output_path(amount_output)
+    with phase(PHASE_WRITE):
+        write_sales_trends(amount, quantity, categories, amount_output, quantity_output, formats)
+    
+    return file_path
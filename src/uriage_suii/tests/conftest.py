@@ -0,0 +1,79 @@
+"""
+テスト共通のフィクスチャ
+
+売上月報・商品台帳と同じレイアウト（5行目が見出し）のExcelを作成します。
+"""
+import os
+
+import pytest
+from openpyxl import Workbook
+
+
+def write_report(path, rows):
+    """
+    商品別売上月報を作成する
+
+    Args:
+        path: 出力先
+        rows: (商品コード, 商品名, 純売上数, 総売上額) のリスト
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['商品別売上月報'])
+    for _ in range(3):
+        ws.append([])
+    ws.append([None, '商品コード', '商品名', '純売上数', '総売上額'])
+    for row in rows:
+        ws.append([None, *row])
+    ws.append([None, '<<総合計>>', '', sum(r[2] for r in rows), sum(r[3] for r in rows)])
+    wb.save(path)
+
+
+def write_ledger(path, rows):
+    """
+    商品台帳を作成する
+
+    Args:
+        path: 出力先
+        rows: (コード, 名称, 分類１) のリスト
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['商品台帳'])
+    for _ in range(3):
+        ws.append([])
+    ws.append([None, 'コード', '名称', '分類１'])
+    for row in rows:
+        ws.append([None, *row])
+    wb.save(path)
+
+
+@pytest.fixture
+def sales_data(tmp_path):
+    """
+    3か月分の売上月報と商品台帳を作成する
+
+    Returns:
+        dict: report_dir, ledger のパス
+    """
+    report_dir = tmp_path / 'reports'
+    report_dir.mkdir()
+    write_report(report_dir / '202401_商品別売上月報.xlsx', [
+        ('00000000000001', '眼鏡B', 1, 1000),
+        ('00000000000002', '眼鏡A', 2, 3000),
+    ])
+    write_report(report_dir / '202402_商品別売上月報.xlsx', [
+        ('00000000000001', '眼鏡B', 3, 3000),
+        ('00000000000003', 'パーツ', 10, 500),
+    ])
+    write_report(report_dir / '202403_商品別売上月報.xlsx', [
+        ('00000000000003', 'パーツ', 20, 1000),
+        ('00000000000004', '台帳にない商品', 1, 100),
+    ])
+    ledger = tmp_path / '商品台帳.xlsx'
+    write_ledger(ledger, [
+        ('00000000000001', '眼鏡B', '002'),
+        ('00000000000002', '眼鏡A', '002'),
+        ('00000000000003', 'パーツ', '102'),
+    ])
+    return {'report_dir': str(report_dir), 'ledger': str(ledger), 'tmp_path': tmp_path}
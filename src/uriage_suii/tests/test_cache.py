@@ -0,0 +1,83 @@
+"""
+Excel読み込みキャッシュモジュールのテスト
+
+read_excel_cached, evict_cache 関数のユニットテストを提供します。
+"""
+import os
+from unittest.mock import patch
+
+import pandas as pd
+
+from uriage_suii.cache import evict_cache, is_cached, read_excel_cached
+
+from .conftest import write_report
+
+
+class TestReadExcelCached:
+    """read_excel_cached関数のテスト"""
+
+    def test_second_read_uses_cache(self, sales_data, tmp_path):
+        """変更のないファイルは再度解析しない"""
+        file = os.path.join(sales_data['report_dir'], '202401_商品別売上月報.xlsx')
+        cache_dir = str(tmp_path / 'cache')
+        first = read_excel_cached(file, cache_dir=cache_dir, header=4, index_col=[1, 2])
+
+        with patch('uriage_suii.cache.pd.read_excel') as mock_read:
+            second = read_excel_cached(file, cache_dir=cache_dir, header=4, index_col=[1, 2])
+
+        mock_read.assert_not_called()
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_touched_file_with_same_content(self, sales_data, tmp_path):
+        """更新日時だけが変わった場合は内容を照合してキャッシュを使用する"""
+        file = os.path.join(sales_data['report_dir'], '202401_商品別売上月報.xlsx')
+        cache_dir = str(tmp_path / 'cache')
+        read_excel_cached(file, cache_dir=cache_dir, header=4)
+        os.utime(file, ns=(0, 0))
+
+        with patch('uriage_suii.cache.pd.read_excel') as mock_read:
+            read_excel_cached(file, cache_dir=cache_dir, header=4)
+
+        mock_read.assert_not_called()
+
+    def test_modified_file_is_parsed_again(self, sales_data, tmp_path):
+        """内容が変わったファイルは解析し直す"""
+        file = os.path.join(sales_data['report_dir'], '202401_商品別売上月報.xlsx')
+        cache_dir = str(tmp_path / 'cache')
+        read_excel_cached(file, cache_dir=cache_dir, header=4, index_col=[1, 2])
+        write_report(file, [('00000000000009', '新商品', 5, 5000)])
+
+        df = read_excel_cached(file, cache_dir=cache_dir, header=4, index_col=[1, 2])
+
+        assert ('00000000000009', '新商品') in df.index
+
+
+class TestIsCached:
+    """is_cached関数のテスト"""
+
+    def test_cached_after_read(self, sales_data, tmp_path):
+        """読み込み後は同じ読み込み条件の場合のみキャッシュありとする"""
+        file = os.path.join(sales_data['report_dir'], '202401_商品別売上月報.xlsx')
+        cache_dir = str(tmp_path / 'cache')
+        assert is_cached(file, cache_dir, header=4) is False
+
+        read_excel_cached(file, cache_dir=cache_dir, header=4)
+
+        assert is_cached(file, cache_dir, header=4) is True
+        assert is_cached(file, cache_dir, header=5) is False
+        assert is_cached(file, None, header=4) is False
+
+
+class TestEvictCache:
+    """evict_cache関数のテスト"""
+
+    def test_evict_removed_source(self, sales_data, tmp_path):
+        """元のファイルが削除されたキャッシュのみ削除する"""
+        cache_dir = str(tmp_path / 'cache')
+        for year_month in ('202401', '202402'):
+            file = os.path.join(sales_data['report_dir'], f'{year_month}_商品別売上月報.xlsx')
+            read_excel_cached(file, cache_dir=cache_dir, header=4)
+        os.remove(os.path.join(sales_data['report_dir'], '202401_商品別売上月報.xlsx'))
+
+        assert evict_cache(cache_dir) == 1
+        assert len(os.listdir(cache_dir)) == 2
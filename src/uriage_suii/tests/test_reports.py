@@ -0,0 +1,214 @@
+"""
+売上推移作成モジュールのテスト
+
+読み込み・集計・分類・出力の各段階と、CLIのユニットテストを提供します。
+"""
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from uriage_suii.cli import main
+from uriage_suii.reports import (
+    update_year_month,
+    list_monthly_reports,
+    read_monthly_reports,
+    pivot_measure,
+    build_sales_trends,
+    export_sales_trends,
+    write_sales_trends
+)
+
+
+class TestUpdateYearMonth:
+    """update_year_month関数のテスト"""
+
+    @pytest.mark.parametrize('year_month, difference, expected', [
+        ('202405', 1, '202406'),
+        ('202401', -1, '202312'),
+        ('202412', 1, '202501'),
+        ('202403', -15, '202212'),
+    ])
+    def test_update(self, year_month, difference, expected):
+        """年をまたぐ増減・12か月以上の増減ができる"""
+        assert update_year_month(year_month, difference) == expected
+
+
+class TestListMonthlyReports:
+    """list_monthly_reports関数のテスト"""
+
+    def test_newest_first(self, sales_data):
+        """新しい月から順に返す"""
+        files = list_monthly_reports(sales_data['report_dir'])
+
+        assert [os.path.basename(f)[:6] for f in files] == ['202403', '202402', '202401']
+
+    def test_filter_by_year_month(self, sales_data):
+        """ファイル名の年月で期間を絞り込む"""
+        files = list_monthly_reports(sales_data['report_dir'], start='202402', end='202402')
+
+        assert [os.path.basename(f)[:6] for f in files] == ['202402']
+
+    def test_last_months(self, sales_data):
+        """最新の月から指定した月数分を返す"""
+        files = list_monthly_reports(sales_data['report_dir'], months=2)
+
+        assert [os.path.basename(f)[:6] for f in files] == ['202403', '202402']
+
+    def test_year_over_year(self, sales_data):
+        """前年同期の売上月報も含める"""
+        report_dir = sales_data['report_dir']
+        for year_month in ('202302', '202303', '202304'):
+            open(os.path.join(report_dir, f'{year_month}_商品別売上月報.xlsx'), 'wb').close()
+
+        files = list_monthly_reports(report_dir, end='202403', months=2, yoy=True)
+
+        assert [os.path.basename(f)[:6] for f in files] == ['202403', '202402', '202303', '202302']
+
+    def test_ignore_files_without_year_month(self, sales_data):
+        """ファイル名の先頭が年月でないファイルは対象外"""
+        open(os.path.join(sales_data['report_dir'], 'コピー_商品別売上月報.xlsx'), 'wb').close()
+
+        assert len(list_monthly_reports(sales_data['report_dir'])) == 3
+
+
+class TestReadMonthlyReports:
+    """read_monthly_reports関数・pivot_measure関数のテスト"""
+
+    def test_long_format_without_total_row(self, sales_data):
+        """縦持ちの表にし、<<総合計>>行を除く"""
+        files = list_monthly_reports(sales_data['report_dir'])
+
+        df_report = read_monthly_reports(files, ['総売上額', '純売上数'], workers=1, cache_dir=None)
+
+        assert list(df_report.columns) == ['商品コード', '商品名', '年月', '項目', '値']
+        assert len(df_report) == 12
+        assert '<<総合計>>' not in set(df_report['商品コード'])
+
+    def test_pivot_fills_missing_months(self, sales_data):
+        """年月はファイルの順に並び、売上のない月は0になる"""
+        files = list_monthly_reports(sales_data['report_dir'])
+        df_report = read_monthly_reports(files, ['総売上額'], workers=1, cache_dir=None)
+
+        df_pivot = pivot_measure(df_report, '総売上額')
+
+        assert list(df_pivot.columns) == ['202403', '202402', '202401']
+        assert df_pivot.loc[('00000000000002', '眼鏡A')].tolist() == [0, 0, 3000]
+
+    def test_parallel_matches_serial(self, sales_data):
+        """並列に読み込んでも順に読み込んだ場合と同じ結果になる"""
+        files = list_monthly_reports(sales_data['report_dir'])
+
+        serial = read_monthly_reports(files, ['総売上額', '純売上数'], workers=1, cache_dir=None)
+        parallel = read_monthly_reports(files, ['総売上額', '純売上数'], workers=2, cache_dir=None)
+
+        pd.testing.assert_frame_equal(serial, parallel)
+
+    def test_cached_reports_are_read_in_process(self, sales_data, tmp_path):
+        """キャッシュにない売上月報が1件以下であればプロセスを起動しない"""
+        files = list_monthly_reports(sales_data['report_dir'])
+        cache_dir = str(tmp_path / 'cache')
+        read_monthly_reports(files[1:], ['総売上額'], workers=1, cache_dir=cache_dir)
+
+        with patch('uriage_suii.reports.ProcessPoolExecutor') as mock_pool:
+            df_report = read_monthly_reports(files, ['総売上額'], workers=4, cache_dir=cache_dir)
+
+        mock_pool.assert_not_called()
+        assert list(df_report['年月'].unique()) == [os.path.basename(file)[:6] for file in files]
+
+
+class TestBuildSalesTrends:
+    """build_sales_trends関数のテスト"""
+
+    def test_split_by_category(self, sales_data):
+        """分類ごとに分け、合計行を追加する。数量は自社商品の分類のみ"""
+        files = list_monthly_reports(sales_data['report_dir'])
+        categories = {'002': '自社商品（眼鏡）', '102': 'OEM（眼鏡パーツ）'}
+
+        amount, quantity = build_sales_trends(files, sales_data['ledger'], categories, workers=1, cache_dir=None)
+
+        assert list(amount) == ['002', '102', '未分類']
+        assert list(quantity) == ['002']
+        # 自社商品は商品名順
+        assert amount['002']['商品名'].tolist() == ['眼鏡A', '眼鏡B', '合計']
+        assert amount['002'].loc['99999999999999', '202402'] == 3000
+        assert quantity['002'].loc['99999999999999', '202401'] == 3
+
+    def test_unclassified(self, sales_data):
+        """商品分類にない商品は「未分類」にまとめ、合計は数値の列のみ"""
+        files = list_monthly_reports(sales_data['report_dir'])
+        categories = {'002': '自社商品（眼鏡）'}
+
+        amount, _ = build_sales_trends(files, sales_data['ledger'], categories, workers=1, cache_dir=None)
+
+        unclassified = amount['未分類']
+        assert unclassified['商品名'].tolist() == ['パーツ', '台帳にない商品', '合計']
+        assert unclassified.loc['99999999999999', '202403'] == 1100
+        assert unclassified.loc['99999999999999', '202402'] == 500
+
+    def test_empty_category(self, sales_data):
+        """商品のない分類は合計行（0）のみ"""
+        files = list_monthly_reports(sales_data['report_dir'])
+
+        amount, _ = build_sales_trends(files, sales_data['ledger'], {'001': '自社商品（effe）'}, workers=1, cache_dir=None)
+
+        assert amount['001']['商品名'].tolist() == ['合計']
+        assert amount['001'].loc['99999999999999', '202401'] == 0
+
+
+class TestWriteSalesTrends:
+    """write_sales_trends関数のテスト"""
+
+    def test_workbooks_and_csv(self, sales_data):
+        """2つのブックと、合計行を除いたCSVを出力する"""
+        tmp_path = sales_data['tmp_path']
+        files = list_monthly_reports(sales_data['report_dir'])
+        categories = {'002': '自社商品（眼鏡）', '102': 'OEM（眼鏡パーツ）'}
+        amount, quantity = build_sales_trends(files, sales_data['ledger'], categories, workers=1, cache_dir=None)
+
+        written = write_sales_trends(
+            amount, quantity, categories,
+            str(tmp_path / 'amount.xlsx'), str(tmp_path / 'quantity.xlsx'), formats=['csv']
+        )
+
+        assert written == [str(tmp_path / name) for name in ('amount.xlsx', 'amount.csv', 'quantity.xlsx', 'quantity.csv')]
+        sheets = pd.read_excel(tmp_path / 'amount.xlsx', sheet_name=None, index_col=0, dtype={'商品コード': str})
+        assert list(sheets) == ['002_自社商品（眼鏡）', '102_OEM（眼鏡パーツ）', '未分類']
+        assert sheets['002_自社商品（眼鏡）'].loc['99999999999999', '商品名'] == '合計'
+        df_csv = pd.read_csv(tmp_path / 'quantity.csv', dtype={'分類１': str, '商品コード': str})
+        assert df_csv.columns[:3].tolist() == ['分類１', '商品コード', '商品名']
+        assert df_csv['商品名'].tolist() == ['眼鏡A', '眼鏡B']
+
+
+class TestCli:
+    """mainのテスト"""
+
+    def test_writes_workbooks(self, sales_data):
+        """指定した出力先に分類ごとのシートを持つExcelを出力する"""
+        tmp_path = sales_data['tmp_path']
+        amount_output = tmp_path / 'amount.xlsx'
+        quantity_output = tmp_path / 'quantity.xlsx'
+
+        main([
+            '--report-dir', sales_data['report_dir'],
+            '--ledger', sales_data['ledger'],
+            '--from', '202402',
+            '--amount-output', str(amount_output),
+            '--quantity-output', str(quantity_output),
+            '--cache-dir', str(tmp_path / 'cache'),
+            '-w', '1',
+        ])
+
+        sheets = pd.read_excel(amount_output, sheet_name=None, index_col=0)
+        assert '002_自社商品（眼鏡）' in sheets
+        assert '未分類' in sheets
+        assert list(sheets['002_自社商品（眼鏡）'].columns) == ['商品名', '202403', '202402']
+        assert quantity_output.exists()
+
+    def test_no_reports(self, tmp_path):
+        """売上月報がない場合は終了コード1で終了する"""
+        with pytest.raises(SystemExit) as e:
+            main(['--report-dir', str(tmp_path), '--no-cache'])
+
+        assert e.value.code == 1
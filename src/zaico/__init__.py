@@ -3,30 +3,75 @@ ZAICO 在庫管理パッケージ
 
 ZAICOの在庫管理APIを利用した入出庫、エクスポート、
 新規商品登録などの機能を提供するパッケージです。
+
+各機能は最初に参照したときにモジュールを読み込みます（import zaico だけでは requests などを読み込まない）。
 """
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING, Any, List
 
 __version__ = '1.0.0'
 __author__ = 'Uesaka Dev'
 
-from .api import (
-    get_zaico_inventories,
-    get_inventory_by_title,
-    update_inventory_quantity,
-    create_inventory
-)
-from .stock_in import stock_in
-from .stock_out import stock_out
-from .export_inventory import export_inventories_to_csv
-from .register_items import register_items_from_csv
-
-__all__ = [
-    'get_zaico_inventories',
-    'get_inventory_by_title',
-    'update_inventory_quantity',
-    'create_inventory',
-    'stock_in',
-    'stock_out',
-    'export_inventories_to_csv',
-    'register_items_from_csv',
-]
+if TYPE_CHECKING:
+    from .client import ZaicoClient, get_client, set_client
+    from .api import (
+        ZaicoAPIError,
+        iter_inventory_pages,
+        iter_zaico_inventories,
+        get_zaico_inventories,
+        get_inventory_by_title,
+        update_inventory_quantity,
+        create_inventory
+    )
+    from .stock_in import stock_in
+    from .stock_out import stock_out
+    from .movements import apply_movements_file
+    from .export_inventory import export_inventories_to_csv
+    from .register_items import register_items_from_csv
+
+# 公開する名前と定義しているモジュール
+_LAZY_ATTRIBUTES = {
+    'ZaicoClient': '.client',
+    'get_client': '.client',
+    'set_client': '.client',
+    'ZaicoAPIError': '.api',
+    'iter_inventory_pages': '.api',
+    'iter_zaico_inventories': '.api',
+    'get_zaico_inventories': '.api',
+    'get_inventory_by_title': '.api',
+    'update_inventory_quantity': '.api',
+    'create_inventory': '.api',
+    'stock_in': '.stock_in',
+    'stock_out': '.stock_out',
+    'apply_movements_file': '.movements',
+    'export_inventories_to_csv': '.export_inventory',
+    'register_items_from_csv': '.register_items',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name: str, value: Any) -> None:
+        # サブモジュール zaico.stock_in などを読み込んでも、同名の関数 zaico.stock_in を上書きしない
+        if isinstance(value, types.ModuleType) and name in _LAZY_ATTRIBUTES:
+            return
+        super().__setattr__(name, value)
+
 
+sys.modules[__name__].__class__ = _Package
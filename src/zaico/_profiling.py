@@ -0,0 +1,23 @@
+"""
+処理時間の計測（profiling パッケージ）の呼び出し
+
+計測はエントリーポイント（profiling.run_main）で有効にするため、profiling パッケージは任意です。
+ライブラリとして読み込んだ場合など、profiling パッケージがない環境では何もしない phase() / set_output_path() を使います。
+uriage_suii パッケージもこのモジュールを使います。
+"""
+import contextlib
+from typing import ContextManager, Optional
+
+try:
+    from profiling import PHASE_AGGREGATE, PHASE_NETWORK, PHASE_PARSE, PHASE_WRITE, phase, set_output_path
+except ImportError:
+    PHASE_AGGREGATE = '集計'
+    PHASE_NETWORK = '通信'
+    PHASE_PARSE = '読み込み・解析'
+    PHASE_WRITE = '書き出し'
+
+    def phase(name: str) -> ContextManager[None]:
+        return contextlib.nullcontext()
+
+    def set_output_path(path: Optional[str]) -> None:
+        pass
@@ -4,44 +4,223 @@ ZAICO API 通信モジュール
 ZAICOの在庫管理APIとの通信処理を担当するモジュールです。
 在庫データの取得、更新、新規登録などの機能を提供します。
 """
-import requests
 import logging
-from typing import Optional, List, Dict, Any, Tuple
+import math
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Iterable
+
+import requests
 
-from .config import ZAICO_API_TOKEN, ZAICO_API_BASE_URL, setup_logging
+from .client import ZaicoClient, get_client
+from .config import HTTP_RETRY_STATUSES, INVENTORY_FETCH_CONCURRENCY, setup_logging
+from .ratelimit import with_current_priority
 
 
 # ロガーの設定
 logger = setup_logging()
 
+# スレッドごとの直前のエラー応答のステータスコード（Noneで失敗を返す関数の失敗の原因を判定するため）
+_last_error = threading.local()
+
+
+class ZaicoAPIError(Exception):
+    """
+    ZAICO APIがエラー応答を返したことを表す例外
+
+    ページ単位で結果を返すジェネレーターなど、
+    Noneで失敗を表現できない関数から送出される。
+    """
+
+    def __init__(self, status_code: int, text: str) -> None:
+        super().__init__(f'{status_code} - {text}')
+        self.status_code = status_code
+        self.text = text
+
 
-def _get_headers() -> Dict[str, str]:
+def last_error_status() -> Optional[int]:
     """
-    API通信用のヘッダーを取得する
+    このスレッドで直前に失敗したAPI呼び出し（get_inventory, update_inventory_quantity）のステータスコードを取得する
 
     Returns:
-        Dict[str, str]: Authorization と Content-Type を含むヘッダー
+        Optional[int]: ステータスコード。直前の呼び出しが成功した場合・応答がなかった場合はNone
     """
-    return {
-        'Authorization': f'Bearer {ZAICO_API_TOKEN}',
-        'Content-Type': 'application/json'
-    }
+    return getattr(_last_error, 'status_code', None)
 
 
-def get_zaico_inventories() -> Optional[List[Dict[str, Any]]]:
+def is_retryable_status(status_code: Optional[int]) -> bool:
     """
-    ZAICOの現在の在庫一覧を取得する
+    エラーが一時的なもの（時間をおいて再試行すれば成功する可能性がある）か判定する
+
+    Args:
+        status_code: エラー応答のステータスコード（応答がなかった場合・不明な場合はNone）
 
     Returns:
-        Optional[List[Dict[str, Any]]]: 在庫データのリスト。エラー時はNone
+        bool: 429/5xx・不明な場合はTrue、それ以外の4xxはFalse
     """
-    url = f'{ZAICO_API_BASE_URL}/inventories'
-    response = requests.get(url, headers=_get_headers())
+    return status_code is None or status_code in HTTP_RETRY_STATUSES or status_code >= 500
 
-    if response.status_code == 200:
-        return response.json()
-    else:
+
+def _check_response(response: requests.Response) -> None:
+    """
+    レスポンスがエラーの場合はログを出力して例外を送出する
+
+    Args:
+        response: APIのレスポンス
+
+    Raises:
+        ZaicoAPIError: ステータスコードが200以外の場合
+    """
+    if response.status_code != 200:
         logger.error(f'Error: {response.status_code} - {response.text}')
+        raise ZaicoAPIError(response.status_code, response.text)
+
+
+def _fetch_page(
+    client: ZaicoClient,
+    params: Optional[Dict[str, Any]],
+    page: int
+) -> List[Dict[str, Any]]:
+    """
+    在庫一覧の指定ページを取得する
+
+    Args:
+        client: 使用するクライアント
+        params: 絞り込み条件
+        page: ページ番号（1始まり）
+
+    Returns:
+        List[Dict[str, Any]]: ページ内の在庫データ
+    """
+    response = client.get('/inventories', params={**(params or {}), 'page': page})
+    _check_response(response)
+    return response.json()
+
+
+def _fetch_pages_concurrently(
+    client: ZaicoClient,
+    params: Optional[Dict[str, Any]],
+    pages: Iterable[int],
+    concurrency: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    複数ページを並列に取得し、ページ番号順に返す
+
+    先読みするページ数を concurrency に制限し、メモリ使用量を抑える。
+
+    Args:
+        client: 使用するクライアント
+        params: 絞り込み条件
+        pages: 取得するページ番号
+        concurrency: 同時に取得するページ数
+
+    Yields:
+        List[Dict[str, Any]]: ページ内の在庫データ
+    """
+    page_iter = iter(pages)
+    fetch_page = with_current_priority(_fetch_page)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        pending = deque(
+            executor.submit(fetch_page, client, params, page)
+            for _, page in zip(range(concurrency), page_iter)
+        )
+        while pending:
+            items = pending.popleft().result()
+            next_page = next(page_iter, None)
+            if next_page is not None:
+                pending.append(executor.submit(fetch_page, client, params, next_page))
+            if not items:
+                break
+            yield items
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_inventory_pages(
+    params: Optional[Dict[str, Any]] = None,
+    concurrency: int = 1
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    在庫一覧をページ単位で取得する
+
+    1ページ目のレスポンスの Link ヘッダー（rel="next"）をたどって全ページを取得する。
+    concurrency が2以上で Total-Count ヘッダーから総ページ数が分かる場合は、
+    2ページ目以降を並列に取得する。ページはページ番号順に返す。
+
+    Args:
+        params: 絞り込み条件（例: {"title": "商品名"}）
+        concurrency: 同時に取得するページ数
+
+    Yields:
+        List[Dict[str, Any]]: ページ内の在庫データ
+
+    Raises:
+        ZaicoAPIError: APIがエラーを返した場合
+    """
+    client = get_client()
+    response = client.get('/inventories', params=params)
+    _check_response(response)
+    first_page = response.json()
+    yield first_page
+
+    next_url = response.links.get('next', {}).get('url')
+    if not next_url or not first_page:
+        return
+
+    total_count = response.headers.get('Total-Count')
+    if concurrency > 1 and total_count and str(total_count).isdigit():
+        page_count = math.ceil(int(total_count) / len(first_page))
+        yield from _fetch_pages_concurrently(client, params, range(2, page_count + 1), concurrency)
+        return
+
+    while next_url:
+        # next のURLには絞り込み条件とページ番号が含まれている
+        response = client.get(next_url)
+        _check_response(response)
+        yield response.json()
+        next_url = response.links.get('next', {}).get('url')
+
+
+def iter_zaico_inventories(
+    params: Optional[Dict[str, Any]] = None,
+    concurrency: int = 1
+) -> Iterator[Dict[str, Any]]:
+    """
+    在庫データを1件ずつ取得する
+
+    全件をメモリに載せずに処理したい場合に使用する。
+
+    Args:
+        params: 絞り込み条件
+        concurrency: 同時に取得するページ数
+
+    Yields:
+        Dict[str, Any]: 在庫データ
+
+    Raises:
+        ZaicoAPIError: APIがエラーを返した場合
+    """
+    for page in iter_inventory_pages(params, concurrency):
+        yield from page
+
+
+def get_zaico_inventories(
+    concurrency: int = INVENTORY_FETCH_CONCURRENCY
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    ZAICOの現在の在庫一覧を取得する（全ページ）
+
+    Args:
+        concurrency: 同時に取得するページ数
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: 在庫データのリスト。エラー時はNone
+    """
+    try:
+        return list(iter_zaico_inventories(concurrency=concurrency))
+    except ZaicoAPIError:
         return None
 
 
@@ -55,13 +234,30 @@ def get_inventory_by_title(title: str) -> Optional[List[Dict[str, Any]]]:
     Returns:
         Optional[List[Dict[str, Any]]]: マッチした在庫データのリスト。エラー時はNone
     """
-    url = f'{ZAICO_API_BASE_URL}/inventories'
     params = {"title": title}
-    response = requests.get(url, headers=_get_headers(), params=params)
+    try:
+        return list(iter_zaico_inventories(params))
+    except ZaicoAPIError:
+        return None
+
+
+def get_inventory(inventory_id: int) -> Optional[Dict[str, Any]]:
+    """
+    指定IDの在庫データを取得する
+
+    Args:
+        inventory_id: 在庫ID
+
+    Returns:
+        Optional[Dict[str, Any]]: 在庫データ。エラー時はNone
+    """
+    _last_error.status_code = None
+    response = get_client().get(f'/inventories/{inventory_id}')
 
     if response.status_code == 200:
         return response.json()
     else:
+        _last_error.status_code = response.status_code
         logger.error(f'Error: {response.status_code} - {response.text}')
         return None
 
@@ -77,13 +273,14 @@ def update_inventory_quantity(inventory_id: int, new_quantity: int) -> Optional[
     Returns:
         Optional[Dict[str, Any]]: 更新後の在庫データ。エラー時はNone
     """
-    url = f'{ZAICO_API_BASE_URL}/inventories/{inventory_id}'
     data = {"quantity": str(new_quantity)}
-    response = requests.put(url, headers=_get_headers(), json=data)
+    _last_error.status_code = None
+    response = get_client().put(f'/inventories/{inventory_id}', json=data)
 
     if response.status_code == 200:
         return response.json()
     else:
+        _last_error.status_code = response.status_code
         logger.error(f'Error: {response.status_code} - {response.text}')
         return None
 
@@ -108,7 +305,6 @@ def create_inventory(
     Returns:
         Tuple[bool, Any]: (成功フラグ, レスポンスデータまたはエラーメッセージ)
     """
-    url = f'{ZAICO_API_BASE_URL}/inventories'
     payload: Dict[str, Any] = {"title": title}
 
     if category:
@@ -120,7 +316,7 @@ def create_inventory(
     if quantity is not None:
         payload["quantity"] = str(quantity)
 
-    response = requests.post(url, headers=_get_headers(), json=payload)
+    response = get_client().post('/inventories', json=payload)
 
     if response.status_code == 200:
         return True, response.json()
@@ -0,0 +1,353 @@
+"""
+ZAICO 非同期APIクライアントモジュール
+
+asyncioを使用するサービスから、スレッドを介さずにZAICO APIを呼び出すためのクライアントを提供します。
+一覧取得（ページング対応）、商品名検索、数量更新、新規登録を zaico.api と同じ戻り値の規約で提供します。
+
+httpx が必要です（pip install httpx）。
+"""
+import asyncio
+import math
+import time
+import logging
+from collections import deque
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator
+
+try:
+    import httpx
+except ImportError:  # httpx は非同期クライアントを使う場合のみ必要
+    httpx = None
+
+from .api import ZaicoAPIError
+from .client import IDEMPOTENT_METHODS, backoff_delay, parse_retry_after, should_retry_status
+from .config import (
+    ZAICO_API_TOKEN,
+    ZAICO_API_BASE_URL,
+    HTTP_POOL_SIZE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_BACKOFF_MAX,
+    API_RATE_LIMIT,
+    API_RATE_BURST,
+    API_RATE_LIMIT_FILE,
+    INVENTORY_FETCH_CONCURRENCY,
+    setup_logging
+)
+from .metrics import STATUS_ERROR, get_metrics
+from .ratelimit import RequestScheduler, TokenBucket, get_scheduler
+
+
+# ロガーの設定
+logger = setup_logging()
+
+
+class AsyncZaicoClient:
+    """
+    ZAICO API用の非同期クライアント
+
+    httpx.AsyncClient の接続プールを共有し、同時に実行するリクエスト数をセマフォで制限する。
+    429/5xx応答の再試行とレート制限は同期版の ZaicoClient と同じ規則に従う。
+
+    使用例:
+        async with AsyncZaicoClient() as client:
+            items = await client.get_inventory_by_title('商品A')
+    """
+
+    def __init__(
+        self,
+        base_url: str = ZAICO_API_BASE_URL,
+        token: Optional[str] = None,
+        pool_size: int = HTTP_POOL_SIZE,
+        concurrency: Optional[int] = None,
+        timeout: Tuple[float, float] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_factor: float = HTTP_BACKOFF_FACTOR,
+        backoff_max: float = HTTP_BACKOFF_MAX,
+        rate_limiter: Optional[TokenBucket] = None,
+        transport: Optional[Any] = None
+    ) -> None:
+        """
+        Args:
+            base_url: APIのベースURL
+            token: APIトークン（省略時は設定値）
+            pool_size: 接続プールの最大接続数
+            concurrency: 同時に実行するリクエスト数（省略時は pool_size）
+            timeout: (接続タイムアウト, 読み込みタイムアウト) 秒
+            max_retries: 再試行の最大回数
+            backoff_factor: 再試行間隔の基準値（秒）
+            backoff_max: 再試行間隔の上限（秒）
+            rate_limiter: レート制限（省略時は設定値の ZaicoClient と共有するトークンバケット・スケジューラー）
+            transport: httpxのトランスポート（テスト用）
+        """
+        if httpx is None:
+            raise ImportError('AsyncZaicoClient を使用するには httpx をインストールしてください')
+
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        if rate_limiter is None:
+            # 同期クライアント（ZaicoClient）と同じスケジューラーを使用し、プロセス全体で上限と優先度を守る
+            scheduler = get_scheduler(API_RATE_LIMIT, API_RATE_BURST, API_RATE_LIMIT_FILE)
+        else:
+            scheduler = RequestScheduler(rate_limiter)
+        self.scheduler: Optional[RequestScheduler] = scheduler
+        self.rate_limiter = self.scheduler.bucket if self.scheduler is not None else None
+        self._semaphore = asyncio.Semaphore(concurrency or pool_size)
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip('/'),
+            headers={
+                'Authorization': f'Bearer {ZAICO_API_TOKEN if token is None else token}',
+                'Content-Type': 'application/json'
+            },
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+            transport=transport
+        )
+
+    async def __aenter__(self) -> 'AsyncZaicoClient':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        保持している接続をすべて閉じる
+        """
+        await self._client.aclose()
+
+    async def _wait_rate_limit(self) -> float:
+        if self.scheduler is None:
+            return 0.0
+        # スケジューラーの待機（FileTokenBucket のファイルロックを含む）はイベントループを止めないよう別スレッドで行う。
+        # 優先度（request_priority()）はコンテキストごと引き継がれる
+        return await asyncio.to_thread(self.scheduler.acquire)
+
+    def _url_for(self, path: str) -> str:
+        return path if path.startswith(('http://', 'https://')) else f'{str(self._client.base_url).rstrip("/")}{path}'
+
+    def _record_retry(self, method: str, path: str, status: Any) -> None:
+        get_metrics().record_retry(method, self._url_for(path), status)
+
+    def _record(
+        self,
+        method: str,
+        path: str,
+        status: Any,
+        started: float,
+        retries: int,
+        response: Optional['httpx.Response'],
+        waited: float
+    ) -> None:
+        url = self._url_for(path)
+        bytes_sent = bytes_received = 0
+        if response is not None:
+            bytes_sent = len(response.request.content)
+            length = response.headers.get('Content-Length')
+            bytes_received = int(length) if length and length.isdigit() else len(response.content)
+        get_metrics().record(
+            method, url, status, time.perf_counter() - started, retries, bytes_sent, bytes_received, waited
+        )
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> 'httpx.Response':
+        """
+        HTTPリクエストを送信する
+
+        所要時間・ステータス・再試行回数・送受信バイト数を共有メトリクス（zaico.metrics）に記録する
+        （再試行した試行のステータスも記録する）。
+
+        Args:
+            method: HTTPメソッド
+            path: APIパスまたはURL
+            **kwargs: httpx.AsyncClient.request に渡す引数
+
+        Returns:
+            httpx.Response: 最終的なレスポンス
+
+        Raises:
+            httpx.TransportError: 再試行しても通信に失敗した場合
+        """
+        method = method.upper()
+        started = time.perf_counter()
+        waited = 0.0
+        attempt = 0
+        while True:
+            waited += await self._wait_rate_limit()
+            try:
+                async with self._semaphore:
+                    response = await self._client.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                # 接続確立前の失敗はリクエストが届いていないため、POSTでも再試行できる（同期クライアントと同じ）
+                retryable = method in IDEMPOTENT_METHODS or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if attempt >= self.max_retries or not retryable:
+                    self._record(method, path, STATUS_ERROR, started, attempt, None, waited)
+                    raise
+                self._record_retry(method, path, STATUS_ERROR)
+                delay = backoff_delay(attempt, self.backoff_factor, self.backoff_max)
+                logger.warning(f'通信エラーのため再試行します（{attempt + 1}回目, {delay:.2f}秒後）: {method} {path} {e}')
+            else:
+                if attempt >= self.max_retries or not should_retry_status(method, response.status_code):
+                    self._record(method, path, response.status_code, started, attempt, response, waited)
+                    return response
+                self._record_retry(method, path, response.status_code)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                delay = backoff_delay(attempt, self.backoff_factor, self.backoff_max) if retry_after is None else retry_after
+                logger.warning(f'ステータス{response.status_code}のため再試行します（{attempt + 1}回目, {delay:.2f}秒後）: {method} {path}')
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _get_page(self, params: Optional[Dict[str, Any]], page: int) -> List[Dict[str, Any]]:
+        response = await self.request('GET', '/inventories', params={**(params or {}), 'page': page})
+        _check_response(response)
+        return response.json()
+
+    async def iter_inventory_pages(
+        self,
+        params: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        在庫一覧をページ単位で取得する
+
+        zaico.api.iter_inventory_pages と同様に Link ヘッダーをたどり、
+        concurrency が2以上で総件数が分かる場合は2ページ目以降を並列に取得する。
+
+        Args:
+            params: 絞り込み条件
+            concurrency: 同時に取得するページ数
+
+        Yields:
+            List[Dict[str, Any]]: ページ内の在庫データ
+
+        Raises:
+            ZaicoAPIError: APIがエラーを返した場合
+        """
+        response = await self.request('GET', '/inventories', params=params)
+        _check_response(response)
+        first_page = response.json()
+        yield first_page
+
+        next_url = response.links.get('next', {}).get('url')
+        if not next_url or not first_page:
+            return
+
+        total_count = response.headers.get('Total-Count')
+        if concurrency > 1 and total_count and total_count.isdigit():
+            pages = iter(range(2, math.ceil(int(total_count) / len(first_page)) + 1))
+            pending = deque(
+                asyncio.ensure_future(self._get_page(params, page))
+                for _, page in zip(range(concurrency), pages)
+            )
+            try:
+                while pending:
+                    items = await pending.popleft()
+                    next_page = next(pages, None)
+                    if next_page is not None:
+                        pending.append(asyncio.ensure_future(self._get_page(params, next_page)))
+                    if not items:
+                        break
+                    yield items
+            finally:
+                for task in pending:
+                    task.cancel()
+                # 取り消したタスクの終了を待ち、例外も回収する（未回収の警告を出さないため）
+                await asyncio.gather(*pending, return_exceptions=True)
+            return
+
+        while next_url:
+            response = await self.request('GET', next_url)
+            _check_response(response)
+            yield response.json()
+            next_url = response.links.get('next', {}).get('url')
+
+    async def get_zaico_inventories(
+        self,
+        concurrency: int = INVENTORY_FETCH_CONCURRENCY
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        在庫一覧を取得する（全ページ）
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 在庫データのリスト。エラー時はNone
+        """
+        try:
+            return [item async for page in self.iter_inventory_pages(concurrency=concurrency) for item in page]
+        except ZaicoAPIError:
+            return None
+
+    async def get_inventory_by_title(self, title: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        タイトルで在庫データを絞り込み取得する
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: マッチした在庫データのリスト。エラー時はNone
+        """
+        try:
+            return [item async for page in self.iter_inventory_pages({'title': title}) for item in page]
+        except ZaicoAPIError:
+            return None
+
+    async def get_inventory(self, inventory_id: int) -> Optional[Dict[str, Any]]:
+        """
+        指定IDの在庫データを取得する
+
+        Returns:
+            Optional[Dict[str, Any]]: 在庫データ。エラー時はNone
+        """
+        response = await self.request('GET', f'/inventories/{inventory_id}')
+        if response.status_code == 200:
+            return response.json()
+        logger.error(f'Error: {response.status_code} - {response.text}')
+        return None
+
+    async def update_inventory_quantity(self, inventory_id: int, new_quantity: int) -> Optional[Dict[str, Any]]:
+        """
+        指定IDの在庫データの数量を更新する
+
+        Returns:
+            Optional[Dict[str, Any]]: 更新後の在庫データ。エラー時はNone
+        """
+        response = await self.request('PUT', f'/inventories/{inventory_id}', json={"quantity": str(new_quantity)})
+        if response.status_code == 200:
+            return response.json()
+        logger.error(f'Error: {response.status_code} - {response.text}')
+        return None
+
+    async def create_inventory(
+        self,
+        title: str,
+        category: Optional[str] = None,
+        place: Optional[str] = None,
+        state: Optional[str] = None,
+        quantity: Optional[int] = None
+    ) -> Tuple[bool, Any]:
+        """
+        新規在庫を登録する
+
+        Returns:
+            Tuple[bool, Any]: (成功フラグ, レスポンスデータまたはエラーメッセージ)
+        """
+        payload: Dict[str, Any] = {"title": title}
+        if category:
+            payload["category"] = category
+        if place:
+            payload["place"] = place
+        if state:
+            payload["state"] = state
+        if quantity is not None:
+            payload["quantity"] = str(quantity)
+
+        response = await self.request('POST', '/inventories', json=payload)
+        if response.status_code == 200:
+            return True, response.json()
+        logger.error(f'新規在庫登録失敗: {response.status_code}, {response.text}')
+        return False, response.text
+
+
+def _check_response(response: 'httpx.Response') -> None:
+    if response.status_code != 200:
+        logger.error(f'Error: {response.status_code} - {response.text}')
+        raise ZaicoAPIError(response.status_code, response.text)
@@ -0,0 +1,186 @@
+"""
+入庫・出庫CLIモジュール
+
+zaico_stock_in.py / zaico_stock_out.py のエントリーポイントを提供します。
+スキャナー端末などから繰り返し実行されるため、起動時に読み込むモジュールを最小限にしています。
+
+入出庫は次の順に処理します。
+
+1. ZAICO_JOURNAL_PATH が設定されていれば、ジャーナル（zaico.journal）に記録した時点で終了する
+2. ZAICO_DAEMON_URL が設定されていれば、常駐サービス（zaico.daemon）に処理を依頼する（標準ライブラリのみで通信する）
+3. どちらも設定されていない・使用できない場合にだけ、requests などを読み込んで自身で処理する
+"""
+import json
+import socket
+import sys
+import logging
+import urllib.error
+import urllib.request
+from typing import Optional, Dict, Any
+
+from ._profiling import PHASE_NETWORK, PHASE_WRITE, phase
+from .config import DAEMON_TIMEOUT, DAEMON_URL, JOURNAL_PATH, setup_logging
+from .journal import MovementJournal
+
+
+# ロガーの設定
+logger = setup_logging()
+
+
+def send_movement(
+    title: str,
+    delta: float,
+    url: str = DAEMON_URL,
+    timeout: float = DAEMON_TIMEOUT
+) -> Optional[Dict[str, Any]]:
+    """
+    常駐サービスに入出庫を依頼する
+
+    Args:
+        title: 商品名
+        delta: 増減数（入庫は正、出庫は負）
+        url: 常駐サービスのURL
+        timeout: 応答を待つ時間（秒）
+
+    Returns:
+        Optional[Dict[str, Any]]: 処理結果（MovementResult のフィールド）。接続できない場合はNone。
+        接続後のタイムアウトなど、反映されたか分からない場合は失敗の結果を返す（二重に反映しないため）
+    """
+    request = urllib.request.Request(
+        f'{url.rstrip("/")}/movements',
+        data=json.dumps({'title': title, 'delta': delta}, ensure_ascii=False).encode('utf-8'),
+        headers={'Content-Type': 'application/json; charset=utf-8'},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())['results'][0]
+    except urllib.error.HTTPError as e:
+        try:
+            detail = json.loads(e.read())['message']
+        except (OSError, ValueError, KeyError, TypeError):
+            detail = f'{e.code} {e.reason}'
+        message = f'常駐サービスでエラーが発生しました: {detail}'
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, (ConnectionError, socket.gaierror)):
+            logger.warning(f'常駐サービスに接続できません: {url} ({e.reason})')
+            return None
+        message = f'常駐サービスからの応答がありません: {e.reason}'
+    except (OSError, ValueError, KeyError, IndexError) as e:
+        message = f'常駐サービスからの応答がありません: {e}'
+    logger.error(f'{message}（商品: {title}、数量: {delta:+g}）')
+    return {'title': title, 'delta': delta, 'ok': False, 'new_quantity': None, 'message': message}
+
+
+def delegate_movement(title: str, quantity: str, sign: int, label: str) -> Optional[bool]:
+    """
+    入庫・出庫CLIの処理を常駐サービスに依頼し、結果を表示する
+
+    Args:
+        title: 商品名
+        quantity: 数量（文字列）
+        sign: 入庫は1、出庫は-1
+        label: 表示する処理名（'入庫' / '出庫'）
+
+    Returns:
+        Optional[bool]: 処理の成功/失敗。依頼できなかった場合はNone（呼び出し元で処理する）
+    """
+    if not DAEMON_URL:
+        return None
+    try:
+        delta = sign * float(quantity)
+    except (ValueError, TypeError):
+        return None
+
+    with phase(PHASE_NETWORK):
+        result = send_movement(title, delta, DAEMON_URL)
+    if result is None:
+        return None
+    if result['ok']:
+        print(f'{label}完了（商品: {title}、新数量: {result["new_quantity"]}）')
+        return True
+    logger.error(f'{label}に失敗しました: {title} ({result["message"]})')
+    return False
+
+
+def record_movement(title: str, quantity: str, sign: int, label: str) -> Optional[bool]:
+    """
+    入庫・出庫CLIの入出庫をジャーナルに記録し、結果を表示する
+
+    Args:
+        title: 商品名
+        quantity: 数量（文字列）
+        sign: 入庫は1、出庫は-1
+        label: 表示する処理名（'入庫' / '出庫'）
+
+    Returns:
+        Optional[bool]: 記録の成功/失敗。ジャーナルを使用しない・書き込めない場合はNone（呼び出し元で処理する）
+    """
+    if not JOURNAL_PATH:
+        return None
+    try:
+        delta = sign * float(quantity)
+    except (ValueError, TypeError) as e:
+        logger.error(f'{label}入力値の変換に失敗: {quantity} ({e})')
+        return False
+
+    try:
+        with phase(PHASE_WRITE):
+            MovementJournal(JOURNAL_PATH).append(title, delta)
+    except OSError as e:
+        logger.error(f'ジャーナルに記録できません: {JOURNAL_PATH} ({e})')
+        return None
+    print(f'{label}を記録しました（商品: {title}、数量: {abs(delta):g}）')
+    return True
+
+
+def stock_in_main() -> None:
+    """
+    入庫処理のエントリーポイント
+
+    コマンドライン引数から商品名と追加数量を受け取り、入庫処理を実行する。
+    """
+    if len(sys.argv) != 3:
+        print('使い方: python zaico_stock_in.py 商品名 追加数量(int)')
+        sys.exit(1)
+
+    title = sys.argv[1]
+    add_quantity = sys.argv[2]
+
+    # ジャーナル（ZAICO_JOURNAL_PATH）があれば記録だけを行い、反映は常駐サービスなどに任せる
+    if record_movement(title, add_quantity, 1, '入庫') is not None:
+        return
+
+    # 常駐サービス（ZAICO_DAEMON_URL）があれば処理を依頼し、接続できなければ自身で処理する
+    if delegate_movement(title, add_quantity, 1, '入庫') is not None:
+        return
+
+    # requests などの読み込みは自身で処理する場合のみ行う
+    from .stock_in import stock_in
+    stock_in(title, add_quantity)
+
+
+def stock_out_main() -> None:
+    """
+    出庫処理のエントリーポイント
+
+    コマンドライン引数から商品名と出庫数量を受け取り、出庫処理を実行する。
+    """
+    if len(sys.argv) != 3:
+        print('使い方: python zaico_stock_out.py 商品名 出庫数量(int)')
+        sys.exit(1)
+
+    title = sys.argv[1]
+    sub_quantity = sys.argv[2]
+
+    # ジャーナル（ZAICO_JOURNAL_PATH）があれば記録だけを行い、反映は常駐サービスなどに任せる
+    if record_movement(title, sub_quantity, -1, '出庫') is not None:
+        return
+
+    # 常駐サービス（ZAICO_DAEMON_URL）があれば処理を依頼し、接続できなければ自身で処理する
+    if delegate_movement(title, sub_quantity, -1, '出庫') is not None:
+        return
+
+    # requests などの読み込みは自身で処理する場合のみ行う
+    from .stock_out import stock_out
+    stock_out(title, sub_quantity)
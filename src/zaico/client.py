@@ -0,0 +1,322 @@
+"""
+ZAICO HTTPクライアントモジュール
+
+ZAICO APIへの通信で共有するHTTPクライアントを提供します。
+接続プールによるKeep-Alive、タイムアウト、429/5xx応答時の
+指数バックオフ（ジッター付き、Retry-After対応）による再試行を担当します。
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional, Any, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    ZAICO_API_TOKEN,
+    ZAICO_API_BASE_URL,
+    HTTP_POOL_SIZE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_BACKOFF_MAX,
+    HTTP_RETRY_STATUSES,
+    API_RATE_LIMIT,
+    API_RATE_BURST,
+    API_RATE_LIMIT_FILE,
+    setup_logging
+)
+from .metrics import STATUS_ERROR, get_metrics, start_reporting
+from .ratelimit import TokenBucket, RequestScheduler, get_scheduler
+
+
+# ロガーの設定
+logger = setup_logging()
+
+# 再送しても副作用が重複しないメソッド
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# 非冪等メソッド（POST）でも再送してよいステータス（サーバーが処理していないことが明らかなもの）
+SAFE_RETRY_STATUSES = frozenset([429, 503])
+
+
+class ZaicoClient:
+    """
+    ZAICO API用の共有HTTPクライアント
+
+    requests.Session を保持し、接続を使い回すことで
+    リクエストごとのTCP/TLSハンドシェイクを省略する。
+    スレッド間で共有して使用できる。
+    """
+
+    def __init__(
+        self,
+        base_url: str = ZAICO_API_BASE_URL,
+        token: Optional[str] = None,
+        pool_size: int = HTTP_POOL_SIZE,
+        timeout: Tuple[float, float] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_factor: float = HTTP_BACKOFF_FACTOR,
+        backoff_max: float = HTTP_BACKOFF_MAX,
+        rate_limit: float = API_RATE_LIMIT,
+        rate_burst: float = API_RATE_BURST,
+        rate_limit_file: str = API_RATE_LIMIT_FILE
+    ) -> None:
+        """
+        Args:
+            base_url: APIのベースURL
+            token: APIトークン（省略時は設定値）
+            pool_size: 接続プールの最大接続数
+            timeout: (接続タイムアウト, 読み込みタイムアウト) 秒
+            max_retries: 再試行の最大回数
+            backoff_factor: 再試行間隔の基準値（秒）
+            backoff_max: 再試行間隔の上限（秒）
+            rate_limit: 1秒あたりのリクエスト数の上限（0以下で制限なし）
+            rate_burst: 連続して送信できる最大リクエスト数
+            rate_limit_file: レート制限を複数プロセスで共有する場合の状態ファイル
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        # 同じ設定のクライアントとはトークンバケットを共有する（非同期クライアントを含む）
+        self.scheduler: Optional[RequestScheduler] = get_scheduler(rate_limit, rate_burst, rate_limit_file)
+        self.rate_limiter: Optional[TokenBucket] = self.scheduler.bucket if self.scheduler is not None else None
+
+        self.session = requests.Session()
+        # 再試行は request() 側で行うため、アダプター側の再試行は無効にする
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {ZAICO_API_TOKEN if token is None else token}',
+            'Content-Type': 'application/json'
+        })
+
+    def close(self) -> None:
+        """
+        保持している接続をすべて閉じる
+        """
+        self.session.close()
+
+    def url_for(self, path: str) -> str:
+        """
+        APIパスを完全なURLに変換する
+
+        Args:
+            path: '/inventories' 形式のパス、または完全なURL
+
+        Returns:
+            str: リクエスト先のURL
+        """
+        if path.startswith(('http://', 'https://')):
+            return path
+        return f'{self.base_url}{path}'
+
+    def request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        """
+        HTTPリクエストを送信する
+
+        送信前にレート制限のトークンを取得し、上限を超える場合は待機する。
+        トークンは request_priority() で設定した優先度の高いリクエストから順に割り当てる。
+        429/5xx応答と通信エラーは指数バックオフで再試行する。
+        POSTは重複登録を避けるため、サーバーが未処理と判断できる場合のみ再試行する。
+        所要時間・ステータス・再試行回数・送受信バイト数を共有メトリクス（zaico.metrics）に記録する
+        （再試行した試行のステータスも記録する）。
+
+        Args:
+            method: HTTPメソッド
+            path: APIパスまたはURL
+            **kwargs: requests.Session.request に渡す引数
+
+        Returns:
+            requests.Response: 最終的なレスポンス
+
+        Raises:
+            requests.RequestException: 再試行しても通信に失敗した場合
+        """
+        method = method.upper()
+        url = self.url_for(path)
+        kwargs.setdefault('timeout', self.timeout)
+
+        started = time.perf_counter()
+        waited = 0.0
+        attempt = 0
+        while True:
+            if self.scheduler is not None:
+                waited += self.scheduler.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not self._should_retry_error(method, e, attempt):
+                    self._record(method, url, STATUS_ERROR, started, attempt, None, waited)
+                    raise
+                get_metrics().record_retry(method, url, STATUS_ERROR)
+                delay = self._backoff(attempt)
+                logger.warning(f'通信エラーのため再試行します（{attempt + 1}回目, {delay:.2f}秒後）: {method} {url} {e}')
+            else:
+                if not self._should_retry_status(method, response.status_code, attempt):
+                    self._record(
+                        method, url, response.status_code, started, attempt, response, waited, kwargs.get('stream', False)
+                    )
+                    return response
+                get_metrics().record_retry(method, url, response.status_code)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                delay = self._backoff(attempt) if retry_after is None else retry_after
+                logger.warning(f'ステータス{response.status_code}のため再試行します（{attempt + 1}回目, {delay:.2f}秒後）: {method} {url}')
+                response.close()
+
+            time.sleep(delay)
+            attempt += 1
+
+    def _record(
+        self,
+        method: str,
+        url: str,
+        status: Any,
+        started: float,
+        retries: int,
+        response: Optional[requests.Response],
+        waited: float,
+        stream: bool = False
+    ) -> None:
+        bytes_sent = bytes_received = 0
+        if isinstance(response, requests.Response):
+            body = response.request.body if response.request is not None else None
+            bytes_sent = len(body) if isinstance(body, (bytes, str)) else 0
+            # 通信量（圧縮後）を数えるため Content-Length を優先し、ない場合（chunked）は読み込んだ本文の長さを使う
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit():
+                bytes_received = int(length)
+            elif not stream:
+                bytes_received = len(response.content or b'')
+        get_metrics().record(
+            method, url, status, time.perf_counter() - started, retries, bytes_sent, bytes_received, waited
+        )
+
+    def get(self, path: str, **kwargs: Any) -> requests.Response:
+        """GETリクエストを送信する"""
+        return self.request('GET', path, **kwargs)
+
+    def put(self, path: str, **kwargs: Any) -> requests.Response:
+        """PUTリクエストを送信する"""
+        return self.request('PUT', path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> requests.Response:
+        """POSTリクエストを送信する"""
+        return self.request('POST', path, **kwargs)
+
+    def _should_retry_status(self, method: str, status_code: int, attempt: int) -> bool:
+        return attempt < self.max_retries and should_retry_status(method, status_code)
+
+    def _should_retry_error(self, method: str, error: Exception, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        # 接続確立前のタイムアウトはリクエストが届いていないため、POSTでも再試行できる
+        return method in IDEMPOTENT_METHODS or isinstance(error, requests.ConnectTimeout)
+
+    def _backoff(self, attempt: int) -> float:
+        return backoff_delay(attempt, self.backoff_factor, self.backoff_max)
+
+
+def should_retry_status(method: str, status_code: int) -> bool:
+    """
+    ステータスコードが再試行の対象か判定する
+
+    Args:
+        method: HTTPメソッド（大文字）
+        status_code: ステータスコード
+
+    Returns:
+        bool: 再試行する場合True
+    """
+    if status_code not in HTTP_RETRY_STATUSES:
+        return False
+    return method in IDEMPOTENT_METHODS or status_code in SAFE_RETRY_STATUSES
+
+
+def backoff_delay(attempt: int, factor: float, maximum: float) -> float:
+    """
+    再試行までの待ち時間を計算する（指数バックオフ + ジッター）
+
+    Args:
+        attempt: これまでの再試行回数
+        factor: 待ち時間の基準値（秒）
+        maximum: 待ち時間の上限（秒）
+
+    Returns:
+        float: 待ち時間（秒）
+    """
+    base = min(maximum, factor * (2 ** attempt))
+    return base / 2 + random.uniform(0, base / 2)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-Afterヘッダーを待ち時間（秒）に変換する
+
+    Args:
+        value: ヘッダー値（秒数またはHTTP日付）
+
+    Returns:
+        Optional[float]: 待ち時間。解釈できない場合はNone
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+_client: Optional[ZaicoClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ZaicoClient:
+    """
+    プロセス内で共有するクライアントを取得する（初回呼び出し時に生成）
+
+    Returns:
+        ZaicoClient: 共有クライアント
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ZaicoClient()
+                start_reporting()
+    return _client
+
+
+def set_client(client: Optional[ZaicoClient]) -> None:
+    """
+    共有クライアントを差し替える
+
+    接続先やプールサイズを変更したい場合に使用する。
+    Noneを指定すると現在のクライアントを閉じ、次回 get_client() で再生成される。
+
+    Args:
+        client: 新しいクライアント
+    """
+    global _client
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
@@ -4,17 +4,117 @@ ZAICO API 設定・定数モジュール
 このモジュールはZAICO APIとの通信に必要な設定値と
 アプリケーション全体で使用する定数を管理します。
 """
+import math
 import os
+import sys
 import logging
-from dotenv import load_dotenv
+
+
+def _find_env_file() -> str:
+    # python-dotenv の find_dotenv と同じ順（EXEでは作業ディレクトリ、それ以外はこのファイルの場所から上位へ）に探す
+    path = os.getcwd() if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(path, '.env')
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(path)
+        if parent == path:
+            return ''
+        path = parent
+
+
+def load_env() -> None:
+    """
+    .env ファイルがあれば環境変数を読み込む
+
+    python-dotenv は .env ファイルが見つかった場合のみ読み込み、起動時間を短くする。
+    """
+    env_file = _find_env_file()
+    if env_file:
+        from dotenv import load_dotenv
+        load_dotenv(env_file)
+
+
+def _env_float(name: str, default: float) -> float:
+    # 不正な値で全ツールが起動できなくならないよう、既定値を使う（ログの設定前のため標準エラー出力に警告する）
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        result = float(value)
+    except ValueError:
+        result = math.nan
+    if not math.isfinite(result):
+        print(f'環境変数 {name} の値が正しくありません: {value}（{default:g} を使用します）', file=sys.stderr)
+        return default
+    return result
 
 
 # 環境変数の読み込み
-load_dotenv()
+load_env()
 
 # API設定
 ZAICO_API_TOKEN = os.environ.get('ZAICO_API_TOKEN', '')
-ZAICO_API_BASE_URL = 'https://web.zaico.co.jp/api/v1'
+# 接続先（ローカルのAPIスタブ（zaico.stub）などに向ける場合は環境変数で指定する）
+ZAICO_API_BASE_URL = os.environ.get('ZAICO_API_BASE_URL', 'https://web.zaico.co.jp/api/v1')
+
+# HTTP通信設定
+HTTP_POOL_SIZE = 10            # 接続プールの最大接続数
+HTTP_CONNECT_TIMEOUT = 5.0     # 接続タイムアウト（秒）
+HTTP_READ_TIMEOUT = 30.0       # 読み込みタイムアウト（秒）
+HTTP_MAX_RETRIES = 3           # 再試行の最大回数
+HTTP_BACKOFF_FACTOR = 0.5      # 再試行間隔の基準値（秒）。0.5, 1, 2, ... と倍増する
+HTTP_BACKOFF_MAX = 30.0        # 再試行間隔の上限（秒）
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# APIトークンあたりのリクエスト上限（0以下でレート制限なし）
+API_RATE_LIMIT = 5.0           # 1秒あたりのリクエスト数
+API_RATE_BURST = 10            # 連続して送信できる最大リクエスト数
+# 複数プロセスでレート制限を共有する場合の状態ファイル（未指定の場合はプロセスごとに制限する）
+API_RATE_LIMIT_FILE = os.environ.get('ZAICO_RATE_LIMIT_FILE', '')
+
+# 在庫一覧取得時に同時に取得するページ数
+INVENTORY_FETCH_CONCURRENCY = 4
+
+# 新規商品登録時に同時に送信するリクエスト数
+REGISTER_WORKERS = 4
+
+# 一括入出庫時に同時に送信するリクエスト数
+MOVEMENT_WORKERS = 4
+# 一括入出庫で商品名ごとに検索する商品数の上限（超える場合は在庫一覧を取得して照合する）
+TITLE_LOOKUP_THRESHOLD = 30
+
+# 数量更新時の競合検出（更新後に読み直し、他の処理が直後に書き込んでいれば失敗とする）
+VERIFY_UPDATES = os.environ.get('ZAICO_VERIFY_UPDATES', '') == '1'
+
+# 在庫インデックス設定（パス未指定の場合はインデックスを使用しない）
+INDEX_PATH = os.environ.get('ZAICO_INDEX_PATH', '')
+INDEX_TTL = 600                # インデックスのデータを信頼する期間（秒）
+
+# 常駐サービス（zaico.daemon）設定
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = 8765
+DAEMON_DROP_DIR = os.path.join('tmp', 'movements')  # 入出庫ファイルを置くと反映するディレクトリ
+DAEMON_POLL_INTERVAL = 1.0     # ディレクトリを確認する間隔（秒）
+# 長時間動作するため、既定で更新直前・直後に最新の在庫と照合する（ZAICO_DAEMON_VERIFY=0 で無効）
+DAEMON_VERIFY = os.environ.get('ZAICO_DAEMON_VERIFY', '1') != '0'
+# 入庫・出庫CLIの依頼先（設定すると常駐サービスに処理を依頼し、接続できない場合は自身で処理する）
+DAEMON_URL = os.environ.get('ZAICO_DAEMON_URL', '')
+DAEMON_TIMEOUT = 60.0          # 常駐サービスの応答を待つ時間（秒）
+
+# 入出庫ジャーナル設定（パスを指定すると、入庫・出庫CLIは入出庫を記録した時点で終了し、
+# 常駐サービスまたは zaico_journal.py がバックグラウンドで反映する）
+JOURNAL_PATH = os.environ.get('ZAICO_JOURNAL_PATH', '')
+JOURNAL_INTERVAL = 1.0         # 未反映の入出庫を確認する間隔（秒）
+JOURNAL_BATCH_SIZE = 500       # 1回にまとめて反映する入出庫の最大件数
+JOURNAL_MAX_ATTEMPTS = 10      # 商品が見つからないなど、再試行しても成功しない失敗を許容する回数（超えると反映できなかった入出庫として記録する）
+JOURNAL_BACKOFF_MAX = 300.0    # 通信エラー・429/5xx で反映できない間の再試行間隔の上限（秒）。JOURNAL_INTERVAL から倍増する
+
+# APIメトリクス設定（zaico.metrics）
+METRICS_INTERVAL = _env_float('ZAICO_METRICS_INTERVAL', 0.0)  # 要約を出力する間隔（秒、0で出力しない）
+METRICS_TEXTFILE = os.environ.get('ZAICO_METRICS_TEXTFILE', '')          # Prometheus の textfile の出力先
+METRICS_SAMPLE_SIZE = 2048     # p50/p95/p99 の計算に使う直近のリクエスト数（エンドポイントごと）
+METRICS_LATENCY_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]  # 所要時間のヒストグラム（秒）
 
 # ログ設定
 LOG_FILE = 'error.log'
@@ -33,13 +133,16 @@ def setup_logging() -> logging.Logger:
     """
     ロギングを設定し、ロガーを返す
 
+    ログファイルは最初にログを出力するときに開く（エラーがなければ作成しない）。
+
     Returns:
         logging.Logger: 設定済みのロガー
     """
-    logging.basicConfig(
-        filename=LOG_FILE,
-        level=LOG_LEVEL,
-        format=LOG_FORMAT
-    )
+    if not logging.root.handlers:
+        logging.basicConfig(
+            handlers=[logging.FileHandler(LOG_FILE, delay=True)],
+            level=LOG_LEVEL,
+            format=LOG_FORMAT
+        )
     return logging.getLogger(__name__)
 
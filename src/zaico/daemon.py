@@ -0,0 +1,351 @@
+"""
+入出庫常駐サービスモジュール
+
+入出庫を受け付けてZAICOに反映する常駐サービスを提供します。
+入庫・出庫CLIを実行するたびにかかる起動処理（設定・ログの初期化、モジュールの読み込み、
+APIへの接続、商品名の検索）を省略するため、次の状態をプロセス内に保持し続けます。
+
+- 共有HTTPクライアント（接続プール）
+- 在庫インデックス（ZAICO_INDEX_PATH が未設定の場合はメモリ上に作成。商品名から在庫IDを引くためだけに使用する）
+- ロガー
+
+入出庫は次の2つの方法で受け付けます。
+
+- HTTP: POST /movements に {"title": 商品名, "delta": 数量} またはそのリストを送信する。
+  反映が終わるまで待ち、処理結果を返す（GET /metrics でAPIメトリクスを Prometheus のテキスト形式で返す）
+- ディレクトリ: DAEMON_DROP_DIR に入出庫ファイル（CSV/JSONL）を置く。
+  反映後に done/（失敗を含む場合は failed/）へ移動する。
+  書き込み途中のファイルを読まないよう、別名で書き込んでから名前を変更して置くこと
+- ジャーナル: JOURNAL_PATH を指定すると、入庫・出庫CLIが記録した入出庫をバックグラウンドで反映する
+  （起動時には前回までに反映できていない入出庫を反映し直す）
+
+同じ商品への入出庫は MovementCoalescer でまとめ、1回の更新で反映します。
+数量は常に更新直前にAPIから取得し、既定では更新前後に最新の在庫と照合します（DAEMON_VERIFY）。
+ZAICO_DAEMON_URL を設定すると、入庫・出庫CLI（zaico.cli）はこのサービスに処理を依頼します。
+"""
+import argparse
+import json
+import os
+import threading
+import logging
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List, Dict, Any, Tuple
+
+from .api import ZaicoAPIError, iter_inventory_pages
+from .config import (
+    DAEMON_DROP_DIR,
+    DAEMON_HOST,
+    DAEMON_POLL_INTERVAL,
+    DAEMON_PORT,
+    DAEMON_VERIFY,
+    INVENTORY_FETCH_CONCURRENCY,
+    JOURNAL_PATH,
+    MOVEMENT_WORKERS,
+    setup_logging
+)
+from .index import InventoryIndex, get_index, set_index
+from .journal import JournalApplier, MovementJournal
+from .metrics import get_metrics
+from .movements import MovementResult, aggregate_movements, apply_movement, read_movements
+from .quantity import MovementCoalescer
+from .ratelimit import PRIORITY_BULK, PRIORITY_INTERACTIVE, request_priority
+
+
+# ロガーの設定
+logger = setup_logging()
+
+# 入出庫ファイルとして扱う拡張子
+DROP_EXTENSIONS = ('.csv', '.jsonl')
+
+
+class MovementDaemon:
+    """
+    入出庫を受け付けてZAICOに反映する常駐サービス
+
+    start() でHTTPサーバーとディレクトリの監視をバックグラウンドのスレッドで開始する。
+    """
+
+    def __init__(
+        self,
+        host: str = DAEMON_HOST,
+        port: int = DAEMON_PORT,
+        drop_dir: Optional[str] = DAEMON_DROP_DIR,
+        workers: int = MOVEMENT_WORKERS,
+        verify: bool = DAEMON_VERIFY,
+        poll_interval: float = DAEMON_POLL_INTERVAL,
+        journal: Optional[MovementJournal] = None
+    ) -> None:
+        """
+        Args:
+            host: 待ち受けるアドレス
+            port: 待ち受けるポート（0で空いているポートを使用）
+            drop_dir: 入出庫ファイルを監視するディレクトリ（Noneで監視しない）
+            workers: 並列に更新する在庫数
+            verify: 更新後に読み直し、他の処理が直後に書き込んでいれば失敗とする（既定で有効）
+            poll_interval: ディレクトリを確認する間隔（秒）
+            journal: 記録された入出庫を反映するジャーナル（Noneで反映しない）
+        """
+        self.drop_dir = drop_dir
+        self.verify = verify
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self._coalescer = MovementCoalescer(self._apply, workers)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._threads: List[threading.Thread] = []
+        # ジャーナルの入出庫も MovementCoalescer を通し、HTTP・監視ディレクトリの入出庫と同じ商品で競合させない
+        self.journal_applier = JournalApplier(journal, self._apply_journal) if journal is not None else None
+
+    @property
+    def url(self) -> str:
+        """
+        サービスのURL（ZAICO_DAEMON_URL に指定する）
+        """
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _apply(self, title: str, delta: float) -> MovementResult:
+        result = apply_movement(title, delta, self.verify)
+        with self._lock:
+            self.processed += 1
+        return result
+
+    def _apply_journal(self, deltas: Dict[str, float]) -> List[MovementResult]:
+        with request_priority(PRIORITY_BULK):
+            return self.apply(list(deltas.items()))
+
+    def submit(self, title: str, delta: float) -> 'Future[MovementResult]':
+        """
+        入出庫を登録する
+
+        Args:
+            title: 商品名
+            delta: 増減数（入庫は正、出庫は負）
+
+        Returns:
+            Future[MovementResult]: 処理結果（同じ商品への入出庫とまとめて反映した場合はその結果）
+        """
+        return self._coalescer.submit(title, delta)
+
+    def apply(self, movements: List[Tuple[str, float]]) -> List[MovementResult]:
+        """
+        入出庫を登録し、すべて反映されるまで待つ
+
+        Args:
+            movements: (商品名, 増減数) のリスト
+
+        Returns:
+            List[MovementResult]: movements の順の処理結果
+        """
+        futures = [self.submit(title, delta) for title, delta in movements]
+        return [future.result() for future in futures]
+
+    def scan_drop_dir(self) -> int:
+        """
+        監視ディレクトリの入出庫ファイルを反映する
+
+        Returns:
+            int: 処理したファイル数
+        """
+        if not self.drop_dir or not os.path.isdir(self.drop_dir):
+            return 0
+        names = sorted(
+            name for name in os.listdir(self.drop_dir)
+            if name.lower().endswith(DROP_EXTENSIONS) and os.path.isfile(os.path.join(self.drop_dir, name))
+        )
+        for name in names:
+            self._process_file(os.path.join(self.drop_dir, name))
+        return len(names)
+
+    def _process_file(self, path: str) -> None:
+        name = os.path.basename(path)
+        try:
+            movements, read_errors = read_movements(path)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f'入出庫ファイルの読み込みに失敗: {name} ({e})')
+            self._archive(path, 'failed')
+            return
+
+        deltas, convert_errors = aggregate_movements(movements)
+        errors = read_errors + convert_errors
+        for error in errors:
+            logger.error(f'{name}: {error}')
+
+        with request_priority(PRIORITY_BULK):
+            results = self.apply(list(deltas.items()))
+        succeeded = sum(1 for result in results if result.ok)
+        print(
+            f'{name}: 入出庫完了（{len(movements)}行 → {len(results)}商品、'
+            f'成功: {succeeded}件、失敗: {len(results) - succeeded}件、読み込みエラー: {len(errors)}件）'
+        )
+        self._archive(path, 'done' if succeeded == len(results) and not errors else 'failed')
+
+    def _archive(self, path: str, folder: str) -> None:
+        archive_dir = os.path.join(os.path.dirname(path), folder)
+        os.makedirs(archive_dir, exist_ok=True)
+        os.replace(path, os.path.join(archive_dir, os.path.basename(path)))
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.scan_drop_dir()
+            except Exception as e:
+                logger.error(f'監視ディレクトリの処理に失敗: {e}')
+
+    def start(self) -> 'MovementDaemon':
+        """
+        バックグラウンドのスレッドでHTTPサーバーとディレクトリの監視を開始する
+        """
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        ]
+        if self.drop_dir:
+            os.makedirs(self.drop_dir, exist_ok=True)
+            self._threads.append(threading.Thread(target=self._watch, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        if self.journal_applier is not None:
+            self.journal_applier.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        受け付けを停止し、登録済みの入出庫をすべて反映してから終了する
+        """
+        self._stop.set()
+        if self.journal_applier is not None:
+            self.journal_applier.stop()
+        if self._threads:
+            self._server.shutdown()
+        self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._coalescer.close()
+
+    def __enter__(self) -> 'MovementDaemon':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def _parse_movements(body: Any) -> List[Tuple[str, float]]:
+    records = body if isinstance(body, list) else [body]
+    movements = []
+    for record in records:
+        if not isinstance(record, dict) or not record.get('title'):
+            raise ValueError('title is required')
+        movements.append((str(record['title']), float(record['delta'])))
+    return movements
+
+
+def _make_handler(daemon: MovementDaemon) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self) -> None:
+            if self.path == '/metrics':
+                self._send_text(200, get_metrics().to_prometheus())
+                return
+            if self.path != '/health':
+                self._send(404, {'message': 'Not Found'})
+                return
+            self._send(200, {'status': 'ok', 'processed': daemon.processed})
+
+        def do_POST(self) -> None:
+            if self.path != '/movements':
+                self._send(404, {'message': 'Not Found'})
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                movements = _parse_movements(json.loads(self.rfile.read(length) or b'null'))
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(400, {'message': f'Invalid movement: {e}'})
+                return
+            try:
+                with request_priority(PRIORITY_INTERACTIVE):
+                    results = daemon.apply(movements)
+            except Exception as e:
+                # 応答せずに接続を切ると、依頼元は反映されたか分からなくなるため、エラーとして応答する
+                logger.error(f'入出庫の反映に失敗: {e}')
+                self._send(500, {'message': f'入出庫の反映に失敗しました: {e}'})
+                return
+            self._send(200, {'results': [result._asdict() for result in results]})
+
+        def _send(self, status: int, payload: Any) -> None:
+            self._send_text(status, json.dumps(payload, ensure_ascii=False), 'application/json; charset=utf-8')
+
+        def _send_text(self, status: int, text: str, content_type: str = 'text/plain; version=0.0.4; charset=utf-8') -> None:
+            data = text.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    """
+    常駐サービスのエントリーポイント
+    """
+    parser = argparse.ArgumentParser(description='入出庫を受け付けてZAICOに反映する常駐サービスを起動します')
+    parser.add_argument('--host', default=DAEMON_HOST, help=f'待ち受けるアドレス（デフォルト: {DAEMON_HOST}）')
+    parser.add_argument('--port', type=int, default=DAEMON_PORT, help=f'待ち受けるポート（デフォルト: {DAEMON_PORT}）')
+    parser.add_argument(
+        '--drop-dir', default=DAEMON_DROP_DIR,
+        help=f'入出庫ファイルを監視するディレクトリ（デフォルト: {DAEMON_DROP_DIR}、空文字で監視しない）'
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, default=MOVEMENT_WORKERS,
+        help=f'並列に更新する在庫数（デフォルト: {MOVEMENT_WORKERS}）'
+    )
+    parser.add_argument(
+        '--verify', action=argparse.BooleanOptionalAction, default=DAEMON_VERIFY,
+        help='更新後に読み直し、他の処理が直後に書き込んでいれば失敗とする（デフォルト: 有効、--no-verify で無効）'
+    )
+    parser.add_argument(
+        '--journal', default=JOURNAL_PATH,
+        help='記録された入出庫を反映するジャーナルファイル（省略時は環境変数 ZAICO_JOURNAL_PATH）'
+    )
+    parser.add_argument('--preload', action='store_true', help='起動時に在庫一覧を取得してインデックスを作成する')
+    args = parser.parse_args()
+
+    # インデックスが設定されていなければメモリ上に作成し、商品名の検索結果を保持する
+    index = get_index()
+    if index is None:
+        index = InventoryIndex(':memory:')
+        set_index(index)
+    if args.preload:
+        try:
+            with request_priority(PRIORITY_BULK):
+                counts = index.refresh(iter_inventory_pages(concurrency=INVENTORY_FETCH_CONCURRENCY))
+            print(f'インデックスを作成しました（{counts["changed"] + counts["unchanged"]}件）')
+        except ZaicoAPIError:
+            print('在庫データの取得に失敗しました。インデックスなしで起動します')
+
+    journal = MovementJournal(args.journal) if args.journal else None
+    daemon = MovementDaemon(args.host, args.port, args.drop_dir or None, args.workers, args.verify, journal=journal)
+    daemon.start()
+    print(f'入出庫常駐サービスを起動しました: {daemon.url}')
+    print(f'入庫・出庫CLIから依頼するには ZAICO_DAEMON_URL={daemon.url} を設定してください（Ctrl+Cで終了）')
+    if args.drop_dir:
+        print(f'監視ディレクトリ: {os.path.abspath(args.drop_dir)}')
+    if journal is not None:
+        print(f'ジャーナル: {os.path.abspath(journal.path)}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        print(f'終了しました（在庫の更新: {daemon.processed}回）')
@@ -3,15 +3,21 @@
 
 ZAICOの在庫データをCSV形式でエクスポートする機能を提供します。
 """
+import argparse
 import csv
+import json
 import os
 import sys
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Iterable, Iterator, List, Dict, Any, Callable, TextIO
 
-from .api import get_zaico_inventories
-from .config import INVENTORY_CSV_COLUMNS, setup_logging
+import requests
+
+from ._profiling import PHASE_PARSE, PHASE_WRITE, phase, set_output_path
+from .api import ZaicoAPIError, iter_inventory_pages
+from .config import INVENTORY_CSV_COLUMNS, INVENTORY_FETCH_CONCURRENCY, setup_logging
+from .ratelimit import PRIORITY_BULK, with_priority
 
 
 # ロガーの設定
@@ -32,64 +38,471 @@ def get_app_dir() -> str:
     return os.path.dirname(os.path.abspath(__file__))
 
 
-def export_inventories_to_csv(filename: Optional[str] = None) -> bool:
+def _inventory_to_row(item: Dict[str, Any]) -> List[Any]:
+    """
+    在庫データをCSVの1行に変換する
+
+    Args:
+        item: 在庫データ
+
+    Returns:
+        List[Any]: INVENTORY_CSV_COLUMNS の順に並べた値
+    """
+    return [
+        item.get('id', ''),
+        item.get('title', ''),
+        item.get('category', ''),
+        item.get('place', ''),
+        item.get('state', ''),
+        item.get('quantity', ''),
+        item.get('unit', ''),
+        item.get('code', ''),
+        item.get('etc', ''),
+        item.get('updated_at', ''),
+        item.get('created_at', ''),
+        (item.get('stocktake_attributes') or {}).get('checked_at', ''),
+        item.get('group_tag', ''),
+        '',  # 仕入単価
+        ''   # 納品単価
+    ]
+
+
+def write_inventories_csv(pages: Iterable[List[Dict[str, Any]]], f: TextIO) -> int:
+    """
+    ページ単位の在庫データをCSVとして書き出す
+
+    1ページ書き出すごとにフラッシュするため、
+    後続ページの取得中でも先頭から順に出力先へ届く。
+
+    Args:
+        pages: 在庫データのページのイテラブル
+        f: 書き込み先のファイルオブジェクト
+
+    Returns:
+        int: 書き出した在庫の件数
+    """
+    writer = csv.writer(f)
+    writer.writerow(INVENTORY_CSV_COLUMNS)
+    f.flush()
+
+    count = 0
+    for page in pages:
+        with phase(PHASE_WRITE):
+            writer.writerows(_inventory_to_row(item) for item in page)
+            f.flush()
+        count += len(page)
+    return count
+
+
+@with_priority(PRIORITY_BULK)
+def export_inventories_to_csv(
+    filename: Optional[str] = None,
+    output: Optional[TextIO] = None,
+    concurrency: int = INVENTORY_FETCH_CONCURRENCY
+) -> bool:
     """
     在庫データをCSVファイルにエクスポートする
 
+    在庫一覧をページ単位で取得しながら書き出すため、
+    メモリに保持するのは先読み中のページ分のみとなる。
+    ファイルへの出力は一時ファイルに書き出し、全件の書き出しが完了してから置き換える。
+    APIへのリクエストは入出庫より低い優先度で送信する。
+
     Args:
         filename: 出力ファイル名（省略時は自動生成）
+        output: 書き込み先のファイルオブジェクト（標準出力など）。指定時は filename を無視する
+        concurrency: 同時に取得するページ数
 
     Returns:
         bool: 処理の成功/失敗
     """
-    inventories = get_zaico_inventories()
-    if inventories is None:
-        logger.error('在庫データ取得に失敗しました')
-        return False
+    pages = iter_inventory_pages(concurrency=concurrency)
 
-    # exe/py両対応の出力先ディレクトリ（../tmp）
-    output_dir = os.path.abspath(os.path.join(get_app_dir(), '../tmp'))
-    os.makedirs(output_dir, exist_ok=True)
+    if output is not None:
+        try:
+            write_inventories_csv(pages, output)
+            return True
+        except ZaicoAPIError:
+            logger.error('在庫データ取得に失敗しました')
+            return False
+        except requests.RequestException as e:
+            logger.error(f'在庫データ取得の通信エラー: {e}')
+            return False
+        except Exception as e:
+            logger.error(f'CSV書き込みエラー: {e}')
+            return False
 
     if filename is None:
         dstr = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = os.path.join(output_dir, f'inventory_export_{dstr}.csv')
+        filename = os.path.join(_output_dir(), f'inventory_export_{dstr}.csv')
+    set_output_path(filename)
 
+    tmp_filename = f'{filename}.part'
     try:
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(INVENTORY_CSV_COLUMNS)
-
-            for item in inventories:
-                writer.writerow([
-                    item.get('id', ''),
-                    item.get('title', ''),
-                    item.get('category', ''),
-                    item.get('place', ''),
-                    item.get('state', ''),
-                    item.get('quantity', ''),
-                    item.get('unit', ''),
-                    item.get('code', ''),
-                    item.get('etc', ''),
-                    item.get('updated_at', ''),
-                    item.get('created_at', ''),
-                    item.get('stocktake_attributes', {}).get('checked_at', ''),
-                    item.get('group_tag', ''),
-                    '',  # 仕入単価
-                    ''   # 納品単価
-                ])
-
-        print(f'{filename} を出力しました')
-        return True
+        with open(tmp_filename, 'w', newline='', encoding='utf-8') as f:
+            write_inventories_csv(pages, f)
+        os.replace(tmp_filename, filename)
+
+    except ZaicoAPIError:
+        logger.error('在庫データ取得に失敗しました')
+        _remove_quietly(tmp_filename)
+        return False
+
+    except requests.RequestException as e:
+        logger.error(f'在庫データ取得の通信エラー: {e}')
+        _remove_quietly(tmp_filename)
+        return False
 
     except Exception as e:
         logger.error(f'CSV書き込みエラー: {e}')
+        _remove_quietly(tmp_filename)
         return False
 
+    print(f'{filename} を出力しました')
+    return True
+
+
+def _output_dir() -> str:
+    """
+    exe/py両対応の出力先ディレクトリ（../tmp）を取得する（なければ作成する）
+
+    Returns:
+        str: 出力先ディレクトリのパス
+    """
+    output_dir = os.path.abspath(os.path.join(get_app_dir(), '../tmp'))
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+def _parse_updated_at(value: Any) -> Optional[datetime]:
+    """
+    在庫データの updated_at を日時に変換する
+
+    Args:
+        value: updated_at の値（ISO 8601形式）
+
+    Returns:
+        Optional[datetime]: 日時。解釈できない場合はNone
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+class _DeltaFilter:
+    """
+    前回エクスポート時の updated_at の最大値（ウォーターマーク）以降に更新された在庫を抽出する
+
+    ウォーターマークと同時刻の在庫も抽出する（同じ秒に更新された在庫の取りこぼしを防ぐため）。
+    updated_at を解釈できない在庫は常に抽出する。
+    """
+
+    def __init__(self, watermark: Optional[str]) -> None:
+        self.watermark = watermark
+        self._since = _parse_updated_at(watermark)
+        self.new_watermark = watermark
+        self._new_since = self._since
+        self.seen_ids: set = set()
+        self.total = 0
+        self.changed = 0
+
+    def _is_changed(self, item: Dict[str, Any]) -> bool:
+        updated_at = _parse_updated_at(item.get('updated_at'))
+        if updated_at is None:
+            return True
+        try:
+            if self._new_since is None or updated_at > self._new_since:
+                self._new_since = updated_at
+                self.new_watermark = item.get('updated_at')
+            return self._since is None or updated_at >= self._since
+        except TypeError:
+            # タイムゾーンの有無が混在している場合は比較できないため抽出する
+            return True
+
+    def filter(self, pages: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        ページごとに更新された在庫のみを返す
+
+        Args:
+            pages: 在庫一覧のページ
+
+        Yields:
+            List[Dict[str, Any]]: ページ内の更新された在庫
+        """
+        for page in pages:
+            self.total += len(page)
+            self.seen_ids.update(str(item.get('id', '')) for item in page)
+            changed = [item for item in page if self._is_changed(item)]
+            self.changed += len(changed)
+            yield changed
+
+
+def _state_target(snapshot_path: Optional[str]) -> str:
+    """
+    状態ファイルに記録する出力先（モード）を返す
+
+    Args:
+        snapshot_path: スナップショットCSVのパス（差分CSVを出力する場合はNone）
+
+    Returns:
+        str: 'delta'、またはスナップショットCSVの絶対パス
+    """
+    return 'delta' if snapshot_path is None else os.path.abspath(snapshot_path)
+
+
+def _default_state_path(snapshot_path: Optional[str]) -> str:
+    """
+    モード・出力先ごとの状態ファイルのパスを返す
+
+    差分CSVは ../tmp/inventory_delta_state.json、スナップショットはCSVと同じ場所の「CSV名.state.json」を使用する。
+
+    Args:
+        snapshot_path: スナップショットCSVのパス（差分CSVを出力する場合はNone）
+
+    Returns:
+        str: 状態ファイルのパス
+    """
+    if snapshot_path is None:
+        return os.path.join(_output_dir(), 'inventory_delta_state.json')
+    return f'{os.path.splitext(snapshot_path)[0]}.state.json'
+
+
+def _load_watermark(state_path: str, target: Optional[str] = None) -> Optional[str]:
+    """
+    前回エクスポート時のウォーターマークを読み込む
+
+    Args:
+        state_path: 状態ファイルのパス
+        target: 出力先（_state_target の値）。状態ファイルが別の出力先のものであれば使用しない
+
+    Returns:
+        Optional[str]: ウォーターマーク。初回（状態ファイルなし）・別の出力先の状態ファイルの場合はNone
+    """
+    try:
+        with open(state_path, encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    # 出力先を記録していない状態ファイルは以前の形式のため、そのまま使用する
+    if target is not None and state.get('target', target) != target:
+        logger.warning(f'状態ファイル {state_path} は別の出力先（{state.get("target")}）のものです。全件を出力します')
+        return None
+    return state.get('watermark')
+
+
+def _save_watermark(state_path: str, watermark: Optional[str], target: Optional[str] = None) -> None:
+    """
+    ウォーターマークを保存する
+
+    Args:
+        state_path: 状態ファイルのパス
+        watermark: ウォーターマーク
+        target: 出力先（_state_target の値）
+    """
+    tmp_path = f'{state_path}.part'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(
+            {'watermark': watermark, 'target': target, 'exported_at': datetime.now().isoformat()},
+            f, ensure_ascii=False
+        )
+    os.replace(tmp_path, state_path)
+
+
+def merge_into_snapshot(
+    pages: Iterable[List[Dict[str, Any]]],
+    snapshot_path: str,
+    keep_ids: Optional[Callable[[], set]] = None
+) -> int:
+    """
+    更新された在庫をスナップショットCSVに反映する
+
+    在庫IDが一致する行は置き換え、新しい在庫は末尾に追加する。
+    keep_ids を指定した場合は、その戻り値（在庫一覧に存在した在庫ID）に含まれない行を削除する。
+    一時ファイルに書き出してから置き換えるため、途中で失敗してもスナップショットは壊れない。
+
+    Args:
+        pages: 更新された在庫のページ
+        snapshot_path: スナップショットCSVのパス
+        keep_ids: 全ページ処理後に、残す在庫IDの集合を返す関数
+
+    Returns:
+        int: 反映後の行数
+    """
+    rows: Dict[str, List[Any]] = {}
+    if os.path.exists(snapshot_path):
+        with phase(PHASE_PARSE), open(snapshot_path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if row:
+                    rows[row[0]] = row
+
+    for page in pages:
+        for item in page:
+            row = _inventory_to_row(item)
+            rows[str(row[0])] = row
+
+    if keep_ids is not None:
+        ids = keep_ids()
+        rows = {inventory_id: row for inventory_id, row in rows.items() if inventory_id in ids}
+
+    tmp_path = f'{snapshot_path}.part'
+    with phase(PHASE_WRITE), open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(INVENTORY_CSV_COLUMNS)
+        writer.writerows(rows.values())
+    os.replace(tmp_path, snapshot_path)
+    return len(rows)
+
+
+@with_priority(PRIORITY_BULK)
+def export_inventories_delta(
+    filename: Optional[str] = None,
+    snapshot_path: Optional[str] = None,
+    state_path: Optional[str] = None,
+    concurrency: int = INVENTORY_FETCH_CONCURRENCY
+) -> bool:
+    """
+    前回のエクスポート以降に更新された在庫のみをエクスポートする
+
+    前回エクスポートした在庫の updated_at の最大値（ウォーターマーク）を状態ファイルに保存し、
+    次回はそれ以降に更新された在庫だけを差分CSVに書き出す。
+    snapshot_path を指定した場合は差分CSVの代わりに、スナップショットCSVに差分を反映する
+    （ZAICOから削除された在庫はスナップショットからも削除する）。
+    ウォーターマークは出力に成功した場合のみ更新する。
+    状態ファイルは差分CSV・スナップショットCSVごとに分け、別の出力先の状態ファイルは使用しない。
+    スナップショットCSVがない場合は全件を出力する。
+
+    Args:
+        filename: 差分CSVの出力ファイル名（省略時は自動生成）
+        snapshot_path: 差分を反映するスナップショットCSVのパス
+        state_path: 状態ファイルのパス（省略時はモード・出力先ごとの状態ファイル。_default_state_path を参照）
+        concurrency: 同時に取得するページ数
+
+    Returns:
+        bool: 処理の成功/失敗
+    """
+    state_target = _state_target(snapshot_path)
+    if state_path is None:
+        state_path = _default_state_path(snapshot_path)
+
+    try:
+        watermark = _load_watermark(state_path, state_target)
+    except (OSError, ValueError) as e:
+        logger.error(f'状態ファイルの読み込みエラー: {e}')
+        return False
+    if snapshot_path is not None and watermark is not None and not os.path.exists(snapshot_path):
+        # 差分だけを反映すると不完全なスナップショットになるため、全件を出力し直す
+        logger.warning(f'スナップショット {snapshot_path} がないため、全件を出力します')
+        watermark = None
+    delta = _DeltaFilter(watermark)
+
+    pages = delta.filter(iter_inventory_pages(concurrency=concurrency))
+
+    if snapshot_path is not None:
+        target = snapshot_path
+        set_output_path(snapshot_path)
+        try:
+            merge_into_snapshot(pages, snapshot_path, keep_ids=lambda: delta.seen_ids)
+        except ZaicoAPIError:
+            logger.error('在庫データ取得に失敗しました')
+            _remove_quietly(f'{snapshot_path}.part')
+            return False
+        except requests.RequestException as e:
+            logger.error(f'在庫データ取得の通信エラー: {e}')
+            _remove_quietly(f'{snapshot_path}.part')
+            return False
+        except Exception as e:
+            logger.error(f'CSV書き込みエラー: {e}')
+            _remove_quietly(f'{snapshot_path}.part')
+            return False
+    else:
+        if filename is None:
+            dstr = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = os.path.join(_output_dir(), f'inventory_delta_{dstr}.csv')
+        target = filename
+        set_output_path(filename)
+        tmp_filename = f'{filename}.part'
+        try:
+            with open(tmp_filename, 'w', newline='', encoding='utf-8') as f:
+                write_inventories_csv(pages, f)
+            os.replace(tmp_filename, filename)
+        except ZaicoAPIError:
+            logger.error('在庫データ取得に失敗しました')
+            _remove_quietly(tmp_filename)
+            return False
+        except requests.RequestException as e:
+            logger.error(f'在庫データ取得の通信エラー: {e}')
+            _remove_quietly(tmp_filename)
+            return False
+        except Exception as e:
+            logger.error(f'CSV書き込みエラー: {e}')
+            _remove_quietly(tmp_filename)
+            return False
+
+    try:
+        _save_watermark(state_path, delta.new_watermark, state_target)
+    except OSError as e:
+        logger.error(f'状態ファイルの書き込みエラー: {e}')
+        return False
+
+    print(f'{target} に更新された在庫{delta.changed}件（全{delta.total}件中）を出力しました')
+    return True
+
+
+def _remove_quietly(path: str) -> None:
+    """
+    ファイルが存在すれば削除する（削除できなくてもエラーにしない）
+
+    Args:
+        path: 削除するファイルのパス
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 
 def main() -> None:
     """
     CSVエクスポートのエントリーポイント
+
+    -o - を指定すると標準出力に書き出し、後続の処理へパイプで渡せる。
+    --delta / --snapshot を指定すると前回以降に更新された在庫のみを出力する。
     """
-    export_inventories_to_csv()
+    parser = argparse.ArgumentParser(description='ZAICOの在庫データをCSVファイルにエクスポートします')
+    parser.add_argument(
+        '-o', '--output',
+        help="出力ファイル名（省略時は ../tmp に自動生成）。'-' を指定すると標準出力に書き出す"
+    )
+    parser.add_argument(
+        '--delta', action='store_true',
+        help='前回のエクスポート以降に更新された在庫のみを出力する'
+    )
+    parser.add_argument(
+        '--snapshot',
+        help='差分を反映するスナップショットCSV（指定時は --delta として動作する）'
+    )
+    parser.add_argument(
+        '--state',
+        help='差分エクスポートの状態ファイル（省略時は --delta: ../tmp/inventory_delta_state.json、'
+             '--snapshot: スナップショットCSVと同じ場所の「CSV名.state.json」）'
+    )
+    args = parser.parse_args()
+
+    if args.delta or args.snapshot:
+        if args.output == '-':
+            parser.error('差分エクスポートでは標準出力を指定できません')
+        ok = export_inventories_delta(args.output, args.snapshot, args.state)
+    elif args.output == '-':
+        # csvモジュールが改行を制御するため、標準出力側の改行変換を無効にする
+        sys.stdout.reconfigure(encoding='utf-8', newline='')
+        ok = export_inventories_to_csv(output=sys.stdout)
+    else:
+        ok = export_inventories_to_csv(args.output)
 
+    if not ok:
+        sys.exit(1)
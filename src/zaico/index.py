@@ -0,0 +1,308 @@
+"""
+在庫インデックスモジュール
+
+商品名・バーコードから在庫データを引けるローカルインデックス（SQLite）を提供します。
+入出庫のたびに商品名で在庫を検索するAPI呼び出しを省略するために使用します。
+インデックスは在庫IDの解決にのみ使用し、数量は更新の直前にAPIから取得します。
+
+インデックスは設定 INDEX_PATH（環境変数 ZAICO_INDEX_PATH）を指定した場合のみ有効になります。
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+import logging
+from typing import Optional, List, Dict, Any, Iterable
+
+from .api import ZaicoAPIError, iter_inventory_pages
+from .config import INDEX_PATH, INDEX_TTL, INVENTORY_FETCH_CONCURRENCY, setup_logging
+from .ratelimit import PRIORITY_BULK, request_priority
+
+
+# ロガーの設定
+logger = setup_logging()
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS inventories (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    code TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS inventories_title ON inventories (title);
+CREATE INDEX IF NOT EXISTS inventories_code ON inventories (code);
+'''
+
+
+class InventoryIndex:
+    """
+    在庫データのローカルインデックス
+
+    在庫ID・商品名・バーコード（code）・更新日時と在庫データ全体を保持する。
+    最後にAPIと同期してから ttl 秒を過ぎたデータは期限切れとして扱い、検索結果に含めない。
+    スレッド間で共有して使用できる。
+    """
+
+    def __init__(self, path: str, ttl: float = INDEX_TTL) -> None:
+        """
+        Args:
+            path: SQLiteファイルのパス（':memory:' でメモリ上に作成）
+            ttl: データの有効期間（秒）
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """
+        データベースを閉じる
+        """
+        with self._lock:
+            self._conn.close()
+
+    def _lookup(self, column: str, value: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT data FROM inventories WHERE {column} = ? AND synced_at >= ? ORDER BY id LIMIT 1',
+                (value, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def lookup_title(self, title: str) -> Optional[Dict[str, Any]]:
+        """
+        商品名で在庫データを検索する
+
+        同名の在庫が複数ある場合は在庫IDが最小のものを返す。
+
+        Args:
+            title: 商品名
+
+        Returns:
+            Optional[Dict[str, Any]]: 在庫データ。見つからない・期限切れの場合はNone
+        """
+        return self._lookup('title', title)
+
+    def lookup_code(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        QRコード・バーコードの値で在庫データを検索する
+
+        Args:
+            code: QRコード・バーコードの値
+
+        Returns:
+            Optional[Dict[str, Any]]: 在庫データ。見つからない・期限切れの場合はNone
+        """
+        return self._lookup('code', code)
+
+    def store(self, items: Iterable[Dict[str, Any]], synced: bool = True) -> int:
+        """
+        在庫データを登録・更新する
+
+        Args:
+            items: 在庫データ
+            synced: APIから取得したデータの場合True。False（自身の更新結果など）の場合は
+                同期日時を変更しないため、有効期間は最後にAPIと同期した時点から数える
+
+        Returns:
+            int: 登録・更新した件数
+        """
+        # 同期していないデータを新たに登録する場合は、期限切れ（同期日時0）として登録する
+        now = time.time() if synced else 0.0
+        rows = [
+            (item['id'], item.get('title') or '', item.get('code') or None,
+             item.get('updated_at'), json.dumps(item, ensure_ascii=False), now)
+            for item in items if 'id' in item
+        ]
+        if synced:
+            sql = ('INSERT OR REPLACE INTO inventories (id, title, code, updated_at, data, synced_at) '
+                   'VALUES (?, ?, ?, ?, ?, ?)')
+        else:
+            sql = ('INSERT INTO inventories (id, title, code, updated_at, data, synced_at) VALUES (?, ?, ?, ?, ?, ?) '
+                   'ON CONFLICT (id) DO UPDATE SET title = excluded.title, code = excluded.code, '
+                   'updated_at = excluded.updated_at, data = excluded.data')
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+        return len(rows)
+
+    def forget(self, inventory_id: int) -> None:
+        """
+        在庫データをインデックスから削除する
+
+        Args:
+            inventory_id: 在庫ID
+        """
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM inventories WHERE id = ?', (inventory_id,))
+
+    def refresh(self, pages: Iterable[List[Dict[str, Any]]]) -> Dict[str, int]:
+        """
+        在庫一覧とインデックスを同期する
+
+        updated_at が変わった在庫のみデータを書き換え、変わっていない在庫は同期日時だけを更新する。
+        一覧に存在しなくなった在庫はインデックスから削除する。
+
+        Args:
+            pages: 在庫一覧のページ（iter_inventory_pages の戻り値など）
+
+        Returns:
+            Dict[str, int]: 'changed'（追加・更新）, 'unchanged', 'removed' の件数
+        """
+        started_at = time.time()
+        with self._lock:
+            known = dict(self._conn.execute('SELECT id, updated_at FROM inventories'))
+
+        changed = unchanged = 0
+        for page in pages:
+            stale: List[Dict[str, Any]] = []
+            fresh_ids: List[int] = []
+            for item in page:
+                if 'id' not in item:
+                    continue
+                if item['id'] in known and known[item['id']] == item.get('updated_at'):
+                    fresh_ids.append(item['id'])
+                else:
+                    stale.append(item)
+
+            self.store(stale)
+            now = time.time()
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    'UPDATE inventories SET synced_at = ? WHERE id = ?',
+                    [(now, inventory_id) for inventory_id in fresh_ids]
+                )
+            changed += len(stale)
+            unchanged += len(fresh_ids)
+
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                'DELETE FROM inventories WHERE synced_at < ?', (started_at,)
+            ).rowcount
+        return {'changed': changed, 'unchanged': unchanged, 'removed': removed}
+
+    def evict_expired(self) -> int:
+        """
+        有効期間を過ぎたデータを削除する
+
+        Returns:
+            int: 削除した件数
+        """
+        with self._lock, self._conn:
+            return self._conn.execute(
+                'DELETE FROM inventories WHERE synced_at < ?', (time.time() - self.ttl,)
+            ).rowcount
+
+
+_index: Optional[InventoryIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[InventoryIndex]:
+    """
+    プロセス内で共有するインデックスを取得する
+
+    Returns:
+        Optional[InventoryIndex]: インデックス。INDEX_PATH が未設定の場合はNone
+    """
+    global _index
+    if _index is None and INDEX_PATH:
+        with _index_lock:
+            if _index is None:
+                _index = InventoryIndex(INDEX_PATH)
+    return _index
+
+
+def set_index(index: Optional[InventoryIndex]) -> None:
+    """
+    共有インデックスを差し替える
+
+    Args:
+        index: 新しいインデックス（Noneで無効化）
+    """
+    global _index
+    with _index_lock:
+        _index = index
+
+
+def find_cached_inventory(title: str) -> Optional[Dict[str, Any]]:
+    """
+    インデックスから商品名で在庫データを検索する
+
+    Args:
+        title: 商品名
+
+    Returns:
+        Optional[Dict[str, Any]]: 在庫データ。インデックスが無効・未登録・期限切れの場合はNone
+    """
+    index = get_index()
+    if index is None:
+        return None
+    try:
+        return index.lookup_title(title)
+    except sqlite3.Error as e:
+        logger.error(f'インデックスの検索に失敗: {e}')
+        return None
+
+
+def remember_inventory(item: Optional[Dict[str, Any]], synced: bool = True) -> None:
+    """
+    在庫データをインデックスに反映する
+
+    Args:
+        item: 在庫データ
+        synced: APIから取得したデータの場合True。自身の更新結果の場合はFalse（同期日時を変更しない）
+    """
+    index = get_index()
+    if index is None or not item:
+        return
+    try:
+        index.store([item], synced)
+    except sqlite3.Error as e:
+        logger.error(f'インデックスの更新に失敗: {e}')
+
+
+def forget_inventory(inventory_id: int) -> None:
+    """
+    更新に失敗した在庫をインデックスから削除し、次回はAPIから取得させる
+
+    Args:
+        inventory_id: 在庫ID
+    """
+    index = get_index()
+    if index is None:
+        return
+    try:
+        index.forget(inventory_id)
+    except sqlite3.Error as e:
+        logger.error(f'インデックスの更新に失敗: {e}')
+
+
+def main() -> None:
+    """
+    インデックス同期のエントリーポイント
+    """
+    parser = argparse.ArgumentParser(description='ZAICOの在庫一覧を取得し、ローカルの在庫インデックスを同期します')
+    parser.add_argument('--path', default=INDEX_PATH, help='インデックスファイル（省略時は環境変数 ZAICO_INDEX_PATH）')
+    args = parser.parse_args()
+
+    if not args.path:
+        print('インデックスファイルを --path または環境変数 ZAICO_INDEX_PATH で指定してください')
+        sys.exit(1)
+
+    index = InventoryIndex(args.path)
+    try:
+        with request_priority(PRIORITY_BULK):
+            counts = index.refresh(iter_inventory_pages(concurrency=INVENTORY_FETCH_CONCURRENCY))
+    except ZaicoAPIError:
+        print('在庫データの取得に失敗しました')
+        sys.exit(1)
+    finally:
+        index.close()
+
+    print(f'インデックスを同期しました（更新: {counts["changed"]}件、変更なし: {counts["unchanged"]}件、削除: {counts["removed"]}件）')
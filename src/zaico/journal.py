@@ -0,0 +1,477 @@
+"""
+入出庫ジャーナルモジュール
+
+入出庫をローカルのファイル（JSONL、追記のみ）に記録してから、バックグラウンドでZAICOに反映する機能を提供します。
+記録はディスクへの書き込み（fsync）が終わった時点で完了とするため、入出庫の受け付けが通信を待たず、
+反映に失敗した入出庫や反映前に終了した入出庫も失われません（次回の起動時に反映し直します）。
+
+ジャーナルの各行は次のいずれかです。
+
+- {"type": "movement", "id": ..., "title": 商品名, "delta": 増減数, "created_at": ...}  入出庫の記録
+- {"type": "applied", "ids": [...], "new_quantity": ...}  反映済み
+- {"type": "failed", "ids": [...], "message": ...}  再試行しても反映できなかった（または反映を確認できなかった）入出庫
+- {"type": "requeued", "ids": [...]}  反映できなかった入出庫を新しい入出庫として記録し直した
+
+反映は「少なくとも1回」です。数量の更新後、反映済みを記録する前に終了した場合は、
+次回の起動時に同じ入出庫をもう一度反映します。
+常駐サービスとジャーナル反映（zaico_journal.py）が同時に反映しても二重に反映しないよう、
+反映はロックファイル（path + '.drain.lock'）で排他制御します。
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Callable, Iterator, NamedTuple
+
+from .config import (
+    JOURNAL_BACKOFF_MAX,
+    JOURNAL_BATCH_SIZE,
+    JOURNAL_INTERVAL,
+    JOURNAL_MAX_ATTEMPTS,
+    JOURNAL_PATH,
+    setup_logging
+)
+from .ratelimit import _lock_file
+
+if TYPE_CHECKING:
+    from .movements import MovementResult
+
+
+# ロガーの設定
+logger = setup_logging()
+
+# 入出庫を対象外にする記録の種類
+_CLOSED_TYPES = ('applied', 'requeued')
+
+
+class JournalEntry(NamedTuple):
+    """ジャーナルに記録した入出庫"""
+    id: str
+    title: str
+    delta: float
+    created_at: str
+
+
+class JournalState(NamedTuple):
+    """ジャーナルの状態"""
+    pending: List[JournalEntry]          # 未反映の入出庫（記録順）
+    failed: List[JournalEntry]           # 反映できなかった入出庫
+    failures: Dict[str, str]             # 反映できなかった入出庫のIDごとのエラーメッセージ
+
+
+class MovementJournal:
+    """
+    追記のみの入出庫ジャーナル
+
+    複数のプロセス（入庫・出庫CLIと常駐サービスなど）から同時に使用できるよう、
+    書き込み・圧縮はロックファイル（path + '.lock'）で、
+    未反映の入出庫の反映は別のロックファイル（path + '.drain.lock'）で排他制御する。
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: ジャーナルファイルのパス
+        """
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.drain_lock_path = path + '.drain.lock'
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 存在しなければ作成する（既存の記録は消さない）
+        open(self.lock_path, 'a', encoding='utf-8').close()
+        open(self.drain_lock_path, 'a', encoding='utf-8').close()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock, open(self.lock_path, 'r+', encoding='utf-8') as f, _lock_file(f):
+            yield
+
+    @contextmanager
+    def draining(self) -> Iterator[None]:
+        """
+        未反映の入出庫の反映を排他制御する
+
+        未反映の入出庫の読み込みから反映済みの記録までをこのブロック内で行うと、
+        他のプロセス・スレッドが同じ入出庫を二重に反映しない（入出庫の記録は妨げない）。
+        """
+        with self._drain_lock, open(self.drain_lock_path, 'r+', encoding='utf-8') as f, _lock_file(f):
+            yield
+
+    def _ends_with_partial_line(self) -> bool:
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b'\n'
+        except OSError:
+            return False
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        with self._locked(), open(self.path, 'a', encoding='utf-8') as f:
+            # 書き込み途中で終了した行があれば、続けて書かないよう改行する
+            if self._ends_with_partial_line():
+                data = '\n' + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, title: str, delta: float) -> JournalEntry:
+        """
+        入出庫を記録する（ディスクへの書き込みが終わるまで戻らない）
+
+        Args:
+            title: 商品名
+            delta: 増減数（入庫は正、出庫は負）
+
+        Returns:
+            JournalEntry: 記録した入出庫
+        """
+        entry = JournalEntry(uuid.uuid4().hex, title, float(delta), datetime.now().isoformat(timespec='seconds'))
+        self._write([{'type': 'movement', **entry._asdict()}])
+        return entry
+
+    def mark_applied(self, ids: List[str], new_quantity: Optional[int] = None) -> None:
+        """
+        入出庫を反映済みとして記録する
+
+        Args:
+            ids: 入出庫のID
+            new_quantity: 反映後の数量
+        """
+        self._write([{'type': 'applied', 'ids': ids, 'new_quantity': new_quantity}])
+
+    def mark_failed(self, ids: List[str], message: str) -> None:
+        """
+        入出庫を反映できなかったものとして記録する
+
+        Args:
+            ids: 入出庫のID
+            message: エラーメッセージ
+        """
+        self._write([{'type': 'failed', 'ids': ids, 'message': message}])
+
+    def _read_records(self) -> List[Dict[str, Any]]:
+        records = []
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line_no, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # 書き込み途中で終了した行は無視する
+                        logger.error(f'ジャーナルの {line_no} 行目を読み込めません: {self.path}')
+        except FileNotFoundError:
+            pass
+        return records
+
+    def state(self) -> JournalState:
+        """
+        ジャーナルを読み込み、未反映・反映できなかった入出庫を返す
+
+        Returns:
+            JournalState: ジャーナルの状態
+        """
+        with self._locked():
+            records = self._read_records()
+
+        movements: Dict[str, JournalEntry] = {}
+        applied = set()
+        failures: Dict[str, str] = {}
+        for record in records:
+            if record.get('type') == 'movement':
+                movements[record['id']] = JournalEntry(
+                    record['id'], record['title'], float(record['delta']), record.get('created_at', '')
+                )
+            elif record.get('type') in _CLOSED_TYPES:
+                applied.update(record['ids'])
+            elif record.get('type') == 'failed':
+                failures.update((entry_id, record.get('message', '')) for entry_id in record['ids'])
+
+        pending = [entry for entry in movements.values() if entry.id not in applied and entry.id not in failures]
+        failed = [entry for entry in movements.values() if entry.id in failures and entry.id not in applied]
+        return JournalState(pending, failed, {entry.id: failures[entry.id] for entry in failed})
+
+    def pending(self) -> List[JournalEntry]:
+        """
+        未反映の入出庫を記録順に返す
+
+        Returns:
+            List[JournalEntry]: 未反映の入出庫
+        """
+        return self.state().pending
+
+    def requeue_failed(self) -> int:
+        """
+        反映できなかった入出庫を新しい入出庫として記録し直す
+
+        Returns:
+            int: 記録し直した件数
+        """
+        failed = self.state().failed
+        if not failed:
+            return 0
+        now = datetime.now().isoformat(timespec='seconds')
+        requeued = [JournalEntry(uuid.uuid4().hex, entry.title, entry.delta, now) for entry in failed]
+        self._write(
+            [{'type': 'movement', **entry._asdict()} for entry in requeued]
+            + [{'type': 'requeued', 'ids': [entry.id for entry in failed]}]
+        )
+        return len(requeued)
+
+    def compact(self) -> None:
+        """
+        反映済みの入出庫をジャーナルから削除する
+
+        未反映の入出庫と反映できなかった入出庫（とそのエラー）だけを残して書き直す。
+        """
+        with self._locked():
+            records = self._read_records()
+            applied = set()
+            for record in records:
+                if record.get('type') in _CLOSED_TYPES:
+                    applied.update(record['ids'])
+            kept = [
+                record for record in records
+                if record.get('type') == 'movement' and record['id'] not in applied
+            ]
+            kept_ids = {record['id'] for record in kept}
+            for record in records:
+                if record.get('type') == 'failed':
+                    ids = [entry_id for entry_id in record['ids'] if entry_id in kept_ids]
+                    if ids:
+                        kept.append({**record, 'ids': ids})
+            if len(kept) == len(records):
+                return
+
+            part_path = self.path + '.part'
+            with open(part_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(record, ensure_ascii=False) + '\n' for record in kept)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(part_path, self.path)
+
+
+class JournalApplier:
+    """
+    ジャーナルの未反映の入出庫をまとめてZAICOに反映するバックグラウンド処理
+
+    未反映の入出庫を最大 batch_size 件ずつ読み込み、同一商品の増減を合算して apply に渡す。
+    読み込みから反映済みの記録までは MovementJournal.draining() で排他制御し、
+    他のプロセスが同じジャーナルを反映している間は、その反映が終わるまで待つ。
+    通信エラー・429/5xx など一時的な失敗では入出庫を残したまま、間隔を interval から倍増させて
+    （最大 backoff_max 秒）再試行し続ける（ZAICOの障害が長引いても入出庫を失わない）。
+    商品が見つからない・4xx など再試行しても成功しない失敗が max_attempts 回続いた入出庫だけを、
+    反映できなかったものとして記録する。
+    """
+
+    def __init__(
+        self,
+        journal: MovementJournal,
+        apply: Callable[[Dict[str, float]], Optional[List['MovementResult']]],
+        interval: float = JOURNAL_INTERVAL,
+        batch_size: int = JOURNAL_BATCH_SIZE,
+        max_attempts: int = JOURNAL_MAX_ATTEMPTS,
+        backoff_max: float = JOURNAL_BACKOFF_MAX
+    ) -> None:
+        """
+        Args:
+            journal: ジャーナル
+            apply: 商品名ごとの増減数を受け取り、商品ごとの処理結果（エラー時はNone）を返す関数
+                   （zaico.movements.apply_movements など）
+            interval: 未反映の入出庫を確認する間隔（秒）
+            batch_size: 1回にまとめて反映する入出庫の最大件数
+            max_attempts: 商品ごとの反映に再試行しても成功しない失敗をした場合に再試行する回数
+            backoff_max: 一時的な失敗が続く場合の再試行間隔の上限（秒）
+        """
+        self.journal = journal
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_max = backoff_max
+        self._apply = apply
+        self._attempts: Dict[str, int] = {}
+        # 一時的な失敗が連続した回数（再試行間隔の計算に使う）
+        self._transient_failures = 0
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def drain_once(self) -> Dict[str, int]:
+        """
+        未反映の入出庫を1回分（最大 batch_size 件）反映する
+
+        Returns:
+            Dict[str, int]: 'applied'（反映した入出庫）, 'retry'（再試行する入出庫）,
+            'failed'（反映できなかった入出庫）, 'pending'（今回の対象外で残っている入出庫）の件数
+        """
+        with self.journal.draining():
+            return self._drain_batch()
+
+    def _drain_batch(self) -> Dict[str, int]:
+        pending = self.journal.pending()
+        batch = pending[:self.batch_size]
+        counts = {'applied': 0, 'retry': 0, 'failed': 0, 'pending': len(pending) - len(batch)}
+        if not batch:
+            return counts
+
+        ids_by_title: Dict[str, List[str]] = {}
+        deltas: Dict[str, float] = {}
+        for entry in batch:
+            ids_by_title.setdefault(entry.title, []).append(entry.id)
+            deltas[entry.title] = deltas.get(entry.title, 0.0) + entry.delta
+
+        results = self._apply(deltas)
+        if results is None:
+            logger.error(f'在庫データの取得に失敗しました。{len(batch)}件の入出庫を次回再試行します')
+            counts['retry'] = len(batch)
+            self._transient_failures += 1
+            return counts
+
+        transient = False
+        for result in results:
+            ids = ids_by_title[result.title]
+            if result.ok:
+                self.journal.mark_applied(ids, result.new_quantity)
+                for entry_id in ids:
+                    self._attempts.pop(entry_id, None)
+                counts['applied'] += len(ids)
+                continue
+
+            if result.retryable:
+                # 一時的な失敗は再試行の回数に数えない
+                transient = True
+                counts['retry'] += len(ids)
+                continue
+
+            # 数量を書き込んだ後の確認で失敗した場合は、再試行すると二重に反映するおそれがある
+            written = result.new_quantity is not None
+            attempts = max(self._attempts.get(entry_id, 0) for entry_id in ids) + 1
+            if written or attempts >= self.max_attempts:
+                logger.error(f'入出庫を反映できませんでした: {result.title} ({result.delta:+g}) [{result.message}]')
+                self.journal.mark_failed(ids, result.message)
+                for entry_id in ids:
+                    self._attempts.pop(entry_id, None)
+                counts['failed'] += len(ids)
+            else:
+                for entry_id in ids:
+                    self._attempts[entry_id] = attempts
+                counts['retry'] += len(ids)
+
+        self._transient_failures = self._transient_failures + 1 if transient else 0
+        if counts['applied'] or counts['failed']:
+            self.journal.compact()
+        return counts
+
+    def retry_delay(self) -> float:
+        """
+        次に確認するまでの間隔を返す
+
+        Returns:
+            float: 一時的な失敗が続いている間は interval から倍増させた間隔（最大 backoff_max 秒）、
+            それ以外は interval
+        """
+        if not self._transient_failures:
+            return self.interval
+        return min(self.backoff_max, self.interval * 2 ** min(self._transient_failures, 30))
+
+    def drain(self) -> Dict[str, int]:
+        """
+        未反映の入出庫がなくなるまで（または再試行待ちだけになるまで）反映する
+
+        Returns:
+            Dict[str, int]: 'applied', 'retry', 'failed' の合計件数
+        """
+        totals = {'applied': 0, 'retry': 0, 'failed': 0}
+        while True:
+            counts = self.drain_once()
+            for key in totals:
+                totals[key] += counts[key]
+            if not counts['pending'] or counts['retry']:
+                return totals
+
+    def notify(self) -> None:
+        """
+        次の確認を待たずに反映を開始させる
+        """
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f'ジャーナルの反映に失敗: {e}')
+            # 他のプロセスが記録した入出庫・再試行する入出庫は interval 秒ごと
+            # （一時的な失敗が続いている間は retry_delay() 秒ごと）に確認する
+            self._wakeup.wait(self.retry_delay())
+            self._wakeup.clear()
+
+    def start(self) -> 'JournalApplier':
+        """
+        バックグラウンドのスレッドで反映を開始する（開始時に未反映の入出庫を反映し直す）
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        反映を停止する（処理中のバッチが終わるまで待つ）
+        """
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main() -> None:
+    """
+    ジャーナル反映のエントリーポイント
+    """
+    parser = argparse.ArgumentParser(description='入出庫ジャーナルの未反映の入出庫をZAICOに反映します')
+    parser.add_argument('--path', default=JOURNAL_PATH, help='ジャーナルファイル（省略時は環境変数 ZAICO_JOURNAL_PATH）')
+    parser.add_argument('--status', action='store_true', help='反映せずに未反映・反映できなかった入出庫を表示する')
+    parser.add_argument('--retry-failed', action='store_true', help='反映できなかった入出庫を記録し直してから反映する')
+    args = parser.parse_args()
+
+    if not args.path:
+        print('ジャーナルファイルを --path または環境変数 ZAICO_JOURNAL_PATH で指定してください')
+        sys.exit(1)
+
+    journal = MovementJournal(args.path)
+    if args.status:
+        state = journal.state()
+        for entry in state.pending:
+            print(f'未反映: {entry.created_at} {entry.title} ({entry.delta:+g})')
+        for entry in state.failed:
+            print(f'反映できなかった入出庫: {entry.created_at} {entry.title} ({entry.delta:+g}) [{state.failures[entry.id]}]')
+        print(f'未反映: {len(state.pending)}件、反映できなかった入出庫: {len(state.failed)}件')
+        return
+
+    if args.retry_failed:
+        print(f'{journal.requeue_failed()}件の入出庫を記録し直しました')
+
+    # requests などの読み込みは反映する場合のみ行う
+    from .movements import apply_movements
+
+    applier = JournalApplier(journal, apply_movements)
+    started = time.perf_counter()
+    totals = applier.drain()
+    print(
+        f'ジャーナルを反映しました（反映: {totals["applied"]}件、再試行待ち: {totals["retry"]}件、'
+        f'反映できなかった入出庫: {totals["failed"]}件、{time.perf_counter() - started:.1f}秒）'
+    )
+    if totals['retry'] or totals['failed']:
+        sys.exit(1)
@@ -0,0 +1,412 @@
+"""
+APIメトリクスモジュール
+
+ZAICO APIへのリクエストをエンドポイントごとに集計し、どこに時間がかかっているかを確認する機能を提供します。
+
+- 呼び出し回数・ステータスコード別の件数・再試行回数（再試行の原因になったステータスコード別の件数を含む）
+- 送受信したバイト数
+- 所要時間（再試行・バックオフを含む）の分布と p50/p95/p99、レート制限による待機時間
+
+集計結果は次の方法で確認できます。
+
+- get_metrics().snapshot(): プロセス内で参照する
+- 定期的な要約の出力（METRICS_INTERVAL 秒ごと）
+- Prometheus の textfile collector 形式のファイル出力（METRICS_TEXTFILE）
+
+共有クライアントの生成時に start_reporting() が呼ばれ、設定に応じて要約・ファイル出力を開始します。
+"""
+import atexit
+import bisect
+import math
+import os
+import re
+import sys
+import threading
+from collections import deque
+from typing import Optional, List, Dict, Any, Deque, IO, Union
+from urllib.parse import urlsplit
+
+from .config import METRICS_INTERVAL, METRICS_LATENCY_BUCKETS, METRICS_SAMPLE_SIZE, METRICS_TEXTFILE
+
+
+# パス中の在庫IDなどの数値（エンドポイントごとに集計するため {id} に置き換える）
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+# 通信エラーで応答がなかった場合のステータス
+STATUS_ERROR = 'error'
+
+
+def endpoint_for(url: str) -> str:
+    """
+    URLを集計単位のエンドポイント（クエリを除き、数値のパス要素を {id} にしたパス）に変換する
+
+    Args:
+        url: リクエスト先のURLまたはパス
+
+    Returns:
+        str: エンドポイント（例: '/api/v1/inventories/{id}'）
+    """
+    return _ID_SEGMENT.sub('/{id}', urlsplit(url).path) or '/'
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    昇順に並んだ値から百分位数を求める（最近傍法）
+
+    Args:
+        sorted_values: 昇順に並んだ値
+        q: 百分位（0〜100）
+
+    Returns:
+        float: 百分位数（値がない場合は0）
+    """
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+class EndpointStats:
+    """1エンドポイント（メソッド + パス）の集計"""
+
+    def __init__(self, buckets: List[float], sample_size: int) -> None:
+        self.count = 0
+        self.statuses: Dict[str, int] = {}
+        self.retries = 0
+        # 再試行した試行のステータス（429/5xx、通信エラー）
+        self.retry_statuses: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.wait_sum = 0.0
+        self.bucket_counts = [0] * len(buckets)
+        # 百分位数の計算に使う直近の所要時間
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+
+class MetricsRegistry:
+    """
+    APIリクエストのメトリクスを保持する
+
+    スレッド間で共有して使用できる。
+    """
+
+    def __init__(
+        self,
+        buckets: List[float] = METRICS_LATENCY_BUCKETS,
+        sample_size: int = METRICS_SAMPLE_SIZE
+    ) -> None:
+        """
+        Args:
+            buckets: 所要時間のヒストグラムの上限値（秒、昇順）
+            sample_size: 百分位数の計算に使う直近の件数（エンドポイントごと）
+        """
+        self.buckets = sorted(buckets)
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._stats: Dict[tuple, EndpointStats] = {}
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        status: Union[int, str],
+        latency: float,
+        retries: int = 0,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+        wait: float = 0.0
+    ) -> None:
+        """
+        1回のリクエスト（再試行を含む）を記録する
+
+        Args:
+            method: HTTPメソッド
+            url: リクエスト先のURLまたはパス
+            status: 最終的なステータスコード（通信エラーの場合は STATUS_ERROR）
+            latency: 所要時間（秒、再試行・バックオフ・レート制限の待機を含む）
+            retries: 再試行した回数
+            bytes_sent: 送信したボディのバイト数
+            bytes_received: 受信したボディのバイト数
+            wait: レート制限で待機した時間（秒）
+        """
+        key = (method.upper(), endpoint_for(url))
+        bucket = bisect.bisect_left(self.buckets, latency)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = EndpointStats(self.buckets, self.sample_size)
+            stats.count += 1
+            stats.statuses[str(status)] = stats.statuses.get(str(status), 0) + 1
+            stats.retries += retries
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.latency_sum += latency
+            stats.wait_sum += wait
+            if bucket < len(stats.bucket_counts):
+                stats.bucket_counts[bucket] += 1
+            stats.samples.append(latency)
+
+    def record_retry(self, method: str, url: str, status: Union[int, str]) -> None:
+        """
+        再試行することになった1回の試行のステータスを記録する
+
+        record() には最終的なステータスだけを記録するため、再試行した 429/5xx 応答・通信エラーはこちらに記録する。
+
+        Args:
+            method: HTTPメソッド
+            url: リクエスト先のURLまたはパス
+            status: 試行のステータスコード（通信エラーの場合は STATUS_ERROR）
+        """
+        key = (method.upper(), endpoint_for(url))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = EndpointStats(self.buckets, self.sample_size)
+            stats.retry_statuses[str(status)] = stats.retry_statuses.get(str(status), 0) + 1
+
+    def reset(self) -> None:
+        """
+        集計をすべて消去する
+        """
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        現在の集計を返す
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 'GET /api/v1/inventories' 形式のキーごとの集計
+            （count, statuses, retries, retry_statuses（再試行した試行のステータス別の件数）,
+            bytes_sent, bytes_received, latency_sum, wait_sum, p50, p95, p99, buckets（上限値ごとの累積件数））
+        """
+        with self._lock:
+            items = [
+                (key, stats.count, dict(stats.statuses), stats.retries, dict(stats.retry_statuses), stats.bytes_sent,
+                 stats.bytes_received, stats.latency_sum, stats.wait_sum, list(stats.bucket_counts), sorted(stats.samples))
+                for key, stats in sorted(self._stats.items())
+            ]
+
+        result = {}
+        for (
+            (method, endpoint), count, statuses, retries, retry_statuses, sent, received, latency_sum, wait_sum, counts, samples
+        ) in items:
+            cumulative = 0
+            buckets = {}
+            for upper, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                buckets[upper] = cumulative
+            result[f'{method} {endpoint}'] = {
+                'method': method,
+                'endpoint': endpoint,
+                'count': count,
+                'statuses': statuses,
+                'retries': retries,
+                'retry_statuses': retry_statuses,
+                'bytes_sent': sent,
+                'bytes_received': received,
+                'latency_sum': latency_sum,
+                'wait_sum': wait_sum,
+                'p50': percentile(samples, 50),
+                'p95': percentile(samples, 95),
+                'p99': percentile(samples, 99),
+                'buckets': buckets,
+            }
+        return result
+
+    def summary(self) -> str:
+        """
+        集計の要約を1行で返す
+
+        Returns:
+            str: 要約（リクエストがない場合は空文字）
+        """
+        parts = []
+        for name, stats in self.snapshot().items():
+            statuses = ', '.join(f'{status}:{count}' for status, count in sorted(stats['statuses'].items()))
+            retries = f'再試行{stats["retries"]}回'
+            if stats['retry_statuses']:
+                retry_statuses = ', '.join(f'{status}:{count}' for status, count in sorted(stats['retry_statuses'].items()))
+                retries += f' ({retry_statuses})'
+            parts.append(
+                f'{name} {stats["count"]}件 ({statuses}) {retries} '
+                f'送信{_format_bytes(stats["bytes_sent"])} 受信{_format_bytes(stats["bytes_received"])} '
+                f'p50={stats["p50"]:.3f}s p95={stats["p95"]:.3f}s p99={stats["p99"]:.3f}s '
+                f'合計{stats["latency_sum"]:.1f}s（待機{stats["wait_sum"]:.1f}s）'
+            )
+        return ' | '.join(parts)
+
+    def to_prometheus(self) -> str:
+        """
+        集計を Prometheus のテキスト形式に変換する
+
+        Returns:
+            str: テキスト形式のメトリクス
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str) -> None:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def labels(stats: Dict[str, Any], **extra: str) -> str:
+            pairs = {'method': stats['method'], 'endpoint': stats['endpoint'], **extra}
+            return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in pairs.items()) + '}'
+
+        metric('zaico_api_requests_total', 'counter', 'ZAICO API requests by final status.')
+        for stats in snapshot.values():
+            for status, count in sorted(stats['statuses'].items()):
+                lines.append(f'zaico_api_requests_total{labels(stats, status=status)} {count}')
+
+        metric('zaico_api_retried_responses_total', 'counter', 'ZAICO API attempts that were retried, by status.')
+        for stats in snapshot.values():
+            for status, count in sorted(stats['retry_statuses'].items()):
+                lines.append(f'zaico_api_retried_responses_total{labels(stats, status=status)} {count}')
+
+        for name, key, help_text in [
+            ('zaico_api_retries_total', 'retries', 'ZAICO API request retries.'),
+            ('zaico_api_sent_bytes_total', 'bytes_sent', 'Request body bytes sent to the ZAICO API.'),
+            ('zaico_api_received_bytes_total', 'bytes_received', 'Response body bytes received from the ZAICO API.'),
+            ('zaico_api_rate_limit_wait_seconds_total', 'wait_sum', 'Time spent waiting for the rate limiter.'),
+        ]:
+            metric(name, 'counter', help_text)
+            for stats in snapshot.values():
+                lines.append(f'{name}{labels(stats)} {stats[key]}')
+
+        metric(
+            'zaico_api_request_duration_seconds', 'histogram',
+            'ZAICO API request duration including retries and rate limiting.'
+        )
+        for stats in snapshot.values():
+            for upper, cumulative in stats['buckets'].items():
+                lines.append(f'zaico_api_request_duration_seconds_bucket{labels(stats, le=f"{upper:g}")} {cumulative}')
+            lines.append(f'zaico_api_request_duration_seconds_bucket{labels(stats, le="+Inf")} {stats["count"]}')
+            lines.append(f'zaico_api_request_duration_seconds_sum{labels(stats)} {stats["latency_sum"]}')
+            lines.append(f'zaico_api_request_duration_seconds_count{labels(stats)} {stats["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str) -> None:
+        """
+        集計を Prometheus の textfile collector 形式で書き出す（書き込み途中のファイルを読まれないよう置き換える）
+
+        Args:
+            path: 出力先のファイル（拡張子 .prom）
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        part_path = path + '.part'
+        with open(part_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(part_path, path)
+
+
+def _format_bytes(size: int) -> str:
+    if size < 1024:
+        return f'{size}B'
+    if size < 1024 * 1024:
+        return f'{size / 1024:.1f}KB'
+    return f'{size / 1024 / 1024:.1f}MB'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsReporter:
+    """
+    メトリクスの要約・textfile を定期的に出力するバックグラウンド処理
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        interval: float = METRICS_INTERVAL,
+        textfile: str = METRICS_TEXTFILE,
+        stream: Optional[IO[str]] = None
+    ) -> None:
+        """
+        Args:
+            registry: 出力するメトリクス
+            interval: 出力する間隔（秒、0以下の場合は flush() したときだけ出力する）
+            textfile: Prometheus の textfile の出力先（空文字で出力しない）
+            stream: 要約の出力先（省略時は標準エラー出力）
+        """
+        self.registry = registry
+        self.interval = interval
+        self.textfile = textfile
+        self.stream = stream
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def flush(self) -> None:
+        """
+        要約・textfile を出力する
+        """
+        summary = self.registry.summary()
+        # 要約は定期的な出力を設定した場合のみ表示する（textfile だけを設定した場合は表示しない）
+        if summary and self.interval > 0:
+            print(f'APIメトリクス: {summary}', file=self.stream or sys.stderr, flush=True)
+        if self.textfile:
+            self.registry.write_textfile(self.textfile)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f'APIメトリクスを出力できません: {e}', file=self.stream or sys.stderr)
+
+    def start(self) -> 'MetricsReporter':
+        """
+        定期的な出力を開始する
+        """
+        if self.interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        定期的な出力を停止し、最後の集計を出力する
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+_metrics = MetricsRegistry()
+_reporter: Optional[MetricsReporter] = None
+_reporter_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    プロセス内で共有するメトリクスを取得する
+
+    Returns:
+        MetricsRegistry: 共有メトリクス
+    """
+    return _metrics
+
+
+def start_reporting() -> Optional[MetricsReporter]:
+    """
+    設定（METRICS_INTERVAL, METRICS_TEXTFILE）に応じて共有メトリクスの出力を開始する
+
+    2回目以降の呼び出しでは何もしない。プロセスの終了時に最後の集計を出力する。
+
+    Returns:
+        Optional[MetricsReporter]: 出力処理。設定されていない場合はNone
+    """
+    global _reporter
+    if not (METRICS_INTERVAL > 0 or METRICS_TEXTFILE):
+        return None
+    with _reporter_lock:
+        if _reporter is None:
+            _reporter = MetricsReporter(_metrics).start()
+            atexit.register(_reporter.stop)
+    return _reporter
@@ -0,0 +1,336 @@
+"""
+一括入出庫モジュール
+
+CSV/JSONL形式の入出庫ファイルを読み込み、まとめて在庫数量を更新する機能を提供します。
+同一商品の複数の入出庫は1回の更新に集約し、商品の検索と更新は並列に行います。
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Set, Tuple, NamedTuple
+
+import requests
+
+from ._profiling import PHASE_PARSE, phase, set_output_path
+from .api import ZaicoAPIError, get_inventory_by_title, iter_zaico_inventories
+from .index import find_cached_inventory, remember_inventory, forget_inventory
+from .quantity import apply_quantity_delta, update_quantity_by_delta
+from .ratelimit import with_current_priority
+from .config import (
+    INVENTORY_FETCH_CONCURRENCY,
+    MOVEMENT_WORKERS,
+    TITLE_LOOKUP_THRESHOLD,
+    VERIFY_UPDATES,
+    setup_logging
+)
+
+
+# ロガーの設定
+logger = setup_logging()
+
+
+class MovementResult(NamedTuple):
+    """1商品分の入出庫結果"""
+    title: str
+    delta: float
+    ok: bool
+    new_quantity: Optional[int]  # 書き込んだ数量（書き込み後の確認で失敗した場合も入る）
+    message: str
+    retryable: bool = False      # 失敗が一時的なもの（通信エラー・429/5xx など）で、再試行できる
+
+
+def read_movements(path: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    入出庫ファイルを読み込む
+
+    CSVは「物品名」「数量」列（入庫は正、出庫は負の数量）、
+    JSONL（拡張子 .jsonl）は1行に {"title": 商品名, "delta": 数量} の形式とする。
+
+    Args:
+        path: 入出庫ファイルのパス
+
+    Returns:
+        Tuple[List[Tuple[str, str]], List[str]]: ((商品名, 数量) のリスト, 読み込めなかった行のエラー)
+    """
+    movements: List[Tuple[str, str]] = []
+    errors: List[str] = []
+
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.jsonl'):
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    movements.append((record['title'], str(record['delta'])))
+                except (ValueError, KeyError, TypeError) as e:
+                    errors.append(f'{line_no}行目: {e}')
+        else:
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                title = row.get('物品名') or ''
+                if not title:
+                    errors.append(f'{line_no}行目: 物品名がありません')
+                    continue
+                movements.append((title, row.get('数量') or ''))
+
+    return movements, errors
+
+
+def aggregate_movements(movements: List[Tuple[str, str]]) -> Tuple[Dict[str, float], List[str]]:
+    """
+    同一商品の入出庫を合算する
+
+    Args:
+        movements: (商品名, 数量) のリスト
+
+    Returns:
+        Tuple[Dict[str, float], List[str]]: (商品名ごとの増減数（初出順）, 数量を変換できなかったエラー)
+    """
+    deltas: Dict[str, float] = {}
+    errors: List[str] = []
+    for title, quantity in movements:
+        try:
+            delta = float(quantity)
+        except (ValueError, TypeError) as e:
+            errors.append(f'数量の変換に失敗: {title} {quantity} ({e})')
+            continue
+        deltas[title] = deltas.get(title, 0.0) + delta
+    return deltas, errors
+
+
+def resolve_titles(
+    titles: List[str],
+    workers: int = MOVEMENT_WORKERS
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    商品名から在庫データを取得する
+
+    在庫インデックスが有効ならまずインデックスから引き、見つからない商品のみAPIで検索する。
+    APIで検索する商品数が TITLE_LOOKUP_THRESHOLD 以下なら商品名ごとに検索し、
+    それより多い場合は在庫一覧を取得して照合する（リクエスト数の少ない方を選ぶ）。
+    どちらの方法でも商品名が完全に一致する在庫だけを対象とし（検索の部分一致は使わない）、
+    同名の在庫が複数ある場合は最初の1件を使う。
+
+    Args:
+        titles: 商品名のリスト
+        workers: 同時に送信するリクエスト数
+
+    Returns:
+        Optional[Dict[str, Dict[str, Any]]]: 商品名をキーとした在庫データ（見つからない商品は含まない）。
+        エラー時はNone
+    """
+    resolved = _resolve_titles(titles, workers)
+    return resolved[0] if resolved is not None else None
+
+
+def _resolve_titles(
+    titles: List[str],
+    workers: int = MOVEMENT_WORKERS
+) -> Optional[Tuple[Dict[str, Dict[str, Any]], Set[str]]]:
+    # resolve_titles と同じ。APIから取得した（数量が最新の）商品名も返す
+    inventories: Dict[str, Dict[str, Any]] = {}
+    for title in titles:
+        inventory = find_cached_inventory(title)
+        if inventory is not None:
+            inventories[title] = inventory
+    missing = [title for title in titles if title not in inventories]
+    if not missing:
+        return inventories, set()
+
+    if len(missing) <= TITLE_LOOKUP_THRESHOLD:
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                found = list(executor.map(with_current_priority(get_inventory_by_title), missing))
+        except requests.RequestException as e:
+            logger.error(f'在庫データ取得の通信エラー: {e}')
+            return None
+        if any(items is None for items in found):
+            return None
+        for title, items in zip(missing, found):
+            matched = [item for item in items if item.get('title') == title]
+            if matched:
+                inventories[title] = matched[0]
+                remember_inventory(matched[0])
+        return inventories, set(missing) & set(inventories)
+
+    remaining = set(missing)
+    try:
+        for item in iter_zaico_inventories(concurrency=INVENTORY_FETCH_CONCURRENCY):
+            title = item.get('title')
+            if title in remaining:
+                inventories[title] = item
+                remember_inventory(item)
+                remaining.discard(title)
+                if not remaining:
+                    break
+    except ZaicoAPIError:
+        return None
+    except requests.RequestException as e:
+        logger.error(f'在庫データ取得の通信エラー: {e}')
+        return None
+    return inventories, set(missing) - remaining
+
+
+def _apply_delta(
+    title: str,
+    delta: float,
+    inventory: Dict[str, Any],
+    verify: bool = VERIFY_UPDATES,
+    fresh: bool = False
+) -> MovementResult:
+    """
+    1商品の在庫数量を増減する
+
+    Args:
+        title: 商品名
+        delta: 増減数
+        inventory: 在庫データ
+        verify: 更新後に読み直し、他の処理が直後に書き込んでいれば失敗とする
+        fresh: inventory がAPIから取得した直後の在庫データであれば True（インデックスの場合は False）
+
+    Returns:
+        MovementResult: 処理結果
+    """
+    # インデックスの在庫データは在庫IDの解決にのみ使用し、数量は更新の直前に取得した最新の値から計算する
+    try:
+        if verify:
+            update = update_quantity_by_delta(inventory, delta, fresh)
+        else:
+            update = apply_quantity_delta(inventory['id'], delta, inventory if fresh else None)
+    except requests.RequestException as e:
+        logger.error(f'数量更新に失敗: {title} ({e})')
+        return MovementResult(title, delta, False, None, str(e), True)
+
+    if update.ok:
+        remember_inventory(update.inventory, synced=False)
+        return MovementResult(title, delta, True, update.new_quantity, '')
+    forget_inventory(inventory['id'])
+    return MovementResult(title, delta, False, update.new_quantity, update.message, update.retryable)
+
+
+def apply_movement(title: str, delta: float, verify: bool = VERIFY_UPDATES) -> MovementResult:
+    """
+    1商品の入出庫をZAICOに反映する
+
+    Args:
+        title: 商品名
+        delta: 増減数（入庫は正、出庫は負）
+        verify: 更新後に読み直し、他の処理が直後に書き込んでいれば失敗とする
+
+    Returns:
+        MovementResult: 処理結果
+    """
+    resolved = _resolve_titles([title], workers=1)
+    if resolved is None:
+        logger.error('在庫データの取得に失敗しました')
+        return MovementResult(title, delta, False, None, '在庫データの取得に失敗しました', True)
+    inventories, fresh = resolved
+    inventory = inventories.get(title)
+    if inventory is None:
+        logger.error(f'商品「{title}」が見つかりません')
+        return MovementResult(title, delta, False, None, '商品が見つかりません')
+    return _apply_delta(title, delta, inventory, verify, title in fresh)
+
+
+def apply_movements(
+    deltas: Dict[str, float],
+    workers: int = MOVEMENT_WORKERS,
+    verify: bool = VERIFY_UPDATES
+) -> Optional[List[MovementResult]]:
+    """
+    商品ごとの増減数をZAICOに反映する
+
+    Args:
+        deltas: 商品名ごとの増減数
+        workers: 同時に送信するリクエスト数
+        verify: 更新後に読み直し、他の処理が直後に書き込んでいれば失敗とする
+
+    Returns:
+        Optional[List[MovementResult]]: deltas の順の処理結果。商品の検索に失敗した場合はNone
+    """
+    titles = list(deltas)
+    resolved = _resolve_titles(titles, workers)
+    if resolved is None:
+        logger.error('在庫データの取得に失敗しました')
+        return None
+    inventories, fresh = resolved
+
+    def apply(title: str) -> MovementResult:
+        inventory = inventories.get(title)
+        if inventory is None:
+            logger.error(f'商品「{title}」が見つかりません')
+            return MovementResult(title, deltas[title], False, None, '商品が見つかりません')
+        return _apply_delta(title, deltas[title], inventory, verify, title in fresh)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(with_current_priority(apply), titles))
+
+
+def apply_movements_file(
+    path: str,
+    workers: int = MOVEMENT_WORKERS,
+    verify: bool = VERIFY_UPDATES
+) -> bool:
+    """
+    入出庫ファイルを読み込み、在庫数量をまとめて更新し、結果を表示する
+
+    Args:
+        path: 入出庫ファイルのパス
+        workers: 同時に送信するリクエスト数
+        verify: 更新後に読み直し、他の処理が直後に書き込んでいれば失敗とする
+
+    Returns:
+        bool: すべての入出庫が成功した場合True
+    """
+    set_output_path(path)
+    with phase(PHASE_PARSE):
+        movements, read_errors = read_movements(path)
+    deltas, convert_errors = aggregate_movements(movements)
+    errors = read_errors + convert_errors
+    for error in errors:
+        logger.error(error)
+        print(f'読み込みエラー: {error}')
+
+    results = apply_movements(deltas, workers, verify) if deltas else []
+    if results is None:
+        print('在庫データの取得に失敗しました')
+        return False
+
+    for result in results:
+        if not result.ok:
+            print(f'失敗: {result.title} ({result.delta:+g}) [{result.message}]')
+
+    succeeded = sum(1 for result in results if result.ok)
+    print(
+        f'入出庫完了（{len(movements)}行 → {len(results)}商品、'
+        f'成功: {succeeded}件、失敗: {len(results) - succeeded}件、読み込みエラー: {len(errors)}件）'
+    )
+    return succeeded == len(results) and not errors
+
+
+def main() -> None:
+    """
+    一括入出庫のエントリーポイント
+    """
+    parser = argparse.ArgumentParser(description='入出庫ファイル（CSV/JSONL）の内容をZAICOの在庫にまとめて反映します')
+    parser.add_argument('path', help='入出庫ファイル（CSV: 物品名,数量 / JSONL: {"title": ..., "delta": ...}）')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=MOVEMENT_WORKERS,
+        help=f'同時に送信するリクエスト数（デフォルト: {MOVEMENT_WORKERS}）'
+    )
+    parser.add_argument(
+        '--verify', action='store_true', default=VERIFY_UPDATES,
+        help='更新後に読み直し、他の処理が直後に書き込んでいれば失敗とする'
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f'ファイルが見つかりません: {args.path}')
+        sys.exit(1)
+
+    if not apply_movements_file(args.path, args.workers, args.verify):
+        sys.exit(1)
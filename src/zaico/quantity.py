@@ -0,0 +1,259 @@
+"""
+数量更新モジュール
+
+複数のワーカーが同じ在庫を同時に更新しても増減が失われないよう、
+競合を検出しながら在庫数量を増減する機能を提供します。
+
+ZAICO APIには条件付き更新（If-Match など）がないため、次の方法で競合を防ぎます。
+
+- プロセス内: 在庫IDごとのロックで同じ在庫への取得・計算・更新を直列化し（verify の有無によらない）、
+  MovementCoalescer で同じ在庫への増減を1回の更新にまとめる。
+  商品名の検索結果はそのまま計算に使うが、このプロセスが既に上書きした状態（updated_at）であれば取得し直す
+- プロセス間: verify 指定時は更新後に読み直し、更新値と異なれば（他の処理が直後に書き込み、
+  増減が失われた可能性があれば）失敗として返す
+"""
+import threading
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Callable, Deque, Hashable, Iterator, NamedTuple
+
+from .api import get_inventory, is_retryable_status, last_error_status, update_inventory_quantity
+from .config import setup_logging
+from .ratelimit import with_current_priority
+
+
+# ロガーの設定
+logger = setup_logging()
+
+
+class QuantityUpdate(NamedTuple):
+    """数量更新の結果"""
+    ok: bool
+    new_quantity: Optional[int]          # 書き込んだ数量（書き込み後の確認で失敗した場合も入る）
+    inventory: Optional[Dict[str, Any]]  # 計算の元にした最新の在庫データ
+    conflicts: int                       # 検出した競合（更新後の読み直しでの不一致）の回数
+    message: str
+    retryable: bool = False              # 失敗が一時的なもの（通信エラー・429/5xx など）で、再試行できる
+
+
+_item_locks: Dict[Hashable, threading.Lock] = {}
+_item_locks_guard = threading.Lock()
+
+# 在庫IDごとに、このプロセスが上書きした在庫の updated_at（直近のもの）
+_OVERWRITTEN_HISTORY = 32
+_overwritten: Dict[Hashable, Deque[Any]] = {}
+
+
+@contextmanager
+def item_lock(inventory_id: Hashable) -> Iterator[None]:
+    """
+    在庫IDごとのロックを取得する
+
+    同じ在庫への更新はプロセス内で直列化され、異なる在庫は並列に処理できる。
+
+    Args:
+        inventory_id: 在庫ID
+    """
+    with _item_locks_guard:
+        lock = _item_locks.setdefault(inventory_id, threading.Lock())
+    with lock:
+        yield
+
+
+def _compute_quantity(inventory: Dict[str, Any], delta: float) -> Optional[int]:
+    """
+    在庫データの数量に delta を加えた新しい数量を計算する
+
+    在庫不足になる場合もログは出すが計算は行う。
+
+    Returns:
+        Optional[int]: 新しい数量。在庫数を数値に変換できない場合はNone
+    """
+    try:
+        now_quantity = float(inventory['quantity'])
+    except (ValueError, TypeError, KeyError) as e:
+        logger.error(f'在庫数の変換に失敗: {inventory.get("quantity")} ({e})')
+        return None
+
+    # 在庫不足チェック（警告のみ、処理は続行）
+    if now_quantity + delta < 0:
+        logger.error(f'在庫不足: 現在の数量({now_quantity}) < 出庫依頼({-delta})')
+    return int(now_quantity + delta)
+
+
+def _is_current(inventory_id: Hashable, inventory: Optional[Dict[str, Any]]) -> bool:
+    # 在庫IDごとのロックを取得した状態で呼び出す
+    if inventory is None or not inventory.get('updated_at'):
+        return False
+    return inventory['updated_at'] not in _overwritten.get(inventory_id, ())
+
+
+def _remember_overwritten(inventory_id: Hashable, inventory: Dict[str, Any]) -> None:
+    # 在庫IDごとのロックを取得した状態で呼び出す
+    history = _overwritten.setdefault(inventory_id, deque(maxlen=_OVERWRITTEN_HISTORY))
+    history.append(inventory.get('updated_at'))
+
+
+def apply_quantity_delta(
+    inventory_id: int,
+    delta: float,
+    current: Optional[Dict[str, Any]] = None
+) -> QuantityUpdate:
+    """
+    在庫数量を delta 分増減した数量で更新する
+
+    current（APIで商品名を検索した直後の在庫データ）があれば、その数量から計算して取得を省略する。
+    ただし、このプロセスが既に上書きした状態の在庫データであれば古いため、在庫IDで最新の在庫データを取得する。
+    インデックスの在庫データは数量が古い可能性があるため current に渡さないこと。
+    取得から更新までは在庫IDごとのロックで直列化し、プロセス内の同時更新で増減が失われないようにする。
+
+    Args:
+        inventory_id: 在庫ID
+        delta: 増減数
+        current: APIから取得した直後の在庫データ（省略時は在庫IDで最新の在庫データを取得する）
+
+    Returns:
+        QuantityUpdate: 更新結果
+    """
+    with item_lock(inventory_id):
+        latest = current if _is_current(inventory_id, current) else get_inventory(inventory_id)
+        if latest is None:
+            return QuantityUpdate(
+                False, None, None, 0, '最新の在庫データの取得に失敗しました', is_retryable_status(last_error_status())
+            )
+
+        new_quantity = _compute_quantity(latest, delta)
+        if new_quantity is None:
+            return QuantityUpdate(False, None, latest, 0, f'在庫数の変換に失敗: {latest.get("quantity")}')
+
+        if update_inventory_quantity(inventory_id, new_quantity) is None:
+            return QuantityUpdate(
+                False, None, latest, 0, '数量更新に失敗しました', is_retryable_status(last_error_status())
+            )
+        _remember_overwritten(inventory_id, latest)
+        return QuantityUpdate(True, new_quantity, {**latest, 'quantity': str(new_quantity)}, 0, '')
+
+
+def update_quantity_by_delta(
+    inventory: Dict[str, Any],
+    delta: float,
+    fresh: bool = False
+) -> QuantityUpdate:
+    """
+    在庫数量を delta 分増減し、更新後に読み直して他の処理による上書きがないか確認する
+
+    計算の元にする在庫データは apply_quantity_delta と同じく、fresh（商品名を検索した直後）であればそのまま使い、
+    インデックスの値などでは在庫IDで最新の在庫データを取得する（古いのは想定どおりのため競合には数えない）。
+    更新後に読み直した数量が更新値と異なる場合は、直後に他の処理が書き込んで増減が失われた可能性があるため失敗を返す。
+    この場合は数量を書き込み済みのため、再試行すると二重に反映するおそれがある（retryable は False、
+    new_quantity には書き込んだ数量が入る）。
+
+    Args:
+        inventory: 在庫データ（'id' を含む。fresh の場合は 'quantity', 'updated_at' も含む）
+        delta: 増減数
+        fresh: inventory がAPIから取得した直後の在庫データであれば True
+
+    Returns:
+        QuantityUpdate: 更新結果
+    """
+    inventory_id = inventory['id']
+    with item_lock(inventory_id):
+        base = inventory if fresh and _is_current(inventory_id, inventory) else get_inventory(inventory_id)
+        if base is None:
+            return QuantityUpdate(
+                False, None, None, 0, '最新の在庫データの取得に失敗しました', is_retryable_status(last_error_status())
+            )
+
+        new_quantity = _compute_quantity(base, delta)
+        if new_quantity is None:
+            return QuantityUpdate(False, None, base, 0, f'在庫数の変換に失敗: {base.get("quantity")}')
+
+        if update_inventory_quantity(inventory_id, new_quantity) is None:
+            return QuantityUpdate(
+                False, None, base, 0, '数量更新に失敗しました', is_retryable_status(last_error_status())
+            )
+        _remember_overwritten(inventory_id, base)
+
+        # 更新後に読み直し、直後に他の処理が書き込んでいないか確認する
+        written = get_inventory(inventory_id)
+        if written is None:
+            return QuantityUpdate(True, new_quantity, {**base, 'quantity': str(new_quantity)}, 0, '')
+        if str(written.get('quantity')) != str(new_quantity):
+            message = (
+                f'更新直後に他の処理が書き込んだため、増減が失われた可能性があります'
+                f'（更新値: {new_quantity}, 現在値: {written.get("quantity")}）'
+            )
+            logger.error(f'在庫ID {inventory_id}: {message}')
+            return QuantityUpdate(False, new_quantity, written, 1, message)
+        return QuantityUpdate(True, new_quantity, written, 0, '')
+
+
+class MovementCoalescer:
+    """
+    同じ在庫への増減をまとめて適用するキュー
+
+    submit() された増減は在庫ごとに合算され、1つの在庫につき同時に1つの更新だけが実行される。
+    更新中に届いた増減は、その更新の完了後にまとめて1回で適用する。
+    異なる在庫の更新はスレッドプールで並列に実行する。
+    """
+
+    def __init__(self, apply: Callable[[Hashable, float], Any], workers: int) -> None:
+        """
+        Args:
+            apply: (キー, 合算した増減数) を受け取り、更新を実行する関数
+            workers: 並列に更新する在庫数
+        """
+        self._apply = apply
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, List[Any]] = {}
+        self._running: set = set()
+
+    def submit(self, key: Hashable, delta: float) -> 'Future[Any]':
+        """
+        増減を登録する
+
+        Args:
+            key: 在庫を識別するキー（在庫IDなど）
+            delta: 増減数
+
+        Returns:
+            Future[Any]: apply の戻り値を受け取るFuture（合算された増減は同じ結果を共有する）
+        """
+        future: 'Future[Any]' = Future()
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [delta, [future]]
+            else:
+                entry[0] += delta
+                entry[1].append(future)
+            if key not in self._running:
+                self._running.add(key)
+                self._executor.submit(with_current_priority(self._drain), key)
+        return future
+
+    def _drain(self, key: Hashable) -> None:
+        while True:
+            with self._lock:
+                entry = self._pending.pop(key, None)
+                if entry is None:
+                    self._running.discard(key)
+                    return
+            delta, futures = entry
+            try:
+                result = self._apply(key, delta)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future in futures:
+                    future.set_result(result)
+
+    def close(self) -> None:
+        """
+        登録済みの増減をすべて適用してから終了する
+        """
+        self._executor.shutdown(wait=True)
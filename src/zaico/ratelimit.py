@@ -0,0 +1,306 @@
+"""
+レート制限モジュール
+
+ZAICO APIトークンごとの呼び出し上限を超えないよう、
+リクエストの送信間隔を制御するトークンバケットとスケジューラーを提供します。
+
+- TokenBucket: プロセス内で共有するトークンバケット
+- FileTokenBucket: ロックファイルを介して複数プロセスで共有するトークンバケット
+- RequestScheduler: 優先度の高いリクエスト（入出庫など）を先にトークンを取得させるスケジューラー
+- get_scheduler: 同じ設定のクライアント（同期・非同期）で共有するスケジューラーを取得する
+"""
+import functools
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple, TypeVar, Union
+
+
+# リクエストの優先度（値が小さいほど優先）
+PRIORITY_INTERACTIVE = 0   # 入出庫など、利用者が結果を待っている処理
+PRIORITY_BULK = 10         # エクスポート・一括登録・インデックス同期など
+
+_priority: ContextVar[int] = ContextVar('zaico_request_priority', default=PRIORITY_INTERACTIVE)
+
+T = TypeVar('T')
+
+
+class TokenBucket:
+    """
+    トークンバケット方式のレート制限
+
+    1秒あたり rate 個のトークンが補充され、最大 capacity 個まで貯まる。
+    リクエストごとに1トークンを消費し、トークンがなければ補充されるまで待機する。
+    スレッド間で共有して使用できる。
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Args:
+            rate: 1秒あたりのリクエスト数
+            capacity: 連続して送信できる最大リクエスト数
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        待機せずにトークンの取得を試みる
+
+        Returns:
+            float: 取得できた場合は0、できなかった場合は次のトークンが補充されるまでの秒数
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """
+        トークンを1つ取得する（取得できるまで待機する）
+
+        Returns:
+            float: 待機した時間（秒）
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+
+@contextmanager
+def _lock_file(f: IO[str]) -> Iterator[None]:
+    """
+    ファイルを排他ロックする（Windows/POSIX両対応）
+
+    Args:
+        f: ロックするファイル
+    """
+    if os.name == 'nt':
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    複数プロセスで共有するトークンバケット
+
+    バケットの状態（残りトークン数と更新時刻）をファイルに保存し、
+    ファイルロックで排他制御する。エクスポート・一括登録・入出庫を
+    別々のプロセスで同時に実行しても、APIトークン全体の上限を守れる。
+    """
+
+    def __init__(self, path: str, rate: float, capacity: float) -> None:
+        """
+        Args:
+            path: 状態を保存するファイルのパス
+            rate: 1秒あたりのリクエスト数
+            capacity: 連続して送信できる最大リクエスト数
+        """
+        super().__init__(rate, capacity)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 存在しなければ作成する（既存の状態は消さない）
+        open(path, 'a', encoding='utf-8').close()
+
+    def try_acquire(self) -> float:
+        with self._lock, open(self.path, 'r+', encoding='utf-8') as f, _lock_file(f):
+            f.seek(0)
+            now = time.time()
+            try:
+                tokens_text, updated_text = f.read().split()
+                tokens, updated = float(tokens_text), float(updated_text)
+            except ValueError:
+                tokens, updated = self.capacity, now
+
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+
+            f.seek(0)
+            f.truncate()
+            f.write(f'{tokens} {now}')
+            f.flush()
+            return wait
+
+
+class RequestScheduler:
+    """
+    優先度付きのリクエストスケジューラー
+
+    トークンを待っているリクエストのうち、優先度が最も高い（値が小さい）ものから順にトークンを渡す。
+    同じ優先度の中では到着順となる。一括処理が上限いっぱいに送信していても、
+    入出庫のリクエストは次に補充されたトークンを取得できる。
+    """
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        """
+        Args:
+            bucket: トークンの供給元
+        """
+        self.bucket = bucket
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+
+    def acquire(self, priority: Union[int, None] = None) -> float:
+        """
+        トークンを1つ取得する（自分より優先度の高い待ちがなく、トークンを取得できるまで待機する）
+
+        Args:
+            priority: 優先度（省略時は request_priority() で設定された値）
+
+        Returns:
+            float: 待機した時間（秒）
+        """
+        entry = (current_priority() if priority is None else priority, next(self._seq))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] == entry:
+                        wait = self.bucket.try_acquire()
+                        if wait == 0:
+                            return time.monotonic() - started
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+
+_schedulers: Dict[Tuple[float, float, str], RequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(rate_limit: float, rate_burst: float, rate_limit_file: str = '') -> Optional[RequestScheduler]:
+    """
+    プロセス内で共有するスケジューラー（とトークンバケット）を取得する
+
+    同じ設定で呼び出した場合は同じスケジューラーを返すため、ZaicoClient と AsyncZaicoClient を
+    併用しても、プロセス全体の送信間隔は設定したレート制限に収まる。
+
+    Args:
+        rate_limit: 1秒あたりのリクエスト数の上限（0以下で制限なし）
+        rate_burst: 連続して送信できる最大リクエスト数
+        rate_limit_file: レート制限を複数プロセスで共有する場合の状態ファイル
+
+    Returns:
+        Optional[RequestScheduler]: スケジューラー（トークンバケットは bucket 属性）。制限しない場合はNone
+    """
+    if rate_limit <= 0:
+        return None
+    key = (rate_limit, rate_burst, rate_limit_file)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            if rate_limit_file:
+                bucket: TokenBucket = FileTokenBucket(rate_limit_file, rate_limit, rate_burst)
+            else:
+                bucket = TokenBucket(rate_limit, rate_burst)
+            scheduler = _schedulers[key] = RequestScheduler(bucket)
+    return scheduler
+
+
+def current_priority() -> int:
+    """
+    現在のリクエスト優先度を取得する
+
+    Returns:
+        int: 優先度
+    """
+    return _priority.get()
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """
+    ブロック内で送信するリクエストの優先度を設定する
+
+    使用例:
+        with request_priority(PRIORITY_BULK):
+            export_inventories_to_csv()
+
+    Args:
+        priority: 優先度
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def with_priority(priority: int) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    関数内で送信するリクエストの優先度を設定するデコレーター
+
+    Args:
+        priority: 優先度
+
+    Returns:
+        Callable: デコレーター
+    """
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        def run(*args: Any, **kwargs: Any) -> T:
+            with request_priority(priority):
+                return func(*args, **kwargs)
+        return run
+    return decorator
+
+
+def with_current_priority(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    呼び出し元の優先度を引き継いで実行する関数を返す
+
+    ThreadPoolExecutor のワーカースレッドには優先度が引き継がれないため、
+    スレッドプールに渡す関数をこれで包む。
+
+    Args:
+        func: ワーカースレッドで実行する関数
+
+    Returns:
+        Callable[..., T]: 呼び出し元の優先度で func を実行する関数
+    """
+    priority = current_priority()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        with request_priority(priority):
+            return func(*args, **kwargs)
+    return run
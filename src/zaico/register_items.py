@@ -3,12 +3,24 @@
 
 CSVファイルから新規商品をZAICOに一括登録する機能を提供します。
 """
+import argparse
 import csv
 import os
 import sys
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple, NamedTuple
 
+import requests
+
+from ._profiling import PHASE_PARSE, PHASE_WRITE, phase, set_output_path
 from .api import create_inventory
+from .config import REGISTER_WORKERS
+from .ratelimit import PRIORITY_BULK, with_priority, with_current_priority
+
+
+# 失敗行CSVに追加する列名
+FAILED_REASON_COLUMN = 'エラー'
 
 
 def get_app_dir() -> str:
@@ -38,41 +50,129 @@ def _convert_empty_to_none(value: Optional[str]) -> Optional[str]:
     return None if value == "" else value
 
 
-def register_items_from_csv(csv_path: Optional[str] = None) -> None:
+class RegistrationResult(NamedTuple):
+    """1行分の登録結果"""
+    line_no: int
+    row: Dict[str, str]
+    ok: bool
+    response: Any
+
+
+def _register_row(row: Dict[str, str]) -> Tuple[bool, Any]:
+    """
+    CSVの1行をZAICOに登録する
+
+    Args:
+        row: CSVの行データ
+
+    Returns:
+        Tuple[bool, Any]: (成功フラグ, レスポンスデータまたはエラーメッセージ)
+    """
+    title = row.get("物品名", "")
+    category = _convert_empty_to_none(row.get("カテゴリ"))
+    place = _convert_empty_to_none(row.get("保管場所"))
+    state = _convert_empty_to_none(row.get("状態"))
+    quantity = _convert_empty_to_none(row.get("数量"))
+
+    try:
+        return create_inventory(title, category, place, state, quantity)
+    except requests.RequestException as e:
+        return False, str(e)
+
+
+def write_failed_rows(
+    results: List[RegistrationResult],
+    fieldnames: List[str],
+    csv_path: str
+) -> None:
+    """
+    登録に失敗した行をCSVに書き出す
+
+    出力したCSVはそのまま register_items_from_csv の入力として再実行できる。
+
+    Args:
+        results: 登録結果
+        fieldnames: 入力CSVの列名
+        csv_path: 出力先のパス
+    """
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(
+            f, fieldnames=[*fieldnames, FAILED_REASON_COLUMN], extrasaction='ignore'
+        )
+        writer.writeheader()
+        for result in results:
+            if not result.ok:
+                writer.writerow({**result.row, FAILED_REASON_COLUMN: result.response})
+
+
+@with_priority(PRIORITY_BULK)
+def register_items_from_csv(
+    csv_path: Optional[str] = None,
+    workers: int = REGISTER_WORKERS,
+    failed_csv_path: Optional[str] = None
+) -> List[RegistrationResult]:
     """
     CSVファイルから商品を読み込み、ZAICOに登録する
 
+    workers 件のリクエストを並列に送信する。送信間隔は共有クライアントの
+    レート制限に従い、入出庫より低い優先度で送信する。結果は入力CSVの行順に表示し、
+    失敗した行があれば再実行用のCSVに書き出す。
+
     Args:
         csv_path: 入力CSVファイルのパス（省略時はデフォルトパス）
+        workers: 同時に送信するリクエスト数
+        failed_csv_path: 失敗行の出力先（省略時は入力ファイルと同じ場所に自動生成）
+
+    Returns:
+        List[RegistrationResult]: 入力順の登録結果
     """
     if csv_path is None:
         app_dir = get_app_dir()
         csv_path = os.path.abspath(os.path.join(app_dir, '../tmp/new.csv'))
 
-    with open(csv_path, newline='', encoding='utf-8') as f:
+    set_output_path(csv_path)
+    with phase(PHASE_PARSE), open(csv_path, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
-
-        for row in reader:
-            title = row.get("物品名", "")
-            if not title:
-                continue
-
-            category = _convert_empty_to_none(row.get("カテゴリ"))
-            place = _convert_empty_to_none(row.get("保管場所"))
-            state = _convert_empty_to_none(row.get("状態"))
-            quantity = _convert_empty_to_none(row.get("数量"))
-
-            ok, resp = create_inventory(title, category, place, state, quantity)
-
+        fieldnames = [name for name in (reader.fieldnames or []) if name != FAILED_REASON_COLUMN]
+        # 1行目はヘッダーのため、データ行は2行目から数える
+        rows = [(line_no, row) for line_no, row in enumerate(reader, start=2) if row.get("物品名")]
+
+    results: List[RegistrationResult] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # map は入力順に結果を返すため、表示順は入力CSVの行順になる
+        responses = executor.map(with_current_priority(_register_row), [row for _, row in rows])
+        for (line_no, row), (ok, resp) in zip(rows, responses):
+            title = row["物品名"]
             if ok:
                 print(f'登録成功: {title}')
             else:
                 print(f'登録失敗: {title} [{resp}]')
+            results.append(RegistrationResult(line_no, row, ok, resp))
+
+    failed_count = sum(1 for result in results if not result.ok)
+    if failed_count:
+        if failed_csv_path is None:
+            dstr = datetime.now().strftime('%Y%m%d_%H%M%S')
+            base, _ = os.path.splitext(csv_path)
+            failed_csv_path = f'{base}_failed_{dstr}.csv'
+        with phase(PHASE_WRITE):
+            write_failed_rows(results, fieldnames, failed_csv_path)
+        print(f'失敗した{failed_count}件を {failed_csv_path} に出力しました')
+
+    return results
 
 
 def main() -> None:
     """
     商品登録処理のエントリーポイント
     """
-    register_items_from_csv()
-
+    parser = argparse.ArgumentParser(description='CSVファイルから新規商品をZAICOに一括登録します')
+    parser.add_argument('csv_path', nargs='?', help='入力CSVファイル（省略時は ../tmp/new.csv）')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=REGISTER_WORKERS,
+        help=f'同時に送信するリクエスト数（デフォルト: {REGISTER_WORKERS}）'
+    )
+    parser.add_argument('--failed-csv', help='登録に失敗した行の出力先')
+    args = parser.parse_args()
+
+    register_items_from_csv(args.csv_path, args.workers, args.failed_csv)
@@ -3,18 +3,19 @@
 
 ZAICOの在庫に対する出庫（数量減算）処理を行います。
 """
-import sys
 import logging
 
-from .api import get_inventory_by_title, update_inventory_quantity
-from .config import setup_logging
+from .api import get_inventory_by_title
+from .config import VERIFY_UPDATES, setup_logging
+from .quantity import apply_quantity_delta, update_quantity_by_delta
+from .index import find_cached_inventory, remember_inventory, forget_inventory
 
 
 # ロガーの設定
 logger = setup_logging()
 
 
-def stock_out(title: str, sub_quantity: str) -> bool:
+def stock_out(title: str, sub_quantity: str, verify: bool = VERIFY_UPDATES) -> bool:
     """
     指定タイトルの商品を出庫（sub_quantity分減算）する
 
@@ -23,25 +24,11 @@ def stock_out(title: str, sub_quantity: str) -> bool:
     Args:
         title: 商品名
         sub_quantity: 出庫する数量（文字列）
+        verify: 更新後に読み直し、他の処理が直後に書き込んでいれば失敗とする
 
     Returns:
         bool: 処理の成功/失敗
     """
-    items = get_inventory_by_title(title)
-    if not items:
-        logger.error(f'商品「{title}」が見つかりません')
-        return False
-
-    inventory = items[0]
-    inventory_id = inventory['id']
-
-    # 現在の数量を取得
-    try:
-        now_quantity = float(inventory['quantity'])
-    except (ValueError, TypeError) as e:
-        logger.error(f'在庫数の変換に失敗: {inventory["quantity"]} ({e})')
-        return False
-
     # 出庫数量を変換
     try:
         sub_quantity_f = float(sub_quantity)
@@ -49,32 +36,32 @@ def stock_out(title: str, sub_quantity: str) -> bool:
         logger.error(f'出庫入力値の変換に失敗: {sub_quantity} ({e})')
         return False
 
-    # 在庫不足チェック（警告のみ、処理は続行）
-    if now_quantity < sub_quantity_f:
-        logger.error(f'在庫不足: 現在の数量({now_quantity}) < 出庫依頼({sub_quantity_f})')
+    # インデックスが有効なら商品名の検索を省略する（インデックスは在庫IDの解決にのみ使用する）
+    inventory = find_cached_inventory(title)
+    current = None
+    if inventory is None:
+        items = get_inventory_by_title(title)
+        if not items:
+            logger.error(f'商品「{title}」が見つかりません')
+            return False
+        inventory = current = items[0]
+        remember_inventory(inventory)
+
+    inventory_id = inventory['id']
 
-    new_quantity = int(now_quantity - sub_quantity_f)
-    result = update_inventory_quantity(inventory_id, new_quantity)
+    # 数量は検索した直後の値（インデックスから引いた場合は更新の直前に取得した最新の値）から計算する
+    if verify:
+        update = update_quantity_by_delta(inventory, -sub_quantity_f, current is not None)
+    else:
+        update = apply_quantity_delta(inventory_id, -sub_quantity_f, current)
+    new_quantity = update.new_quantity
+    result = update.ok
 
     if result:
+        remember_inventory(update.inventory, synced=False)
         print(f'出庫完了（商品: {title}、新数量: {new_quantity}）')
         return True
     else:
+        forget_inventory(inventory_id)
         logger.error('出庫に失敗しました')
         return False
-
-
-def main() -> None:
-    """
-    出庫処理のエントリーポイント
-
-    コマンドライン引数から商品名と出庫数量を受け取り、出庫処理を実行する。
-    """
-    if len(sys.argv) != 3:
-        print('使い方: python zaico_stock_out.py 商品名 出庫数量(int)')
-        sys.exit(1)
-
-    title = sys.argv[1]
-    sub_quantity = sys.argv[2]
-    stock_out(title, sub_quantity)
-
@@ -0,0 +1,360 @@
+"""
+ZAICO APIスタブモジュール
+
+ベンチマーク・負荷試験・オフラインでの動作確認のために、ZAICO APIの在庫エンドポイントを
+ローカルで再現するHTTPサーバーを提供します。
+応答の遅延、エラー（5xx）の注入、レート制限（429 + Retry-After）を設定できます。
+
+対応するエンドポイント:
+- GET  /inventories           在庫一覧（page・title で絞り込み、Link / Total-Count ヘッダー付き）
+- GET  /inventories/{id}      在庫の取得
+- PUT  /inventories/{id}      在庫の更新
+- POST /inventories           在庫の登録
+
+データはメモリ上にのみ保持し、サーバーを停止すると破棄されます。
+
+単独のサーバーとして起動し、環境変数 ZAICO_API_BASE_URL で各ツールの接続先にできます:
+    python zaico_stub_server.py --port 8080 --inventories 1000 --latency 0.05 --rate-limit 5
+    ZAICO_API_BASE_URL=http://127.0.0.1:8080/api/v1 python zaico_stock_in.py
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from .ratelimit import TokenBucket
+
+
+API_PREFIX = '/api/v1'
+JST = timezone(timedelta(hours=9))
+
+
+def make_inventories(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    合成した在庫データを作成する
+
+    Args:
+        count: 件数
+        seed: 乱数のシード（同じ値なら同じデータになる）
+
+    Returns:
+        List[Dict[str, Any]]: APIの在庫一覧と同じ形式の在庫データ
+    """
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1, tzinfo=JST)
+    inventories = []
+    for inventory_id in range(1, count + 1):
+        updated_at = base + timedelta(minutes=rng.randrange(60 * 24 * 365))
+        inventories.append({
+            'id': inventory_id,
+            'title': f'商品{inventory_id:06d}',
+            'quantity': str(rng.randrange(0, 500)),
+            'unit': '個',
+            'category': rng.choice(['眼鏡', '眼鏡パーツ', '雑貨', '材料']),
+            'state': '新品',
+            'place': f'棚{rng.randrange(1, 50)}',
+            'code': f'{4900000000000 + inventory_id}',
+            'created_at': base.isoformat(),
+            'updated_at': updated_at.isoformat(),
+            'stocktake_attributes': {'checked_at': None},
+        })
+    return inventories
+
+
+def _now() -> str:
+    return datetime.now(JST).isoformat(timespec='seconds')
+
+
+class ZaicoStub:
+    """
+    ZAICO APIのスタブサーバー
+
+    使用例:
+        with ZaicoStub(make_inventories(1000)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='stub', rate_limit=0))
+            export_inventories_to_csv('out.csv')
+    """
+
+    def __init__(
+        self,
+        inventories: Optional[Iterable[Dict[str, Any]]] = None,
+        page_size: int = 1000,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_statuses: Tuple[int, ...] = (500, 503),
+        rate_limit: float = 0.0,
+        rate_burst: float = 10,
+        seed: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            inventories: 初期の在庫データ
+            page_size: 在庫一覧の1ページあたりの件数
+            host: 待ち受けるアドレス
+            port: 待ち受けるポート（0で空いているポートを使用）
+            latency: 応答までの遅延（秒）
+            jitter: 遅延に加えるばらつきの最大値（秒、0〜jitterの一様乱数）
+            error_rate: エラーを返すリクエストの割合（0〜1）
+            error_statuses: 注入するエラーのステータスコード（この中から無作為に選ぶ）
+            rate_limit: 1秒あたりに受け付けるリクエスト数（0以下で制限なし）。超えると429を返す
+            rate_burst: 連続して受け付ける最大リクエスト数
+            seed: 遅延のばらつき・エラー注入の乱数のシード
+        """
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.rate_limiter = TokenBucket(rate_limit, rate_burst) if rate_limit > 0 else None
+        self.request_count = 0
+        self.status_counts: Dict[int, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._inventories: Dict[int, Dict[str, Any]] = {item['id']: dict(item) for item in inventories or []}
+        self._next_id = max(self._inventories, default=0) + 1
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """
+        APIのベースURL（ZaicoClient の base_url に指定する）
+        """
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}{API_PREFIX}'
+
+    @property
+    def inventories(self) -> List[Dict[str, Any]]:
+        """
+        現在の在庫データ（在庫ID順）
+        """
+        with self._lock:
+            return [dict(self._inventories[key]) for key in sorted(self._inventories)]
+
+    def start(self) -> 'ZaicoStub':
+        """
+        バックグラウンドのスレッドでサーバーを起動する
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        現在のスレッドでサーバーを起動する（停止するまで戻らない）
+        """
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """
+        サーバーを停止する
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'ZaicoStub':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def respond(self, method: str, path: str, query: Dict[str, List[str]], body: Any) -> Tuple[int, Any, Dict[str, str]]:
+        """
+        遅延・レート制限・エラー注入を適用してリクエストを処理する
+
+        Args:
+            method: HTTPメソッド
+            path: API_PREFIX を除いたパス
+            query: クエリパラメーター
+            body: リクエストボディ（JSON）
+
+        Returns:
+            Tuple[int, Any, Dict[str, str]]: (ステータスコード, レスポンスボディ, 追加のヘッダー)
+        """
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+            inject_error = self.error_rate > 0 and self._rng.random() < self.error_rate
+            error_status = self._rng.choice(self.error_statuses) if inject_error else None
+        if delay > 0:
+            time.sleep(delay)
+
+        wait = self.rate_limiter.try_acquire() if self.rate_limiter is not None else 0.0
+        if wait > 0:
+            result: Tuple[int, Any, Dict[str, str]] = (
+                429, {'message': 'Too Many Requests'}, {'Retry-After': str(max(1, math.ceil(wait)))}
+            )
+        elif error_status is not None:
+            result = (error_status, {'message': 'Injected error'}, {})
+        else:
+            result = self.handle(method, path, query, body)
+
+        with self._lock:
+            self.request_count += 1
+            self.status_counts[result[0]] = self.status_counts.get(result[0], 0) + 1
+        return result
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: Any) -> Tuple[int, Any, Dict[str, str]]:
+        """
+        リクエストを処理する（遅延・レート制限・エラー注入は適用しない）
+
+        Args:
+            method: HTTPメソッド
+            path: API_PREFIX を除いたパス
+            query: クエリパラメーター
+            body: リクエストボディ（JSON）
+
+        Returns:
+            Tuple[int, Any, Dict[str, str]]: (ステータスコード, レスポンスボディ, 追加のヘッダー)
+        """
+        with self._lock:
+            parts = [part for part in path.split('/') if part]
+            if parts[:1] != ['inventories'] or len(parts) > 2:
+                return 404, {'message': 'Not Found'}, {}
+
+            if len(parts) == 1:
+                if method == 'GET':
+                    return self._list(query)
+                if method == 'POST':
+                    return self._create(body)
+                return 405, {'message': 'Method Not Allowed'}, {}
+
+            try:
+                inventory = self._inventories[int(parts[1])]
+            except (ValueError, KeyError):
+                return 404, {'message': 'Not Found'}, {}
+            if method == 'GET':
+                return 200, dict(inventory), {}
+            if method == 'PUT':
+                return self._update(inventory, body)
+            return 405, {'message': 'Method Not Allowed'}, {}
+
+    def _list(self, query: Dict[str, List[str]]) -> Tuple[int, Any, Dict[str, str]]:
+        items = [self._inventories[key] for key in sorted(self._inventories)]
+        title = query.get('title', [None])[0]
+        if title is not None:
+            items = [item for item in items if item.get('title') == title]
+        try:
+            page = max(1, int(query.get('page', ['1'])[0]))
+        except ValueError:
+            page = 1
+
+        start = (page - 1) * self.page_size
+        headers = {'Total-Count': str(len(items))}
+        if start + self.page_size < len(items):
+            params = {key: values[0] for key, values in query.items() if key != 'page'}
+            params['page'] = str(page + 1)
+            headers['Link'] = f'<{self.base_url}/inventories?{urlencode(params)}>; rel="next"'
+        return 200, [dict(item) for item in items[start:start + self.page_size]], headers
+
+    def _create(self, body: Any) -> Tuple[int, Any, Dict[str, str]]:
+        if not isinstance(body, dict) or not body.get('title'):
+            return 400, {'message': 'title is required'}, {}
+        inventory_id = self._next_id
+        self._next_id += 1
+        now = _now()
+        self._inventories[inventory_id] = {
+            'id': inventory_id, 'quantity': '0', 'created_at': now, 'updated_at': now, **body
+        }
+        return 200, {'code': 200, 'status': 'success', 'message': 'Data was successfully created.', 'data_id': inventory_id}, {}
+
+    def _update(self, inventory: Dict[str, Any], body: Any) -> Tuple[int, Any, Dict[str, str]]:
+        if not isinstance(body, dict):
+            return 400, {'message': 'Bad Request'}, {}
+        inventory.update({key: value for key, value in body.items() if key != 'id'})
+        inventory['updated_at'] = _now()
+        return 200, {'code': 200, 'status': 'success', 'message': 'Data was successfully updated.'}, {}
+
+
+def _make_handler(stub: ZaicoStub) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _dispatch(self) -> None:
+            url = urlsplit(self.path)
+            if not url.path.startswith(API_PREFIX):
+                self._send(404, {'message': 'Not Found'}, {})
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            try:
+                body = json.loads(raw) if raw else None
+            except ValueError:
+                self._send(400, {'message': 'Invalid JSON'}, {})
+                return
+            status, payload, headers = stub.respond(
+                self.command, url.path[len(API_PREFIX):], parse_qs(url.query), body
+            )
+            self._send(status, payload, headers)
+
+        def _send(self, status: int, payload: Any, headers: Dict[str, str]) -> None:
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_PUT = do_POST = _dispatch
+
+        def log_message(self, format: str, *args: Any) -> None:
+            # リクエストごとのアクセスログは出力しない
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    """
+    スタブサーバーのエントリーポイント
+    """
+    parser = argparse.ArgumentParser(description='ZAICO APIの在庫エンドポイントを再現するローカルサーバーを起動します')
+    parser.add_argument('--host', default='127.0.0.1', help='待ち受けるアドレス（デフォルト: 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=8080, help='待ち受けるポート（デフォルト: 8080）')
+    parser.add_argument('--inventories', type=int, default=1000, help='用意する在庫数（デフォルト: 1000）')
+    parser.add_argument('--page-size', type=int, default=1000, help='在庫一覧の1ページあたりの件数（デフォルト: 1000）')
+    parser.add_argument('--latency', type=float, default=0.0, help='応答までの遅延（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='遅延に加えるばらつきの最大値（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='5xxエラーを返すリクエストの割合（0〜1）')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='1秒あたりに受け付けるリクエスト数（超えると429）')
+    parser.add_argument('--rate-burst', type=float, default=10, help='連続して受け付ける最大リクエスト数（デフォルト: 10）')
+    parser.add_argument('--seed', type=int, help='在庫データ・乱数のシード')
+    args = parser.parse_args()
+
+    stub = ZaicoStub(
+        make_inventories(args.inventories, seed=args.seed or 0),
+        page_size=args.page_size,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        rate_burst=args.rate_burst,
+        seed=args.seed
+    )
+    print(f'ZAICO APIスタブを起動しました: {stub.base_url}')
+    print(f'各ツールの接続先にするには ZAICO_API_BASE_URL={stub.base_url} を設定してください（Ctrl+Cで終了）')
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub._server.server_close()
+        print(f'終了しました（リクエスト: {stub.request_count}件、ステータス別: {dict(sorted(stub.status_counts.items()))}）')
@@ -0,0 +1,28 @@
+"""
+テスト共通のフィクスチャ
+"""
+import pytest
+
+from zaico import quantity
+from zaico.client import ZaicoClient, set_client
+
+
+@pytest.fixture(autouse=True)
+def shared_client():
+    """
+    各テストでレート制限なしの共有クライアントを使用する
+    """
+    client = ZaicoClient(base_url='https://example.com/api', token='test', rate_limit=0)
+    set_client(client)
+    yield client
+    set_client(None)
+
+
+@pytest.fixture(autouse=True)
+def overwritten_history():
+    """
+    スタブは同じ updated_at の在庫を作るため、上書きした在庫の記録をテストごとに消去する
+    """
+    quantity._overwritten.clear()
+    yield
+    quantity._overwritten.clear()
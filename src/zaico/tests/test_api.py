@@ -7,7 +7,11 @@ API関連機能のユニットテストを提供します。
 import pytest
 from unittest.mock import patch, Mock
 
+from zaico.config import HTTP_MAX_RETRIES
 from zaico.api import (
+    ZaicoAPIError,
+    iter_inventory_pages,
+    iter_zaico_inventories,
     get_zaico_inventories,
     get_inventory_by_title,
     update_inventory_quantity,
@@ -18,27 +22,30 @@ from zaico.api import (
 class TestGetZaicoInventories:
     """get_zaico_inventories関数のテスト"""
 
-    @patch('zaico.api.requests.get')
-    def test_success(self, mock_get):
+    @patch('zaico.client.requests.Session.request')
+    def test_success(self, mock_request):
         """正常に在庫一覧を取得できる"""
         expected_data = [
             {'id': 1, 'title': '商品A', 'quantity': '10'},
             {'id': 2, 'title': '商品B', 'quantity': '20'}
         ]
-        mock_get.return_value = Mock(
+        mock_request.return_value = Mock(
             status_code=200,
-            json=lambda: expected_data
+            json=lambda: expected_data,
+            headers={},
+            links={}
         )
 
         result = get_zaico_inventories()
 
         assert result == expected_data
-        mock_get.assert_called_once()
+        mock_request.assert_called_once()
 
-    @patch('zaico.api.requests.get')
-    def test_error(self, mock_get):
-        """APIエラー時にNoneを返す"""
-        mock_get.return_value = Mock(
+    @patch('zaico.client.time.sleep')
+    @patch('zaico.client.requests.Session.request')
+    def test_error(self, mock_request, mock_sleep):
+        """APIエラーが再試行後も続く場合にNoneを返す"""
+        mock_request.return_value = Mock(
             status_code=500,
             text='Internal Server Error'
         )
@@ -46,31 +53,101 @@ class TestGetZaicoInventories:
         result = get_zaico_inventories()
 
         assert result is None
+        assert mock_request.call_count == HTTP_MAX_RETRIES + 1
+
+
+class TestIterInventoryPages:
+    """iter_inventory_pages関数のテスト"""
+
+    @staticmethod
+    def _page(items, next_page=None, total=None):
+        links = {}
+        if next_page is not None:
+            links['next'] = {'url': f'https://example.com/api/inventories?page={next_page}'}
+        headers = {} if total is None else {'Total-Count': str(total)}
+        return Mock(status_code=200, json=lambda: items, headers=headers, links=links)
+
+    @patch('zaico.client.requests.Session.request')
+    def test_follow_link_header(self, mock_request):
+        """Linkヘッダーをたどって全ページを取得する"""
+        mock_request.side_effect = [
+            self._page([{'id': 1}, {'id': 2}], next_page=2),
+            self._page([{'id': 3}, {'id': 4}], next_page=3),
+            self._page([{'id': 5}])
+        ]
+
+        pages = list(iter_inventory_pages())
+
+        assert pages == [[{'id': 1}, {'id': 2}], [{'id': 3}, {'id': 4}], [{'id': 5}]]
+        assert mock_request.call_count == 3
+
+    @patch('zaico.client.requests.Session.request')
+    def test_concurrent_pages_in_order(self, mock_request):
+        """Total-Countが分かる場合は並列取得し、ページ順に返す"""
+        def respond(method, url, params=None, **kwargs):
+            page = (params or {}).get('page', 1)
+            if page == 1:
+                return self._page([{'id': 1}, {'id': 2}], next_page=2, total=7)
+            items = [{'id': i} for i in range(page * 2 - 1, min(page * 2, 7) + 1)]
+            return self._page(items)
+        mock_request.side_effect = respond
+
+        items = list(iter_zaico_inventories(concurrency=3))
+
+        assert [item['id'] for item in items] == [1, 2, 3, 4, 5, 6, 7]
+        assert mock_request.call_count == 4
+
+    @patch('zaico.client.requests.Session.request')
+    def test_error_raises(self, mock_request):
+        """途中のページでエラーになった場合は例外を送出する"""
+        mock_request.side_effect = [
+            self._page([{'id': 1}], next_page=2),
+            Mock(status_code=404, text='Not Found', headers={})
+        ]
+
+        with pytest.raises(ZaicoAPIError):
+            list(iter_inventory_pages())
+
+    @patch('zaico.client.requests.Session.request')
+    def test_get_zaico_inventories_all_pages(self, mock_request):
+        """get_zaico_inventoriesは全ページを結合したリストを返す"""
+        mock_request.side_effect = [
+            self._page([{'id': 1}], next_page=2),
+            self._page([{'id': 2}])
+        ]
+
+        result = get_zaico_inventories(concurrency=1)
+
+        assert result == [{'id': 1}, {'id': 2}]
 
 
 class TestGetInventoryByTitle:
     """get_inventory_by_title関数のテスト"""
 
-    @patch('zaico.api.requests.get')
-    def test_success(self, mock_get):
+    @patch('zaico.client.requests.Session.request')
+    def test_success(self, mock_request):
         """タイトルで在庫を検索できる"""
         expected_data = [{'id': 1, 'title': '商品A', 'quantity': '10'}]
-        mock_get.return_value = Mock(
+        mock_request.return_value = Mock(
             status_code=200,
-            json=lambda: expected_data
+            json=lambda: expected_data,
+            headers={},
+            links={}
         )
 
         result = get_inventory_by_title('商品A')
 
         assert result == expected_data
-        mock_get.assert_called_once()
+        mock_request.assert_called_once()
 
-    @patch('zaico.api.requests.get')
-    def test_not_found(self, mock_get):
+    @patch('zaico.client.requests.Session.request')
+    def test_not_found(self, mock_request):
         """該当する在庫がない場合は空リストを返す"""
-        mock_get.return_value = Mock(
+        mock_request.return_value = Mock(
             status_code=200,
-            json=lambda: []
+            json=lambda: [],
+            headers={},
+            links={}
         )
 
         result = get_inventory_by_title('存在しない商品')
@@ -81,11 +158,11 @@ class TestGetInventoryByTitle:
 class TestUpdateInventoryQuantity:
     """update_inventory_quantity関数のテスト"""
 
-    @patch('zaico.api.requests.put')
-    def test_success(self, mock_put):
+    @patch('zaico.client.requests.Session.request')
+    def test_success(self, mock_request):
         """在庫数量を正常に更新できる"""
         expected_data = {'id': 1, 'title': '商品A', 'quantity': '15'}
-        mock_put.return_value = Mock(
+        mock_request.return_value = Mock(
             status_code=200,
             json=lambda: expected_data
         )
@@ -93,12 +170,12 @@ class TestUpdateInventoryQuantity:
         result = update_inventory_quantity(1, 15)
 
         assert result == expected_data
-        mock_put.assert_called_once()
+        mock_request.assert_called_once()
 
-    @patch('zaico.api.requests.put')
-    def test_error(self, mock_put):
+    @patch('zaico.client.requests.Session.request')
+    def test_error(self, mock_request):
         """更新失敗時にNoneを返す"""
-        mock_put.return_value = Mock(
+        mock_request.return_value = Mock(
             status_code=404,
             text='Not Found'
         )
@@ -111,11 +188,11 @@ class TestUpdateInventoryQuantity:
 class TestCreateInventory:
     """create_inventory関数のテスト"""
 
-    @patch('zaico.api.requests.post')
-    def test_success(self, mock_post):
+    @patch('zaico.client.requests.Session.request')
+    def test_success(self, mock_request):
         """新規在庫を正常に登録できる"""
         expected_data = {'id': 3, 'title': '新商品', 'quantity': '5'}
-        mock_post.return_value = Mock(
+        mock_request.return_value = Mock(
             status_code=200,
             json=lambda: expected_data
         )
@@ -124,10 +201,10 @@ class TestCreateInventory:
 
         assert success is True
         assert result == expected_data
-        mock_post.assert_called_once()
+        mock_request.assert_called_once()
 
-    @patch('zaico.api.requests.post')
-    def test_with_optional_params(self, mock_post):
+    @patch('zaico.client.requests.Session.request')
+    def test_with_optional_params(self, mock_request):
         """オプションパラメータ付きで登録できる"""
         expected_data = {
             'id': 4,
@@ -137,7 +214,7 @@ class TestCreateInventory:
             'state': '新品',
             'quantity': '100'
         }
-        mock_post.return_value = Mock(
+        mock_request.return_value = Mock(
             status_code=200,
             json=lambda: expected_data
         )
@@ -153,10 +230,10 @@ class TestCreateInventory:
         assert success is True
         assert result == expected_data
 
-    @patch('zaico.api.requests.post')
-    def test_error(self, mock_post):
+    @patch('zaico.client.requests.Session.request')
+    def test_error(self, mock_request):
         """登録失敗時にFalseとエラーメッセージを返す"""
-        mock_post.return_value = Mock(
+        mock_request.return_value = Mock(
             status_code=400,
             text='Bad Request'
         )
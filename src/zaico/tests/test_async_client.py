@@ -0,0 +1,129 @@
+"""
+ZAICO 非同期APIクライアントモジュールのテスト
+
+httpxのモックトランスポートを使用し、ネットワークに接続せずにテストします。
+"""
+import asyncio
+import json
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from zaico.async_client import AsyncZaicoClient
+from zaico.metrics import get_metrics
+
+
+def _run(handler, scenario, **kwargs):
+    """モックトランスポートを使うクライアントでシナリオを実行する"""
+    async def main():
+        async with AsyncZaicoClient(
+            base_url='https://example.com/api/v1', token='t', rate_limiter=None,
+            transport=httpx.MockTransport(handler), **kwargs
+        ) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+
+def _inventory_handler(total=5, per_page=2):
+    """ページングに対応した在庫一覧を返すハンドラー"""
+    items = [{'id': i, 'title': f'商品{i}', 'quantity': '1'} for i in range(1, total + 1)]
+
+    def handler(request):
+        page = int(request.url.params.get('page', 1))
+        body = items[(page - 1) * per_page:page * per_page]
+        headers = {'Total-Count': str(total)}
+        if page * per_page < total:
+            headers['Link'] = f'<https://example.com/api/v1/inventories?page={page + 1}>; rel="next"'
+        return httpx.Response(200, json=body, headers=headers)
+    return handler
+
+
+class TestAsyncZaicoClient:
+    """AsyncZaicoClientのテスト"""
+
+    def test_list_all_pages(self):
+        """Linkヘッダーをたどって全ページを取得する"""
+        result = _run(_inventory_handler(), lambda c: c.get_zaico_inventories(concurrency=1))
+
+        assert [item['id'] for item in result] == [1, 2, 3, 4, 5]
+
+    def test_list_concurrent_pages(self):
+        """並列取得でもページ順に返す"""
+        result = _run(_inventory_handler(total=9), lambda c: c.get_zaico_inventories(concurrency=3))
+
+        assert [item['id'] for item in result] == list(range(1, 10))
+
+    def test_search_title(self):
+        """商品名の絞り込み条件を送信する"""
+        def handler(request):
+            assert request.url.path == '/api/v1/inventories'
+            assert request.headers['Authorization'] == 'Bearer t'
+            return httpx.Response(200, json=[{'id': 1, 'title': request.url.params['title']}])
+
+        result = _run(handler, lambda c: c.get_inventory_by_title('商品A'))
+
+        assert result == [{'id': 1, 'title': '商品A'}]
+
+    def test_update_retry_after_503(self):
+        """503の後に再試行して成功する"""
+        get_metrics().reset()
+        calls = []
+
+        def handler(request):
+            calls.append(json.loads(request.content))
+            if len(calls) == 1:
+                return httpx.Response(503, headers={'Retry-After': '0'})
+            return httpx.Response(200, json={'code': 200})
+
+        result = _run(handler, lambda c: c.update_inventory_quantity(1, 15))
+
+        assert result == {'code': 200}
+        assert calls == [{'quantity': '15'}, {'quantity': '15'}]
+        assert get_metrics().snapshot()['PUT /api/v1/inventories/{id}']['retry_statuses'] == {'503': 1}
+
+    def test_create_retry_on_connect_timeout(self):
+        """接続確立前にタイムアウトしたPOSTは再試行する"""
+        calls = []
+
+        def handler(request):
+            calls.append(request.method)
+            if len(calls) == 1:
+                raise httpx.ConnectTimeout('connect timeout', request=request)
+            return httpx.Response(200, json={'code': 200})
+
+        result = _run(handler, lambda c: c.create_inventory('商品A'), backoff_factor=0)
+
+        assert result[0] is True
+        assert calls == ['POST', 'POST']
+
+    def test_create_error(self):
+        """登録失敗時にFalseとエラーメッセージを返す"""
+        result = _run(lambda request: httpx.Response(400, text='Bad Request'), lambda c: c.create_inventory('商品A'))
+
+        assert result == (False, 'Bad Request')
+
+    def test_list_error(self):
+        """一覧取得でエラーの場合はNoneを返す"""
+        result = _run(lambda request: httpx.Response(404, text='Not Found'), lambda c: c.get_zaico_inventories())
+
+        assert result is None
+
+    def test_concurrent_page_error_awaits_pending_pages(self):
+        """並列取得中にエラーになった場合は、取り消した残りのページの取得の終了を待つ"""
+        async def handler(request):
+            page = int(request.url.params.get('page', 1))
+            if page == 2:
+                return httpx.Response(404, text='Not Found')
+            if page > 2:
+                await asyncio.sleep(10)
+            headers = {'Total-Count': '8', 'Link': '<https://example.com/api/v1/inventories?page=2>; rel="next"'}
+            return httpx.Response(200, json=[{'id': 1}, {'id': 2}], headers=headers)
+
+        async def scenario(client):
+            result = await client.get_zaico_inventories(concurrency=3)
+            return result, [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+        result, remaining = _run(handler, scenario)
+
+        assert result is None
+        assert remaining == []
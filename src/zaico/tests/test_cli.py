@@ -0,0 +1,87 @@
+"""
+入庫・出庫CLIモジュールのテスト
+
+常駐サービスへの依頼と、起動時に読み込むモジュールの量（起動時間）を確認します。
+"""
+import os
+import subprocess
+import sys
+
+from unittest.mock import patch
+
+from zaico.cli import delegate_movement
+
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# zaico.cli の読み込みにかけてよい時間（マイクロ秒）
+IMPORT_TIME_BUDGET_US = 150_000
+
+# 入庫・出庫CLIの起動時に読み込んではいけないモジュール
+HEAVY_MODULES = ['requests', 'urllib3', 'sqlite3', 'httpx', 'pandas', 'zaico.api', 'zaico.client']
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, '-c', code], cwd=SRC_DIR, capture_output=True, text=True, check=True
+    )
+
+
+class TestDelegateMovement:
+    """delegate_movement関数のテスト"""
+
+    def test_without_daemon_url(self):
+        """ZAICO_DAEMON_URL が未設定なら依頼しない"""
+        with patch('zaico.cli.DAEMON_URL', ''):
+            assert delegate_movement('商品A', '1', 1, '入庫') is None
+
+    def test_unreachable_daemon(self):
+        """接続できなければ呼び出し元で処理する"""
+        with patch('zaico.cli.DAEMON_URL', 'http://127.0.0.1:9'):
+            assert delegate_movement('商品A', '1', 1, '入庫') is None
+
+
+class TestStartup:
+    """起動時間のテスト"""
+
+    def test_import_does_not_load_heavy_modules(self):
+        """import zaico / zaico.cli では requests などを読み込まない"""
+        result = run_python(f'import sys, zaico, zaico.cli; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])')
+
+        assert result.stdout.strip() == '[]'
+
+    def test_package_attributes_are_loaded_on_access(self):
+        """パッケージの属性は参照したときに読み込む"""
+        result = run_python('import zaico; print(zaico.stock_in.__module__, zaico.ZaicoClient.__name__)')
+
+        assert result.stdout.split() == ['zaico.stock_in', 'ZaicoClient']
+
+    def test_import_without_profiling(self):
+        """profiling パッケージがなくてもライブラリとして読み込める"""
+        result = run_python(
+            "import sys; sys.modules['profiling'] = None; "
+            "import zaico.cli, zaico.export_inventory, zaico.register_items, zaico.movements, uriage_suii.reports; "
+            "from zaico._profiling import phase; print(type(phase('x')).__name__)"
+        )
+
+        assert result.stdout.strip() == 'nullcontext'
+
+    def test_script_without_profiling(self):
+        """profiling パッケージがなくても売上推移のエントリースクリプトを実行できる"""
+        result = run_python(
+            "import runpy, sys; sys.modules['profiling'] = None; "
+            "sys.argv = ['uriage_suii.py', '--help']; "
+            "runpy.run_path('uriage_suii/uriage_suii.py', run_name='__main__')"
+        )
+
+        assert '--from' in result.stdout
+
+    def test_import_time_budget(self):
+        """zaico.cli の読み込み時間が予算内に収まる"""
+        timings = []
+        for _ in range(3):
+            stderr = run_python('import zaico.cli', '-X', 'importtime').stderr
+            line = next(line for line in stderr.splitlines() if line.rstrip().endswith('| zaico.cli'))
+            timings.append(int(line.split('|')[1]))
+
+        assert min(timings) < IMPORT_TIME_BUDGET_US
@@ -0,0 +1,111 @@
+"""
+ZAICO HTTPクライアントモジュールのテスト
+
+接続の共有と再試行処理のユニットテストを提供します。
+"""
+import pytest
+import requests
+from unittest.mock import patch, Mock
+
+from zaico.client import ZaicoClient, parse_retry_after, get_client, set_client
+
+
+class TestZaicoClientRetry:
+    """ZaicoClient.request の再試行処理のテスト"""
+
+    @patch('zaico.client.time.sleep')
+    @patch('zaico.client.requests.Session.request')
+    def test_retry_then_success(self, mock_request, mock_sleep):
+        """503の後に成功すれば成功レスポンスを返す"""
+        mock_request.side_effect = [
+            Mock(status_code=503, headers={}),
+            Mock(status_code=200, headers={})
+        ]
+        client = ZaicoClient(base_url='https://example.com/api', token='t')
+
+        response = client.get('/inventories')
+
+        assert response.status_code == 200
+        assert mock_request.call_count == 2
+        mock_sleep.assert_called_once()
+
+    @patch('zaico.client.time.sleep')
+    @patch('zaico.client.requests.Session.request')
+    def test_retry_after_header(self, mock_request, mock_sleep):
+        """429応答のRetry-Afterヘッダーの秒数だけ待機する"""
+        mock_request.side_effect = [
+            Mock(status_code=429, headers={'Retry-After': '7'}),
+            Mock(status_code=200, headers={})
+        ]
+        client = ZaicoClient(base_url='https://example.com/api', token='t')
+
+        client.get('/inventories')
+
+        mock_sleep.assert_called_once_with(7.0)
+
+    @patch('zaico.client.time.sleep')
+    @patch('zaico.client.requests.Session.request')
+    def test_post_not_retried_on_500(self, mock_request, mock_sleep):
+        """POSTは重複登録を避けるため500では再試行しない"""
+        mock_request.return_value = Mock(status_code=500, headers={})
+        client = ZaicoClient(base_url='https://example.com/api', token='t')
+
+        response = client.post('/inventories', json={'title': 'A'})
+
+        assert response.status_code == 500
+        mock_request.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch('zaico.client.time.sleep')
+    @patch('zaico.client.requests.Session.request')
+    def test_connection_error_raised_after_retries(self, mock_request, mock_sleep):
+        """通信エラーが続く場合は再試行後に例外を送出する"""
+        mock_request.side_effect = requests.ConnectionError('down')
+        client = ZaicoClient(base_url='https://example.com/api', token='t', max_retries=2)
+
+        with pytest.raises(requests.ConnectionError):
+            client.put('/inventories/1', json={'quantity': '1'})
+
+        assert mock_request.call_count == 3
+
+    def test_backoff_is_bounded(self):
+        """待ち時間は上限値を超えない"""
+        client = ZaicoClient(token='t', backoff_factor=1.0, backoff_max=4.0)
+
+        delays = [client._backoff(attempt) for attempt in range(10)]
+
+        assert all(0 < d <= 4.0 for d in delays)
+
+
+class TestParseRetryAfter:
+    """parse_retry_after関数のテスト"""
+
+    def test_seconds(self):
+        assert parse_retry_after('3') == 3.0
+
+    def test_past_http_date(self):
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+    def test_invalid(self):
+        assert parse_retry_after('soon') is None
+        assert parse_retry_after(None) is None
+
+
+class TestSharedClient:
+    """get_client / set_client のテスト"""
+
+    def test_shared_instance(self):
+        """同じクライアントが共有される"""
+        set_client(None)
+
+        assert get_client() is get_client()
+
+    def test_replace_client(self):
+        """クライアントを差し替えられる"""
+        client = ZaicoClient(base_url='http://localhost:8000', token='t')
+        set_client(client)
+
+        assert get_client() is client
+
+        set_client(None)
+
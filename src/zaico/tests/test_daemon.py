@@ -0,0 +1,130 @@
+"""
+入出庫常駐サービスのテスト
+
+ZAICO APIスタブに対して常駐サービスを起動し、HTTP・監視ディレクトリからの入出庫を確認します。
+"""
+import json
+import time
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from zaico.client import ZaicoClient, set_client
+from zaico.cli import send_movement
+from zaico.daemon import MovementDaemon
+from zaico.index import InventoryIndex, set_index
+from zaico.journal import MovementJournal
+from zaico.stub import ZaicoStub, make_inventories
+
+
+@pytest.fixture
+def stub():
+    """
+    在庫5件のスタブを起動し、共有クライアントの接続先にする
+    """
+    with ZaicoStub(make_inventories(5)) as server:
+        set_client(ZaicoClient(base_url=server.base_url, token='test', rate_limit=0))
+        set_index(InventoryIndex(':memory:'))
+        yield server
+        set_index(None)
+
+
+def quantity(stub, title):
+    return next(item['quantity'] for item in stub.inventories if item['title'] == title)
+
+
+class TestMovementDaemon:
+    """MovementDaemonのテスト"""
+
+    def test_http_movement(self, stub):
+        """HTTPで受け付けた入出庫を反映し、結果を返す"""
+        before = int(quantity(stub, '商品000001'))
+
+        with MovementDaemon(port=0, drop_dir=None) as daemon:
+            result = send_movement('商品000001', 3, url=daemon.url)
+            second = send_movement('商品000001', -1, url=daemon.url)
+            missing = send_movement('存在しない商品', 1, url=daemon.url)
+
+        assert result['ok'] is True and result['new_quantity'] == before + 3
+        assert second['new_quantity'] == before + 2
+        assert quantity(stub, '商品000001') == str(before + 2)
+        assert missing['ok'] is False
+
+    def test_apply_error_returns_500(self, stub):
+        """反映中の例外は 500 で応答し、依頼元には失敗として返す"""
+        with MovementDaemon(port=0, drop_dir=None) as daemon:
+            with patch('zaico.daemon.apply_movement', side_effect=requests.ConnectionError('connection reset')):
+                request = urllib.request.Request(
+                    f'{daemon.url}/movements', data=json.dumps({'title': '商品000001', 'delta': 1}).encode('utf-8'), method='POST'
+                )
+                with pytest.raises(urllib.error.HTTPError) as excinfo:
+                    urllib.request.urlopen(request, timeout=5)
+                result = send_movement('商品000001', 1, url=daemon.url)
+
+        assert excinfo.value.code == 500
+        assert result['ok'] is False
+        assert 'connection reset' in result['message']
+
+    def test_index_is_reused(self, stub):
+        """2回目以降は商品名の検索を省略する"""
+        with MovementDaemon(port=0, drop_dir=None) as daemon:
+            send_movement('商品000002', 1, url=daemon.url)
+            count = stub.request_count
+            send_movement('商品000002', 1, url=daemon.url)
+
+        # 2回目は在庫IDでの最新の数量の取得・数量の更新・更新後の照合のみ
+        assert stub.request_count == count + 3
+
+    def test_verify_by_default(self, stub):
+        """常駐サービスは既定で更新前後に最新の在庫と照合する"""
+        assert MovementDaemon(port=0, drop_dir=None).verify is True
+        assert MovementDaemon(port=0, drop_dir=None, verify=False).verify is False
+
+    def test_journal_with_http(self, stub, tmp_path):
+        """ジャーナルとHTTPの同じ商品への入出庫が重なっても、どちらも反映する"""
+        before = int(quantity(stub, '商品000004'))
+        journal = MovementJournal(str(tmp_path / 'journal.jsonl'))
+        journal.append('商品000004', 10)
+
+        with MovementDaemon(port=0, drop_dir=None, journal=journal) as daemon:
+            result = send_movement('商品000004', 5, url=daemon.url)
+            for _ in range(100):
+                if not journal.pending():
+                    break
+                time.sleep(0.05)
+
+        assert result['ok'] is True
+        assert journal.pending() == []
+        assert quantity(stub, '商品000004') == str(before + 15)
+
+    def test_journal_uses_coalescer(self, stub, tmp_path):
+        """ジャーナルの入出庫も MovementCoalescer を通して反映する"""
+        journal = MovementJournal(str(tmp_path / 'journal.jsonl'))
+        journal.append('商品000005', 1)
+        daemon = MovementDaemon(port=0, drop_dir=None, journal=journal)
+        try:
+            assert daemon.journal_applier.drain()['applied'] == 1
+        finally:
+            daemon.stop()
+
+        assert daemon.processed == 1
+
+    def test_drop_dir(self, stub, tmp_path):
+        """監視ディレクトリの入出庫ファイルを反映し、done/ へ移動する"""
+        before = int(quantity(stub, '商品000003'))
+        (tmp_path / 'scan.csv').write_text('物品名,数量\n商品000003,2\n商品000003,3\n', encoding='utf-8')
+        (tmp_path / 'bad.jsonl').write_text('{"title": "存在しない商品", "delta": 1}\n', encoding='utf-8')
+
+        daemon = MovementDaemon(port=0, drop_dir=str(tmp_path))
+        try:
+            assert daemon.scan_drop_dir() == 2
+        finally:
+            daemon.stop()
+
+        assert quantity(stub, '商品000003') == str(before + 5)
+        assert (tmp_path / 'done' / 'scan.csv').exists()
+        assert (tmp_path / 'failed' / 'bad.jsonl').exists()
+
@@ -0,0 +1,187 @@
+"""
+在庫エクスポートモジュールのテスト
+
+export_inventories_to_csv, export_inventories_delta 関数のユニットテストを提供します。
+"""
+import csv
+import io
+import pytest
+import requests
+from unittest.mock import patch
+
+from zaico.api import ZaicoAPIError
+from zaico.config import INVENTORY_CSV_COLUMNS
+from zaico.export_inventory import export_inventories_delta, export_inventories_to_csv, write_inventories_csv
+
+
+def _pages():
+    yield [{'id': 1, 'title': '商品A', 'quantity': '10'}]
+    yield [{'id': 2, 'title': '商品B', 'quantity': '20', 'stocktake_attributes': {'checked_at': '2024-01-01'}}]
+
+
+def _failing_pages():
+    yield [{'id': 1, 'title': '商品A', 'quantity': '10'}]
+    raise ZaicoAPIError(500, 'Internal Server Error')
+
+
+class TestWriteInventoriesCsv:
+    """write_inventories_csv関数のテスト"""
+
+    def test_write_pages(self):
+        """ページごとに行を書き出し、件数を返す"""
+        f = io.StringIO()
+
+        count = write_inventories_csv(_pages(), f)
+
+        rows = list(csv.reader(io.StringIO(f.getvalue())))
+        assert count == 2
+        assert rows[0] == INVENTORY_CSV_COLUMNS
+        assert rows[1][:2] == ['1', '商品A']
+        assert rows[2][11] == '2024-01-01'
+
+
+class TestExportInventoriesToCsv:
+    """export_inventories_to_csv関数のテスト"""
+
+    @patch('zaico.export_inventory.iter_inventory_pages')
+    def test_export_to_file(self, mock_pages, tmp_path):
+        """指定したファイルに出力できる"""
+        mock_pages.return_value = _pages()
+        filename = tmp_path / 'out.csv'
+
+        result = export_inventories_to_csv(str(filename))
+
+        assert result is True
+        assert len(filename.read_text(encoding='utf-8').splitlines()) == 3
+        assert not (tmp_path / 'out.csv.part').exists()
+
+    @patch('zaico.export_inventory.iter_inventory_pages')
+    def test_export_to_file_object(self, mock_pages):
+        """ファイルオブジェクトに出力できる"""
+        mock_pages.return_value = _pages()
+        output = io.StringIO()
+
+        result = export_inventories_to_csv(output=output)
+
+        assert result is True
+        assert '商品B' in output.getvalue()
+
+    @patch('zaico.export_inventory.iter_inventory_pages')
+    def test_api_error_leaves_no_file(self, mock_pages, tmp_path):
+        """取得途中でエラーになった場合はFalseを返し、ファイルを残さない"""
+        mock_pages.return_value = _failing_pages()
+        filename = tmp_path / 'out.csv'
+
+        result = export_inventories_to_csv(str(filename))
+
+        assert result is False
+        assert list(tmp_path.iterdir()) == []
+
+
+def _dated_pages(*items):
+    yield [
+        {'id': inventory_id, 'title': title, 'quantity': '1', 'updated_at': updated_at}
+        for inventory_id, title, updated_at in items
+    ]
+
+
+class TestExportInventoriesDelta:
+    """export_inventories_delta関数のテスト"""
+
+    @patch('zaico.export_inventory.iter_inventory_pages')
+    def test_only_updated_since_last_export(self, mock_pages, tmp_path):
+        """2回目は前回の最大 updated_at 以降に更新された在庫のみ出力する"""
+        state = str(tmp_path / 'state.json')
+        mock_pages.return_value = _dated_pages(
+            (1, '商品A', '2024-01-01T10:00:00+09:00'),
+            (2, '商品B', '2024-01-02T10:00:00+09:00'),
+        )
+        assert export_inventories_delta(str(tmp_path / 'first.csv'), state_path=state) is True
+
+        mock_pages.return_value = _dated_pages(
+            (1, '商品A', '2024-01-01T10:00:00+09:00'),
+            (2, '商品B', '2024-01-02T10:00:00+09:00'),
+            (3, '商品C', '2024-01-03T10:00:00+09:00'),
+        )
+        assert export_inventories_delta(str(tmp_path / 'second.csv'), state_path=state) is True
+
+        rows = list(csv.reader(io.StringIO((tmp_path / 'second.csv').read_text(encoding='utf-8'))))
+        assert [row[1] for row in rows[1:]] == ['商品B', '商品C']
+
+    @patch('zaico.export_inventory.iter_inventory_pages')
+    def test_failure_keeps_watermark(self, mock_pages, tmp_path):
+        """取得に失敗した場合は状態ファイルを更新しない"""
+        state = tmp_path / 'state.json'
+        mock_pages.return_value = _failing_pages()
+
+        assert export_inventories_delta(str(tmp_path / 'out.csv'), state_path=str(state)) is False
+        assert not state.exists()
+
+    @patch('zaico.export_inventory.iter_inventory_pages')
+    def test_merge_into_snapshot(self, mock_pages, tmp_path):
+        """スナップショットの行を置き換え・追加し、一覧にない在庫を削除する"""
+        state = str(tmp_path / 'state.json')
+        snapshot = tmp_path / 'snapshot.csv'
+        mock_pages.return_value = _dated_pages(
+            (1, '商品A', '2024-01-01T10:00:00+09:00'),
+            (2, '商品B', '2024-01-01T10:00:00+09:00'),
+        )
+        assert export_inventories_delta(snapshot_path=str(snapshot), state_path=state) is True
+
+        mock_pages.return_value = _dated_pages(
+            (1, '商品A改', '2024-01-02T10:00:00+09:00'),
+            (3, '商品C', '2024-01-02T10:00:00+09:00'),
+        )
+        assert export_inventories_delta(snapshot_path=str(snapshot), state_path=state) is True
+
+        rows = list(csv.reader(io.StringIO(snapshot.read_text(encoding='utf-8'))))
+        assert rows[0] == INVENTORY_CSV_COLUMNS
+        assert [(row[0], row[1]) for row in rows[1:]] == [('1', '商品A改'), ('3', '商品C')]
+
+    @patch('zaico.export_inventory.iter_inventory_pages')
+    def test_missing_snapshot_is_rebuilt(self, mock_pages, tmp_path):
+        """状態ファイルが残っていてもスナップショットがなければ全件を出力する"""
+        snapshot = tmp_path / 'snapshot.csv'
+        mock_pages.return_value = _dated_pages(
+            (1, '商品A', '2024-01-01T10:00:00+09:00'),
+            (2, '商品B', '2024-01-02T10:00:00+09:00'),
+        )
+        assert export_inventories_delta(snapshot_path=str(snapshot)) is True
+        assert (tmp_path / 'snapshot.state.json').exists()
+        snapshot.unlink()
+
+        mock_pages.return_value = _dated_pages(
+            (1, '商品A', '2024-01-01T10:00:00+09:00'),
+            (2, '商品B', '2024-01-02T10:00:00+09:00'),
+        )
+        assert export_inventories_delta(snapshot_path=str(snapshot)) is True
+
+        rows = list(csv.reader(io.StringIO(snapshot.read_text(encoding='utf-8'))))
+        assert [row[1] for row in rows[1:]] == ['商品A', '商品B']
+
+    @patch('zaico.export_inventory.iter_inventory_pages')
+    def test_state_of_other_target_is_ignored(self, mock_pages, tmp_path):
+        """別の出力先の状態ファイルを指定した場合はウォーターマークを使用しない"""
+        state = str(tmp_path / 'state.json')
+        mock_pages.return_value = _dated_pages((2, '商品B', '2024-01-02T10:00:00+09:00'))
+        assert export_inventories_delta(str(tmp_path / 'delta.csv'), state_path=state) is True
+
+        mock_pages.return_value = _dated_pages((1, '商品A', '2024-01-01T10:00:00+09:00'))
+        snapshot = tmp_path / 'snapshot.csv'
+        snapshot.write_text(','.join(INVENTORY_CSV_COLUMNS) + '\n', encoding='utf-8')
+        assert export_inventories_delta(snapshot_path=str(snapshot), state_path=state) is True
+
+        rows = list(csv.reader(io.StringIO(snapshot.read_text(encoding='utf-8'))))
+        assert [row[1] for row in rows[1:]] == ['商品A']
+
+    @patch('zaico.export_inventory.iter_inventory_pages')
+    def test_network_error(self, mock_pages, tmp_path, caplog):
+        """通信エラーはCSVの書き込みエラーとして記録しない"""
+        def pages():
+            raise requests.ConnectionError('connection refused')
+            yield []
+        mock_pages.return_value = pages()
+
+        assert export_inventories_delta(str(tmp_path / 'out.csv'), state_path=str(tmp_path / 'state.json')) is False
+        assert '通信エラー' in caplog.text
+        assert 'CSV書き込みエラー' not in caplog.text
@@ -0,0 +1,161 @@
+"""
+在庫インデックスモジュールのテスト
+
+InventoryIndex と、インデックスを利用した入庫処理のユニットテストを提供します。
+"""
+import time
+
+import pytest
+from unittest.mock import patch
+
+from zaico.api import get_inventory_by_title, update_inventory_quantity
+from zaico.client import ZaicoClient, set_client
+from zaico.index import InventoryIndex, set_index
+from zaico.quantity import apply_quantity_delta
+from zaico.stock_in import stock_in
+from zaico.stub import ZaicoStub, make_inventories
+
+
+@pytest.fixture
+def index():
+    index = InventoryIndex(':memory:', ttl=60)
+    set_index(index)
+    yield index
+    set_index(None)
+    index.close()
+
+
+class TestInventoryIndex:
+    """InventoryIndexのテスト"""
+
+    def test_lookup(self, index):
+        """商品名・バーコードで検索できる"""
+        index.store([{'id': 1, 'title': '商品A', 'code': '4901', 'quantity': '10'}])
+
+        assert index.lookup_title('商品A')['id'] == 1
+        assert index.lookup_code('4901')['id'] == 1
+        assert index.lookup_title('商品B') is None
+
+    def test_expired_entry_is_miss(self, index):
+        """有効期間を過ぎたデータは検索結果に含めない"""
+        index.store([{'id': 1, 'title': '商品A'}])
+        index.ttl = -1
+
+        assert index.lookup_title('商品A') is None
+        assert index.evict_expired() == 1
+
+    def test_refresh(self, index):
+        """updated_atが変わった在庫のみ更新し、一覧にない在庫は削除する"""
+        index.store([
+            {'id': 1, 'title': '商品A', 'updated_at': 't1'},
+            {'id': 2, 'title': '商品B', 'updated_at': 't1'},
+        ])
+
+        counts = index.refresh([[
+            {'id': 1, 'title': '商品A', 'updated_at': 't1'},
+            {'id': 3, 'title': '商品C', 'updated_at': 't2'},
+        ]])
+
+        assert counts == {'changed': 1, 'unchanged': 1, 'removed': 1}
+        assert index.lookup_title('商品B') is None
+        assert index.lookup_title('商品C')['id'] == 3
+
+
+class TestStockInWithIndex:
+    """インデックスを利用した stock_in のテスト"""
+
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
+    @patch('zaico.stock_in.get_inventory_by_title')
+    def test_skip_lookup_on_hit(self, mock_get, mock_latest, mock_update, index):
+        """インデックスにある商品は検索せず、最新の数量を在庫IDで取得して更新する"""
+        index.store([{'id': 1, 'title': '商品A', 'quantity': '10'}])
+        mock_latest.side_effect = [{'id': 1, 'title': '商品A', 'quantity': '10'}, {'id': 1, 'title': '商品A', 'quantity': '15'}]
+        mock_update.return_value = {'code': 200}
+
+        assert stock_in('商品A', '5') is True
+        assert stock_in('商品A', '5') is True
+
+        mock_get.assert_not_called()
+        assert [c.args for c in mock_latest.call_args_list] == [(1,), (1,)]
+        assert [c.args for c in mock_update.call_args_list] == [(1, 15), (1, 20)]
+
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
+    @patch('zaico.stock_in.get_inventory_by_title')
+    def test_fallback_to_api_on_miss(self, mock_get, mock_latest, mock_update, index):
+        """インデックスにない商品はAPIで検索し、インデックスに登録する"""
+        mock_get.return_value = [{'id': 2, 'title': '商品B', 'quantity': '3'}]
+        mock_latest.return_value = {'id': 2, 'title': '商品B', 'quantity': '3'}
+        mock_update.return_value = {'code': 200}
+
+        assert stock_in('商品B', '1') is True
+
+        assert index.lookup_title('商品B')['quantity'] == '4'
+
+    def test_stale_index_quantity_is_not_used(self, index):
+        """他の経路で変更された数量を上書きせず、最新の数量に加算する"""
+        with ZaicoStub(make_inventories(1)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            item = dict(stub.inventories[0], quantity='101')
+            index.store([item])
+            # ZAICOの画面など他の経路で数量が変更された
+            update_inventory_quantity(item['id'], 50)
+
+            assert stock_in(item['title'], '1') is True
+
+            assert stub.inventories[0]['quantity'] == '51'
+
+    def test_request_count_without_index(self):
+        """インデックスなしでは商品名の検索と数量更新の2回で入庫し、検索結果の数量をそのまま使う"""
+        with ZaicoStub(make_inventories(1)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            item = stub.inventories[0]
+            count = stub.request_count
+
+            assert stock_in(item['title'], '1') is True
+
+            assert stub.request_count == count + 2
+            assert stub.inventories[0]['quantity'] == str(int(item['quantity']) + 1)
+
+    def test_request_count_with_index(self, index):
+        """インデックスから引いた場合は検索を省略し、在庫IDでの取得と数量更新の2回で入庫する"""
+        with ZaicoStub(make_inventories(1)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            item = stub.inventories[0]
+            index.store([item])
+            count = stub.request_count
+
+            assert stock_in(item['title'], '1') is True
+
+            assert stub.request_count == count + 2
+            assert stub.inventories[0]['quantity'] == str(int(item['quantity']) + 1)
+
+    def test_overwritten_search_result_is_fetched_again(self):
+        """このプロセスが更新した後の古い検索結果は使わず、最新の数量を取得し直す"""
+        with ZaicoStub(make_inventories(1)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            item = stub.inventories[0]
+            before = int(item['quantity'])
+            first = get_inventory_by_title(item['title'])[0]
+            second = get_inventory_by_title(item['title'])[0]
+
+            assert apply_quantity_delta(item['id'], 10, first).ok
+            count = stub.request_count
+            assert apply_quantity_delta(item['id'], 5, second).ok
+
+            # 2回目は検索結果が古いため、在庫IDでの取得と数量更新の2回
+            assert stub.request_count == count + 2
+            assert stub.inventories[0]['quantity'] == str(before + 15)
+
+    def test_local_update_does_not_extend_ttl(self, index):
+        """入出庫による更新では同期日時を更新しない（有効期間は最後の同期から数える）"""
+        index.store([{'id': 1, 'title': '商品A', 'quantity': '10'}])
+        index.ttl = 0.2
+        time.sleep(0.3)
+
+        index.store([{'id': 1, 'title': '商品A', 'quantity': '11'}], synced=False)
+        index.store([{'id': 2, 'title': '商品B', 'quantity': '1'}], synced=False)
+
+        assert index.lookup_title('商品A') is None
+        assert index.lookup_title('商品B') is None
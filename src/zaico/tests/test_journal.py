@@ -0,0 +1,211 @@
+"""
+入出庫ジャーナルモジュールのテスト
+
+記録・反映済みの管理・圧縮・バックグラウンド反映・再起動時の反映し直しを確認します。
+"""
+import threading
+import time
+from unittest.mock import patch
+
+from zaico.cli import record_movement
+from zaico.client import ZaicoClient, set_client
+from zaico.journal import JournalApplier, MovementJournal
+from zaico.movements import MovementResult, apply_movements
+from zaico.stub import ZaicoStub, make_inventories
+
+
+def ok_results(deltas):
+    return [MovementResult(title, delta, True, 10, '') for title, delta in deltas.items()]
+
+
+class TestMovementJournal:
+    """MovementJournalのテスト"""
+
+    def test_append_and_mark_applied(self, tmp_path):
+        """記録した入出庫は反映済みにするまで未反映として残る"""
+        journal = MovementJournal(str(tmp_path / 'journal.jsonl'))
+        first = journal.append('商品A', 5)
+        second = journal.append('商品B', -2)
+
+        assert [entry.id for entry in journal.pending()] == [first.id, second.id]
+
+        journal.mark_applied([first.id], 15)
+        assert journal.pending() == [second]
+
+    def test_compact(self, tmp_path):
+        """圧縮すると反映済みの入出庫だけが削除される"""
+        journal = MovementJournal(str(tmp_path / 'journal.jsonl'))
+        applied = journal.append('商品A', 5)
+        pending = journal.append('商品B', 1)
+        failed = journal.append('商品C', 1)
+        journal.mark_applied([applied.id])
+        journal.mark_failed([failed.id], '商品が見つかりません')
+
+        journal.compact()
+
+        state = MovementJournal(journal.path).state()
+        assert state.pending == [pending]
+        assert state.failed == [failed]
+        assert state.failures == {failed.id: '商品が見つかりません'}
+        assert len((tmp_path / 'journal.jsonl').read_text(encoding='utf-8').splitlines()) == 3
+
+    def test_partial_line_is_skipped(self, tmp_path):
+        """書き込み途中で終了した行は無視し、続けて記録できる"""
+        path = tmp_path / 'journal.jsonl'
+        journal = MovementJournal(str(path))
+        kept = journal.append('商品A', 1)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"type": "movement", "id": "x", "ti')
+
+        added = journal.append('商品B', 2)
+
+        assert journal.pending() == [kept, added]
+
+
+class TestJournalApplier:
+    """JournalApplierのテスト"""
+
+    def test_drain_aggregates_by_title(self, tmp_path):
+        """同一商品の入出庫は合算して1回で反映する"""
+        journal = MovementJournal(str(tmp_path / 'journal.jsonl'))
+        journal.append('商品A', 5)
+        journal.append('商品A', -2)
+        journal.append('商品B', 1)
+        calls = []
+
+        def apply(deltas):
+            calls.append(deltas)
+            return ok_results(deltas)
+
+        totals = JournalApplier(journal, apply).drain()
+
+        assert calls == [{'商品A': 3.0, '商品B': 1.0}]
+        assert totals == {'applied': 3, 'retry': 0, 'failed': 0}
+        assert journal.pending() == []
+        assert (tmp_path / 'journal.jsonl').read_text(encoding='utf-8') == ''
+
+    def test_lookup_error_is_retried(self, tmp_path):
+        """商品の検索に失敗した場合は未反映のまま残す"""
+        journal = MovementJournal(str(tmp_path / 'journal.jsonl'))
+        journal.append('商品A', 5)
+
+        counts = JournalApplier(journal, lambda deltas: None).drain_once()
+
+        assert counts['retry'] == 1
+        assert len(journal.pending()) == 1
+
+    def test_failed_after_max_attempts(self, tmp_path):
+        """max_attempts 回失敗した入出庫は反映できなかった入出庫として記録し、記録し直せる"""
+        journal = MovementJournal(str(tmp_path / 'journal.jsonl'))
+        journal.append('商品A', 5)
+        applier = JournalApplier(
+            journal,
+            lambda deltas: [MovementResult(title, delta, False, None, '数量更新に失敗しました') for title, delta in deltas.items()],
+            max_attempts=2
+        )
+
+        assert applier.drain_once()['retry'] == 1
+        assert applier.drain_once()['failed'] == 1
+        assert journal.pending() == []
+        assert len(journal.state().failed) == 1
+
+        assert journal.requeue_failed() == 1
+        assert [entry.title for entry in journal.pending()] == ['商品A']
+        assert journal.state().failed == []
+
+    def test_unconfirmed_write_is_not_retried(self, tmp_path):
+        """数量を書き込んだ後の確認で失敗した入出庫は、二重に反映しないよう再試行しない"""
+        journal = MovementJournal(str(tmp_path / 'journal.jsonl'))
+        journal.append('商品A', 5)
+        applier = JournalApplier(
+            journal,
+            lambda deltas: [MovementResult(title, delta, False, 15, '上書き') for title, delta in deltas.items()],
+            max_attempts=3
+        )
+
+        assert applier.drain_once()['failed'] == 1
+        assert journal.pending() == []
+
+    def test_transient_failures_are_not_counted(self, tmp_path):
+        """通信エラーなど一時的な失敗は回数に数えず、間隔を倍増させながら再試行し続ける"""
+        journal = MovementJournal(str(tmp_path / 'journal.jsonl'))
+        journal.append('商品A', 5)
+        applier = JournalApplier(
+            journal,
+            lambda deltas: [MovementResult(title, delta, False, None, '503', True) for title, delta in deltas.items()],
+            interval=1, max_attempts=2, backoff_max=5
+        )
+
+        delays = []
+        for _ in range(5):
+            assert applier.drain_once()['retry'] == 1
+            delays.append(applier.retry_delay())
+
+        assert delays == [2, 4, 5, 5, 5]
+        assert len(journal.pending()) == 1
+        assert journal.state().failed == []
+
+        applier._apply = ok_results
+        assert applier.drain_once()['applied'] == 1
+        assert applier.retry_delay() == 1
+
+    def test_concurrent_drains_apply_once(self, tmp_path):
+        """同じジャーナルを2つの反映処理が同時に反映しても、入出庫は1回だけ反映する"""
+        path = str(tmp_path / 'journal.jsonl')
+        MovementJournal(path).append('商品A', 5)
+        calls = []
+
+        def apply(deltas):
+            calls.append(deltas)
+            time.sleep(0.1)
+            return ok_results(deltas)
+
+        # 別のプロセスと同じく、別々に開いたジャーナルを使う
+        appliers = [JournalApplier(MovementJournal(path), apply) for _ in range(2)]
+        threads = [threading.Thread(target=applier.drain) for applier in appliers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == [{'商品A': 5.0}]
+        assert MovementJournal(path).pending() == []
+
+    def test_replay_on_restart(self, tmp_path):
+        """前回反映できなかった入出庫を、起動時にZAICOへ反映し直す"""
+        path = str(tmp_path / 'journal.jsonl')
+        MovementJournal(path).append('商品000001', 4)
+
+        with ZaicoStub(make_inventories(3)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            before = int(stub.inventories[0]['quantity'])
+
+            applier = JournalApplier(MovementJournal(path), apply_movements, interval=0.05).start()
+            try:
+                for _ in range(100):
+                    if not applier.journal.pending():
+                        break
+                    time.sleep(0.05)
+            finally:
+                applier.stop()
+
+            assert stub.inventories[0]['quantity'] == str(before + 4)
+        assert MovementJournal(path).pending() == []
+
+
+class TestRecordMovement:
+    """record_movement関数のテスト"""
+
+    def test_record(self, tmp_path):
+        """ZAICO_JOURNAL_PATH が設定されていれば記録だけを行う"""
+        path = str(tmp_path / 'journal.jsonl')
+        with patch('zaico.cli.JOURNAL_PATH', path):
+            assert record_movement('商品A', '3', -1, '出庫') is True
+            assert record_movement('商品A', 'x', -1, '出庫') is False
+
+        assert [(entry.title, entry.delta) for entry in MovementJournal(path).pending()] == [('商品A', -3.0)]
+
+    def test_without_journal(self):
+        """ZAICO_JOURNAL_PATH が未設定なら記録しない"""
+        with patch('zaico.cli.JOURNAL_PATH', ''):
+            assert record_movement('商品A', '3', 1, '入庫') is None
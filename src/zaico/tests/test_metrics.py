@@ -0,0 +1,138 @@
+"""
+APIメトリクスモジュールのテスト
+
+集計・百分位数・Prometheus形式の出力と、ZaicoClient からの記録を確認します。
+"""
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+from zaico.api import get_inventory
+from zaico.client import ZaicoClient, set_client
+from zaico.metrics import MetricsRegistry, MetricsReporter, endpoint_for, get_metrics, percentile
+from zaico.stub import ZaicoStub, make_inventories
+
+
+@pytest.fixture
+def metrics():
+    """
+    共有メトリクスを空にしてから使用する
+    """
+    get_metrics().reset()
+    yield get_metrics()
+    get_metrics().reset()
+
+
+class TestMetricsRegistry:
+    """MetricsRegistryのテスト"""
+
+    def test_endpoint_for(self):
+        """クエリを除き、数値のパス要素を {id} にまとめる"""
+        assert endpoint_for('https://web.zaico.co.jp/api/v1/inventories/123?page=2') == '/api/v1/inventories/{id}'
+        assert endpoint_for('/inventories?title=A') == '/inventories'
+
+    def test_percentile(self):
+        """最近傍法で百分位数を求める"""
+        values = [float(i) for i in range(1, 101)]
+
+        assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50.0, 95.0, 99.0)
+        assert percentile([], 50) == 0.0
+
+    def test_snapshot(self):
+        """エンドポイントごとに件数・ステータス・再試行・バイト数・所要時間を集計する"""
+        registry = MetricsRegistry(buckets=[0.1, 1.0])
+        registry.record('GET', '/api/v1/inventories/1', 200, 0.05, bytes_received=100)
+        registry.record('get', '/api/v1/inventories/2', 200, 0.5, retries=2, bytes_received=50, wait=0.2)
+        registry.record('GET', '/api/v1/inventories/3', 'error', 3.0)
+
+        stats = registry.snapshot()['GET /api/v1/inventories/{id}']
+
+        assert stats['count'] == 3
+        assert stats['statuses'] == {'200': 2, 'error': 1}
+        assert stats['retries'] == 2
+        assert stats['bytes_received'] == 150
+        assert stats['wait_sum'] == pytest.approx(0.2)
+        assert (stats['p50'], stats['p99']) == (0.5, 3.0)
+        assert stats['buckets'] == {0.1: 1, 1.0: 2}
+
+    def test_prometheus(self, tmp_path):
+        """Prometheus の textfile 形式で書き出す"""
+        registry = MetricsRegistry(buckets=[0.1])
+        registry.record('PUT', '/api/v1/inventories/1', 200, 0.05, bytes_sent=20)
+        path = tmp_path / 'zaico.prom'
+
+        registry.write_textfile(str(path))
+
+        text = path.read_text(encoding='utf-8')
+        assert 'zaico_api_requests_total{method="PUT",endpoint="/api/v1/inventories/{id}",status="200"} 1' in text
+        assert 'zaico_api_sent_bytes_total{method="PUT",endpoint="/api/v1/inventories/{id}"} 20' in text
+        assert 'zaico_api_request_duration_seconds_bucket{method="PUT",endpoint="/api/v1/inventories/{id}",le="+Inf"} 1' in text
+
+    def test_reporter_summary(self):
+        """定期出力では要約を1行で出力する"""
+        registry = MetricsRegistry()
+        registry.record('GET', '/api/v1/inventories', 200, 0.1)
+        stream = io.StringIO()
+
+        MetricsReporter(registry, interval=60, stream=stream).flush()
+
+        assert stream.getvalue().startswith('APIメトリクス: GET /api/v1/inventories 1件 (200:1)')
+
+
+class TestClientMetrics:
+    """ZaicoClientからの記録のテスト"""
+
+    def test_record_requests(self, metrics):
+        """APIリクエストごとにステータス・受信バイト数を記録する"""
+        with ZaicoStub(make_inventories(3)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            get_inventory(1)
+            get_inventory(2)
+
+        stats = metrics.snapshot()['GET /api/v1/inventories/{id}']
+        assert stats['count'] == 2
+        assert stats['statuses'] == {'200': 2}
+        assert stats['bytes_received'] > 0
+
+    def test_record_retries(self, metrics):
+        """再試行した回数と最終的なステータスを記録する"""
+        with ZaicoStub(make_inventories(1), error_rate=1.0, error_statuses=(503,)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0, max_retries=2, backoff_factor=0))
+            get_inventory(1)
+
+        stats = metrics.snapshot()['GET /api/v1/inventories/{id}']
+        assert stats['statuses'] == {'503': 1}
+        assert stats['retries'] == 2
+        # 再試行した試行のステータスも記録する
+        assert stats['retry_statuses'] == {'503': 2}
+
+    def test_record_retry_statuses_in_output(self):
+        """再試行した試行のステータスを要約・Prometheus形式に含める"""
+        registry = MetricsRegistry()
+        registry.record_retry('GET', '/api/v1/inventories', 429)
+        registry.record('GET', '/api/v1/inventories', 200, 0.1, retries=1)
+
+        assert '再試行1回 (429:1)' in registry.summary()
+        assert 'zaico_api_retried_responses_total{method="GET",endpoint="/api/v1/inventories",status="429"} 1' in (
+            registry.to_prometheus()
+        )
+
+
+class TestMetricsConfig:
+    """メトリクスの設定のテスト"""
+
+    def test_invalid_interval(self):
+        """ZAICO_METRICS_INTERVAL が正しくない場合は警告して出力しない"""
+        env = {**os.environ, 'ZAICO_METRICS_INTERVAL': '1m'}
+        result = subprocess.run(
+            [sys.executable, '-c', 'from zaico.config import METRICS_INTERVAL; print(METRICS_INTERVAL)'],
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            env=env, capture_output=True, text=True, encoding='utf-8'
+        )
+
+        assert result.returncode == 0
+        assert result.stdout.strip() == '0.0'
+        assert 'ZAICO_METRICS_INTERVAL' in result.stderr
@@ -0,0 +1,135 @@
+"""
+一括入出庫モジュールのテスト
+
+入出庫ファイルの読み込み、集約、反映処理のユニットテストを提供します。
+"""
+import pytest
+import requests
+from unittest.mock import patch
+
+from zaico.client import ZaicoClient, set_client
+from zaico.movements import aggregate_movements, apply_movements, read_movements, resolve_titles
+from zaico.stub import ZaicoStub, make_inventories
+
+
+class TestReadMovements:
+    """read_movements関数のテスト"""
+
+    def test_csv(self, tmp_path):
+        """CSVから入出庫を読み込む"""
+        path = tmp_path / 'movements.csv'
+        path.write_text('物品名,数量\n商品A,5\n,3\n商品B,-2\n', encoding='utf-8')
+
+        movements, errors = read_movements(str(path))
+
+        assert movements == [('商品A', '5'), ('商品B', '-2')]
+        assert len(errors) == 1
+
+    def test_jsonl(self, tmp_path):
+        """JSONLから入出庫を読み込む"""
+        path = tmp_path / 'movements.jsonl'
+        path.write_text('{"title": "商品A", "delta": 5}\n\n{"title": "商品B"}\n', encoding='utf-8')
+
+        movements, errors = read_movements(str(path))
+
+        assert movements == [('商品A', '5')]
+        assert len(errors) == 1
+
+
+class TestAggregateMovements:
+    """aggregate_movements関数のテスト"""
+
+    def test_sum_by_title(self):
+        """同一商品の増減数を合算する"""
+        deltas, errors = aggregate_movements([('商品A', '5'), ('商品B', '1'), ('商品A', '-3'), ('商品C', 'x')])
+
+        assert deltas == {'商品A': 2.0, '商品B': 1.0}
+        assert len(errors) == 1
+
+
+class TestResolveTitles:
+    """resolve_titles関数のテスト"""
+
+    @patch('zaico.movements.iter_zaico_inventories')
+    @patch('zaico.movements.TITLE_LOOKUP_THRESHOLD', 1)
+    def test_use_listing_for_many_titles(self, mock_iter):
+        """商品数が多い場合は在庫一覧から照合する"""
+        mock_iter.return_value = iter([
+            {'id': 1, 'title': '商品A'}, {'id': 2, 'title': '商品B'}, {'id': 3, 'title': '商品A'}
+        ])
+
+        result = resolve_titles(['商品A', '商品B', '商品C'])
+
+        assert result == {'商品A': {'id': 1, 'title': '商品A'}, '商品B': {'id': 2, 'title': '商品B'}}
+
+    @patch('zaico.movements.get_inventory_by_title')
+    def test_search_requires_exact_title(self, mock_get):
+        """商品名ごとの検索でも、部分一致した別の商品は使わない"""
+        mock_get.side_effect = lambda title: {
+            '商品A': [{'id': 3, 'title': '商品A-2'}, {'id': 1, 'title': '商品A'}],
+            '商品B': [{'id': 4, 'title': '商品B（旧）'}],
+        }[title]
+
+        result = resolve_titles(['商品A', '商品B'])
+
+        assert result == {'商品A': {'id': 1, 'title': '商品A'}}
+
+    @patch('zaico.movements.get_inventory_by_title')
+    def test_transport_error(self, mock_get):
+        """通信エラーの場合は例外を送出せずにNoneを返す"""
+        mock_get.side_effect = requests.ConnectionError('connection refused')
+
+        assert resolve_titles(['商品A']) is None
+        assert apply_movements({'商品A': 1.0}) is None
+
+
+class TestApplyMovements:
+    """apply_movements関数のテスト"""
+
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
+    @patch('zaico.movements.get_inventory_by_title')
+    def test_apply(self, mock_get, mock_latest, mock_update):
+        """商品ごとに1回だけ更新し、見つからない商品は失敗とする"""
+        mock_get.side_effect = lambda title: {
+            '商品A': [{'id': 1, 'title': '商品A', 'quantity': '10'}],
+            '商品B': [],
+        }[title]
+        mock_latest.return_value = {'id': 1, 'title': '商品A', 'quantity': '10'}
+        mock_update.return_value = {'id': 1, 'quantity': '12'}
+
+        results = apply_movements({'商品A': 2.0, '商品B': -1.0})
+
+        assert [(r.title, r.ok, r.new_quantity) for r in results] == [('商品A', True, 12), ('商品B', False, None)]
+        mock_update.assert_called_once_with(1, 12)
+
+    def test_request_count(self):
+        """検索結果の数量をそのまま使い、商品ごとに検索と数量更新の2回で反映する"""
+        with ZaicoStub(make_inventories(3)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            before = [int(item['quantity']) for item in stub.inventories]
+            count = stub.request_count
+
+            results = apply_movements({'商品000001': 2.0, '商品000002': -1.0})
+
+            assert all(result.ok for result in results)
+            assert stub.request_count == count + 4
+            assert [item['quantity'] for item in stub.inventories[:2]] == [str(before[0] + 2), str(before[1] - 1)]
+
+    def test_request_count_with_verify(self):
+        """verify 指定時は検索・数量更新・更新後の読み直しの3回で反映する"""
+        with ZaicoStub(make_inventories(3)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            count = stub.request_count
+
+            results = apply_movements({'商品000001': 2.0}, verify=True)
+
+            assert all(result.ok for result in results)
+            assert stub.request_count == count + 3
+
+    @patch('zaico.movements.get_inventory_by_title')
+    def test_lookup_error(self, mock_get):
+        """商品の検索に失敗した場合はNoneを返す"""
+        mock_get.return_value = None
+
+        assert apply_movements({'商品A': 1.0}) is None
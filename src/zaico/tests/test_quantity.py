@@ -0,0 +1,145 @@
+"""
+数量更新モジュールのテスト
+
+競合検出付きの数量更新と、増減の集約処理のユニットテストを提供します。
+"""
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from zaico.client import ZaicoClient, set_client
+from zaico.quantity import MovementCoalescer, apply_quantity_delta, update_quantity_by_delta
+from zaico.stock_in import stock_in
+from zaico.stub import ZaicoStub, make_inventories
+
+
+class TestUpdateQuantityByDelta:
+    """update_quantity_by_delta関数のテスト"""
+
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
+    def test_no_conflict(self, mock_get, mock_update):
+        """検索した直後の在庫データから計算し、更新後に読み直す"""
+        inventory = {'id': 1, 'quantity': '10', 'updated_at': 't1'}
+        mock_get.return_value = {'id': 1, 'quantity': '13', 'updated_at': 't2'}
+        mock_update.return_value = {'code': 200}
+
+        update = update_quantity_by_delta(inventory, 3, fresh=True)
+
+        assert update.ok is True
+        assert update.new_quantity == 13
+        assert update.conflicts == 0
+        mock_update.assert_called_once_with(1, 13)
+        mock_get.assert_called_once_with(1)
+
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
+    def test_stale_base_is_not_conflict(self, mock_get, mock_update):
+        """インデックスの在庫データは最新の値を取得して計算し、競合には数えない"""
+        stale = {'id': 1, 'quantity': '10', 'updated_at': 't1'}
+        latest = {'id': 1, 'quantity': '20', 'updated_at': 't2'}
+        mock_get.side_effect = [latest, {'id': 1, 'quantity': '17', 'updated_at': 't3'}]
+        mock_update.return_value = {'code': 200}
+
+        update = update_quantity_by_delta(stale, -3)
+
+        assert update.ok is True
+        assert update.conflicts == 0
+        assert mock_get.call_count == 2
+        mock_update.assert_called_once_with(1, 17)
+
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
+    def test_lost_update_fails(self, mock_get, mock_update):
+        """読み直した数量が更新値と異なれば失敗を返し、再試行しない"""
+        inventory = {'id': 1, 'quantity': '10', 'updated_at': 't1'}
+        mock_get.return_value = {'id': 1, 'quantity': '8', 'updated_at': 't3'}
+        mock_update.return_value = {'code': 200}
+
+        update = update_quantity_by_delta(inventory, 1, fresh=True)
+
+        assert update.ok is False
+        assert update.retryable is False
+        assert update.new_quantity == 11
+        assert update.conflicts == 1
+        mock_update.assert_called_once_with(1, 11)
+
+
+class TestApplyQuantityDelta:
+    """apply_quantity_delta関数のテスト"""
+
+    def test_concurrent_updates_are_serialized(self):
+        """同じ在庫への同時の増減は直列化され、どちらも失われない"""
+        with ZaicoStub(make_inventories(1), latency=0.05) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            inventory_id = stub.inventories[0]['id']
+            before = int(stub.inventories[0]['quantity'])
+
+            threads = [threading.Thread(target=apply_quantity_delta, args=(inventory_id, delta)) for delta in (10, 5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert stub.inventories[0]['quantity'] == str(before + 15)
+
+
+    def test_failure_is_classified(self):
+        """429/5xx は再試行できる失敗、それ以外の4xxは再試行しても成功しない失敗とする"""
+        with ZaicoStub(make_inventories(1)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0))
+            missing = apply_quantity_delta(999999, 1)
+        with ZaicoStub(make_inventories(1), error_rate=1.0, error_statuses=(503,)) as stub:
+            set_client(ZaicoClient(base_url=stub.base_url, token='test', rate_limit=0, max_retries=0))
+            unavailable = apply_quantity_delta(1, 1)
+
+        assert (missing.ok, missing.retryable) == (False, False)
+        assert (unavailable.ok, unavailable.retryable) == (False, True)
+
+
+class TestMovementCoalescer:
+    """MovementCoalescerのテスト"""
+
+    def test_coalesce_same_key(self):
+        """更新中に届いた同じ在庫への増減は合算して1回で適用する"""
+        started = threading.Event()
+        release = threading.Event()
+        applied = []
+
+        def apply(key, delta):
+            applied.append((key, delta))
+            started.set()
+            release.wait(1)
+            return delta
+
+        coalescer = MovementCoalescer(apply, workers=2)
+        first = coalescer.submit(1, 1)
+        started.wait(1)
+        second = coalescer.submit(1, 2)
+        third = coalescer.submit(1, 3)
+        other = coalescer.submit(2, 5)
+        release.set()
+        coalescer.close()
+
+        assert first.result() == 1
+        assert second.result() == third.result() == 5
+        assert other.result() == 5
+        assert sorted(applied) == [(1, 1), (1, 5), (2, 5)]
+
+
+class TestStockInVerify:
+    """verify指定時の stock_in のテスト"""
+
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
+    @patch('zaico.stock_in.get_inventory_by_title')
+    def test_verify(self, mock_search, mock_get, mock_update):
+        """検索結果から計算した更新が他の処理に上書きされた場合は失敗する"""
+        mock_search.return_value = [{'id': 1, 'title': '商品A', 'quantity': '10', 'updated_at': 't1'}]
+        mock_get.return_value = {'id': 1, 'title': '商品A', 'quantity': '17', 'updated_at': 't2'}
+        mock_update.return_value = {'code': 200}
+
+        assert stock_in('商品A', '5', verify=True) is False
+        mock_update.assert_called_once_with(1, 15)
+        mock_get.assert_called_once_with(1)
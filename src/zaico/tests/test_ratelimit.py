@@ -0,0 +1,147 @@
+"""
+レート制限モジュールのテスト
+
+トークンバケットと優先度付きスケジューラーのユニットテストを提供します。
+"""
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from zaico.client import ZaicoClient
+from zaico.ratelimit import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    FileTokenBucket,
+    RequestScheduler,
+    TokenBucket,
+    current_priority,
+    get_scheduler,
+    request_priority,
+    with_current_priority,
+)
+
+
+class TestTokenBucket:
+    """TokenBucketのテスト"""
+
+    def test_wait_when_empty(self):
+        """トークンを使い切ると補充されるまで待機する"""
+        bucket = TokenBucket(rate=50, capacity=1)
+
+        assert bucket.acquire() == 0.0
+        assert bucket.acquire() > 0.0
+
+
+class TestFileTokenBucket:
+    """FileTokenBucketのテスト"""
+
+    def test_shared_between_instances(self, tmp_path):
+        """同じ状態ファイルを使うバケット同士でトークンを共有する"""
+        path = str(tmp_path / 'rate.state')
+        first = FileTokenBucket(path, rate=1, capacity=2)
+        second = FileTokenBucket(path, rate=1, capacity=2)
+
+        assert first.try_acquire() == 0.0
+        assert second.try_acquire() == 0.0
+        assert first.try_acquire() > 0.0
+
+
+class TestRequestScheduler:
+    """RequestSchedulerのテスト"""
+
+    def test_interactive_before_bulk(self):
+        """後から来た優先度の高いリクエストが先にトークンを取得する"""
+        bucket = TokenBucket(rate=10, capacity=1)
+        bucket.try_acquire()
+        scheduler = RequestScheduler(bucket)
+        order = []
+
+        def worker(name, priority):
+            scheduler.acquire(priority)
+            order.append(name)
+
+        bulk = threading.Thread(target=worker, args=('bulk', PRIORITY_BULK))
+        interactive = threading.Thread(target=worker, args=('interactive', PRIORITY_INTERACTIVE))
+        bulk.start()
+        time.sleep(0.02)
+        interactive.start()
+        bulk.join(2)
+        interactive.join(2)
+
+        assert order == ['interactive', 'bulk']
+
+
+class TestGetScheduler:
+    """get_scheduler関数のテスト"""
+
+    def test_shared_by_settings(self):
+        """同じ設定のクライアントは1つのトークンバケットを共有する"""
+        first = ZaicoClient(token='t', rate_limit=3.5, rate_burst=2, rate_limit_file='')
+        second = ZaicoClient(token='t', rate_limit=3.5, rate_burst=2, rate_limit_file='')
+
+        assert first.scheduler is second.scheduler
+        assert first.rate_limiter is get_scheduler(3.5, 2).bucket
+        assert get_scheduler(0, 2) is None
+
+    def test_shared_with_async_client(self):
+        """非同期クライアントも同期クライアントと同じトークンバケットを使用する"""
+        pytest.importorskip('httpx')
+        from zaico.async_client import AsyncZaicoClient
+
+        with patch('zaico.async_client.API_RATE_LIMIT', 4.5), patch('zaico.async_client.API_RATE_LIMIT_FILE', ''):
+            client = AsyncZaicoClient(token='t')
+        sync_client = ZaicoClient(token='t', rate_limit=4.5, rate_limit_file='')
+
+        assert client.rate_limiter is sync_client.rate_limiter
+        assert client.scheduler is sync_client.scheduler
+
+    def test_async_follows_priority(self):
+        """非同期クライアントもスケジューラーの優先度に従ってトークンを取得する"""
+        pytest.importorskip('httpx')
+        from zaico.async_client import AsyncZaicoClient
+
+        bucket = TokenBucket(rate=10, capacity=1)
+        bucket.try_acquire()
+        client = AsyncZaicoClient(token='t', rate_limiter=bucket)
+        order = []
+
+        def bulk():
+            client.scheduler.acquire(PRIORITY_BULK)
+            order.append('bulk')
+
+        async def interactive():
+            await client._wait_rate_limit()
+            order.append('interactive')
+            await client.aclose()
+
+        thread = threading.Thread(target=bulk)
+        thread.start()
+        time.sleep(0.02)
+        asyncio.run(interactive())
+        thread.join(2)
+
+        assert order == ['interactive', 'bulk']
+
+
+class TestRequestPriority:
+    """優先度の設定と引き継ぎのテスト"""
+
+    def test_context(self):
+        """ブロック内だけ優先度が変わる"""
+        assert current_priority() == PRIORITY_INTERACTIVE
+        with request_priority(PRIORITY_BULK):
+            assert current_priority() == PRIORITY_BULK
+        assert current_priority() == PRIORITY_INTERACTIVE
+
+    def test_propagate_to_thread(self):
+        """with_current_priority で包んだ関数は別スレッドでも呼び出し元の優先度を使う"""
+        seen = []
+        with request_priority(PRIORITY_BULK):
+            func = with_current_priority(lambda: seen.append(current_priority()))
+        thread = threading.Thread(target=func)
+        thread.start()
+        thread.join()
+
+        assert seen == [PRIORITY_BULK]
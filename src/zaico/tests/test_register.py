@@ -0,0 +1,58 @@
+"""
+新規商品登録モジュールのテスト
+
+register_items_from_csv 関数のユニットテストを提供します。
+"""
+import csv
+import time
+import pytest
+from unittest.mock import patch
+
+from zaico.register_items import register_items_from_csv
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['物品名', 'カテゴリ', '保管場所', '状態', '数量'])
+        writer.writerows(rows)
+
+
+class TestRegisterItemsFromCsv:
+    """register_items_from_csv関数のテスト"""
+
+    @patch('zaico.register_items.create_inventory')
+    def test_results_in_input_order(self, mock_create, tmp_path):
+        """並列に登録しても結果は入力順に返る"""
+        def create(title, *args):
+            # 先頭の行ほど応答を遅くする
+            time.sleep({'商品A': 0.05, '商品B': 0.02}.get(title, 0))
+            return True, {'title': title}
+        mock_create.side_effect = create
+        csv_path = tmp_path / 'new.csv'
+        _write_csv(csv_path, [['商品A', '', '', '', '1'], ['商品B', '', '', '', ''], ['商品C', 'カテゴリ1', '', '', '3']])
+
+        results = register_items_from_csv(str(csv_path), workers=3)
+
+        assert [r.row['物品名'] for r in results] == ['商品A', '商品B', '商品C']
+        assert all(r.ok for r in results)
+        mock_create.assert_any_call('商品C', 'カテゴリ1', None, None, '3')
+
+    @patch('zaico.register_items.create_inventory')
+    def test_failed_rows_written(self, mock_create, tmp_path):
+        """失敗した行は再実行用のCSVに書き出される"""
+        mock_create.side_effect = lambda title, *args: (title != '商品B', 'Bad Request')
+        csv_path = tmp_path / 'new.csv'
+        failed_path = tmp_path / 'failed.csv'
+        _write_csv(csv_path, [['商品A', '', '', '', '1'], ['商品B', '', '倉庫B', '', '2'], ['', '', '', '', '']])
+
+        results = register_items_from_csv(str(csv_path), workers=2, failed_csv_path=str(failed_path))
+
+        assert [r.ok for r in results] == [True, False]
+        assert results[1].line_no == 3
+        with open(failed_path, newline='', encoding='utf-8') as f:
+            failed = list(csv.DictReader(f))
+        assert len(failed) == 1
+        assert failed[0]['物品名'] == '商品B'
+        assert failed[0]['保管場所'] == '倉庫B'
+        assert failed[0]['エラー'] == 'Bad Request'
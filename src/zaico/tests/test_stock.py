@@ -13,11 +13,13 @@ from zaico.stock_out import stock_out
 class TestStockIn:
     """stock_in関数のテスト"""
 
-    @patch('zaico.stock_in.update_inventory_quantity')
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
     @patch('zaico.stock_in.get_inventory_by_title')
-    def test_success(self, mock_get, mock_update):
+    def test_success(self, mock_get, mock_latest, mock_update):
         """正常に入庫できる"""
         mock_get.return_value = [{'id': 1, 'title': '商品A', 'quantity': '10'}]
+        mock_latest.return_value = {'id': 1, 'title': '商品A', 'quantity': '10'}
         mock_update.return_value = {'id': 1, 'quantity': '15'}
 
         result = stock_in('商品A', '5')
@@ -34,10 +36,12 @@ class TestStockIn:
 
         assert result is False
 
+    @patch('zaico.quantity.get_inventory')
     @patch('zaico.stock_in.get_inventory_by_title')
-    def test_invalid_quantity_format(self, mock_get):
+    def test_invalid_quantity_format(self, mock_get, mock_latest):
         """在庫数が不正な形式の場合はFalseを返す"""
-        mock_get.return_value = [{'id': 1, 'title': '商品A', 'quantity': 'invalid'}]
+        mock_get.return_value = [{'id': 1, 'title': '商品A', 'quantity': '10'}]
+        mock_latest.return_value = {'id': 1, 'title': '商品A', 'quantity': 'invalid'}
 
         result = stock_in('商品A', '5')
 
@@ -56,11 +60,13 @@ class TestStockIn:
 class TestStockOut:
     """stock_out関数のテスト"""
 
-    @patch('zaico.stock_out.update_inventory_quantity')
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
     @patch('zaico.stock_out.get_inventory_by_title')
-    def test_success(self, mock_get, mock_update):
+    def test_success(self, mock_get, mock_latest, mock_update):
         """正常に出庫できる"""
         mock_get.return_value = [{'id': 1, 'title': '商品A', 'quantity': '10'}]
+        mock_latest.return_value = {'id': 1, 'title': '商品A', 'quantity': '10'}
         mock_update.return_value = {'id': 1, 'quantity': '7'}
 
         result = stock_out('商品A', '3')
@@ -68,11 +74,13 @@ class TestStockOut:
         assert result is True
         mock_update.assert_called_once_with(1, 7)
 
-    @patch('zaico.stock_out.update_inventory_quantity')
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
     @patch('zaico.stock_out.get_inventory_by_title')
-    def test_insufficient_stock(self, mock_get, mock_update):
+    def test_insufficient_stock(self, mock_get, mock_latest, mock_update):
         """在庫不足でも出庫は実行される"""
         mock_get.return_value = [{'id': 1, 'title': '商品A', 'quantity': '5'}]
+        mock_latest.return_value = {'id': 1, 'title': '商品A', 'quantity': '5'}
         mock_update.return_value = {'id': 1, 'quantity': '-5'}
 
         result = stock_out('商品A', '10')
@@ -90,11 +98,13 @@ class TestStockOut:
 
         assert result is False
 
-    @patch('zaico.stock_out.update_inventory_quantity')
+    @patch('zaico.quantity.update_inventory_quantity')
+    @patch('zaico.quantity.get_inventory')
     @patch('zaico.stock_out.get_inventory_by_title')
-    def test_update_failed(self, mock_get, mock_update):
+    def test_update_failed(self, mock_get, mock_latest, mock_update):
         """更新に失敗した場合はFalseを返す"""
         mock_get.return_value = [{'id': 1, 'title': '商品A', 'quantity': '10'}]
+        mock_latest.return_value = {'id': 1, 'title': '商品A', 'quantity': '10'}
         mock_update.return_value = None
 
         result = stock_out('商品A', '3')
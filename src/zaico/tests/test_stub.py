@@ -0,0 +1,82 @@
+"""
+ZAICO APIスタブのテスト
+
+スタブに対して zaico.api の関数を実行し、実際のAPIと同じ規約で動作することを確認します。
+"""
+import time
+
+import pytest
+
+from zaico.api import create_inventory, get_inventory, get_inventory_by_title, get_zaico_inventories, update_inventory_quantity
+from zaico.client import ZaicoClient, set_client
+from zaico.stub import ZaicoStub, make_inventories
+
+
+@pytest.fixture
+def stub():
+    """
+    在庫25件・1ページ10件のスタブを起動し、共有クライアントの接続先にする
+    """
+    with ZaicoStub(make_inventories(25), page_size=10) as server:
+        set_client(ZaicoClient(base_url=server.base_url, token='test', rate_limit=0))
+        yield server
+
+
+class TestZaicoStub:
+    """ZaicoStubのテスト"""
+
+    def test_make_inventories_is_deterministic(self):
+        """同じシードなら同じ在庫データになる"""
+        assert make_inventories(5, seed=1) == make_inventories(5, seed=1)
+
+    @pytest.mark.parametrize('concurrency', [1, 3])
+    def test_list_all_pages(self, stub, concurrency):
+        """Link / Total-Count ヘッダーで全ページを取得できる"""
+        items = get_zaico_inventories(concurrency=concurrency)
+
+        assert [item['id'] for item in items] == list(range(1, 26))
+
+    def test_search_update_and_create(self, stub):
+        """検索・数量更新・新規登録ができる"""
+        item = get_inventory_by_title('商品000003')[0]
+
+        assert update_inventory_quantity(item['id'], 42) is not None
+        assert get_inventory(item['id'])['quantity'] == '42'
+
+        ok, response = create_inventory('新商品', quantity=5)
+        assert ok is True
+        assert get_inventory(response['data_id'])['title'] == '新商品'
+
+    def test_not_found(self, stub):
+        """存在しない在庫はエラー（None）"""
+        assert get_inventory(9999) is None
+
+
+class TestZaicoStubFaults:
+    """遅延・エラー注入・レート制限のテスト"""
+
+    def test_error_injection(self):
+        """error_rate=1 ならすべてのリクエストに注入したエラーを返す"""
+        with ZaicoStub(make_inventories(3), error_rate=1.0, error_statuses=(503,), seed=0) as server:
+            set_client(ZaicoClient(base_url=server.base_url, token='test', rate_limit=0, max_retries=0))
+
+            assert get_inventory(1) is None
+            assert server.status_counts == {503: 1}
+
+    def test_rate_limit_returns_429_with_retry_after(self):
+        """上限を超えたリクエストには429と Retry-After を返す"""
+        with ZaicoStub(make_inventories(3), rate_limit=0.5, rate_burst=1) as server:
+            assert server.respond('GET', '/inventories/1', {}, None)[0] == 200
+            status, _, headers = server.respond('GET', '/inventories/1', {}, None)
+
+            assert status == 429
+            assert int(headers['Retry-After']) >= 1
+            assert server.status_counts == {200: 1, 429: 1}
+
+    def test_latency(self):
+        """latency 秒だけ応答を遅らせる"""
+        with ZaicoStub(make_inventories(1), latency=0.05) as server:
+            started = time.perf_counter()
+            server.respond('GET', '/inventories/1', {}, None)
+
+            assert time.perf_counter() - started >= 0.05
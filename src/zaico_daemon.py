@@ -0,0 +1,13 @@
+"""
+入出庫常駐サービスエントリーポイント
+
+入出庫を受け付けてZAICOに反映する常駐サービスを起動します。
+ZAICO_DAEMON_URL を設定すると、入庫・出庫処理はこのサービスに依頼されます。
+
+使用方法:
+    python zaico_daemon.py [--port 8765] [--drop-dir tmp/movements] [--preload] [--profile]
+"""
+from profiling import run_main
+
+if __name__ == "__main__":
+    run_main('zaico.daemon')
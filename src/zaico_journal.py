@@ -0,0 +1,13 @@
+"""
+入出庫ジャーナル反映エントリーポイント
+
+入出庫ジャーナル（ZAICO_JOURNAL_PATH）に記録された未反映の入出庫をZAICOに反映します。
+常駐サービスを起動していない場合や、反映できなかった入出庫を再試行する場合に使用します。
+
+使用方法:
+    python zaico_journal.py [--status] [--retry-failed] [--profile]
+"""
+from profiling import run_main
+
+if __name__ == "__main__":
+    run_main('zaico.journal')
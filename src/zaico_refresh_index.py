@@ -0,0 +1,12 @@
+"""
+在庫インデックス同期エントリーポイント
+
+ZAICOの在庫一覧を取得し、ローカルの在庫インデックス（SQLite）を同期します。
+
+使用方法:
+    python zaico_refresh_index.py [--path インデックスファイル] [--profile]
+"""
+from profiling import run_main
+
+if __name__ == "__main__":
+    run_main('zaico.index')
@@ -0,0 +1,12 @@
+"""
+一括入出庫エントリーポイント
+
+入出庫ファイル（CSV/JSONL）の内容をZAICOの在庫にまとめて反映します。
+
+使用方法:
+    python zaico_stock_batch.py 入出庫ファイル [--profile]
+"""
+from profiling import run_main
+
+if __name__ == "__main__":
+    run_main('zaico.movements')
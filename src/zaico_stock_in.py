@@ -4,10 +4,9 @@
 ZAICOの在庫に対する入庫処理を実行します。
 
 使用方法:
-    python zaico_stock_in.py 商品名 追加数量
+    python zaico_stock_in.py 商品名 追加数量 [--profile]
 """
-from zaico.stock_in import main
+from profiling import run_main
 
 if __name__ == "__main__":
-    main()
-
+    run_main('zaico.cli', 'stock_in_main')
@@ -4,10 +4,9 @@
 ZAICOの在庫に対する出庫処理を実行します。
 
 使用方法:
-    python zaico_stock_out.py 商品名 出庫数量
+    python zaico_stock_out.py 商品名 出庫数量 [--profile]
 """
-from zaico.stock_out import main
+from profiling import run_main
 
 if __name__ == "__main__":
-    main()
-
+    run_main('zaico.cli', 'stock_out_main')
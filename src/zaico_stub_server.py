@@ -0,0 +1,13 @@
+"""
+ZAICO APIスタブサーバーエントリーポイント
+
+ZAICO APIの在庫エンドポイントを再現するローカルサーバーを起動します。
+負荷試験やネットワークのない環境での動作確認に使用します。
+
+使用方法:
+    python zaico_stub_server.py [--port 8080] [--latency 0.05] [--error-rate 0.01] [--rate-limit 5] [--profile]
+"""
+from profiling import run_main
+
+if __name__ == "__main__":
+    run_main('zaico.stub')
@@ -0,0 +1,52 @@
+# -*- mode: python ; coding: utf-8 -*-
+"""
+ZAICOツールのPyInstaller設定（1フォルダ・複数EXE）
+
+各ツールのEXEを1つのフォルダにまとめ、Python本体・依存パッケージを共有します。
+--onefile と異なり起動のたびに一時フォルダへ展開しないため、起動が速くなります。
+
+使用方法:
+    cd src
+    pyinstaller zaico_tools.spec
+
+生成物: dist/zaico_tools/ （各EXEと共有の _internal/ フォルダ）
+"""
+
+# (エントリースクリプト, EXE名, main() のモジュール)
+# エントリースクリプトは profiling.run_main でモジュールを名前から読み込むため、hiddenimports に指定する
+TOOLS = [
+    ('zaico_stock_in.py', 'zaico_stock_in', 'zaico.cli'),
+    ('zaico_stock_out.py', 'zaico_stock_out', 'zaico.cli'),
+    ('export_zaico_inventory_csv.py', 'export_zaico_inventory_csv', 'zaico.export_inventory'),
+    ('register_new_items_to_zaico.py', 'register_new_items_to_zaico', 'zaico.register_items'),
+    ('zaico_stock_batch.py', 'zaico_stock_batch', 'zaico.movements'),
+    ('zaico_refresh_index.py', 'zaico_refresh_index', 'zaico.index'),
+    ('zaico_daemon.py', 'zaico_daemon', 'zaico.daemon'),
+    ('zaico_journal.py', 'zaico_journal', 'zaico.journal'),
+]
+
+# ZAICOツールでは使用しない大きなパッケージ（売上推移・非同期クライアント・テスト用）
+EXCLUDES = ['pandas', 'numpy', 'openpyxl', 'pyarrow', 'httpx', 'pytest', 'tkinter', 'uriage_suii', 'benchmarks']
+
+executables = []
+collected = []
+for script, name, module in TOOLS:
+    analysis = Analysis([script], pathex=['.'], hiddenimports=[module], excludes=EXCLUDES, noarchive=False)
+    pyz = PYZ(analysis.pure)
+    executables.append(EXE(
+        pyz,
+        analysis.scripts,
+        [],
+        exclude_binaries=True,
+        name=name,
+        console=True,
+        upx=False,
+    ))
+    collected += [analysis.binaries, analysis.datas]
+
+coll = COLLECT(
+    *executables,
+    *collected,
+    upx=False,
+    name='zaico_tools',
+)